@@ -31,8 +31,8 @@
 
 
 import re, sys
-import numpy as np
 import copy
+from .discretization import Discretizer
 
 class ArffFile(object):
     """class to read and write arff data structures
@@ -252,6 +252,24 @@ class ArffFile(object):
         
         return selection
 
+    def take_rows(self, indices):
+        """return an ARFF File made of the selected rows, which are shared with
+        this data set rather than copied
+
+        :param indices: indices of the selected rows
+        :type indices: list of integers
+        :return: a new ArffFile structure containing the selected rows
+        :rtype: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        selection = ArffFile()
+        selection.attribute_data = self.attribute_data.copy()
+        selection.attribute_types = self.attribute_types.copy()
+        selection.data = [self.data[i] for i in indices]
+        selection.relation = self.relation
+        selection.attributes = self.attributes[:]
+        selection.comment = self.comment[:]
+        return selection
+
     def make_clone(self):
         """Make a copy of the current object
         
@@ -281,160 +299,26 @@ class ArffFile(object):
         
         if discmet='ent', the method of [#fayyad1993]_
         
+        Cut points are learned by a :class:`~classifip.dataset.discretization.Discretizer`,
+        which can be used directly to discretize a test set with the cut points
+        of a training set. With the 'eqfreq' method, rows are left sorted by the
+        values of the discretized features.
+        
         :param discmet: discretization method. Can be either 'ent','eqfreq' or 'eqwidth'
         :type discmet: string
         :param numint: number of intervals into which divide attributes
         :type numint: integer
         :param selfeat: name of a particular feature to discretize, if None discretize all
         :type selfeat: string
-        
-        ..todo::
-        
-            * encode the method of fayyad et al. 1993 in this function (rather than using Orange)
-        
+        :returns: the fitted discretizer
+        :rtype: :class:`~classifip.dataset.discretization.Discretizer`
         """
-        datasave = np.array([[str(item) for item in row] for row in self.data], dtype=object)
-        numitem=datasave.shape[0]
-        if discmet=='eqfreq':
-            if selfeat!=None:
-                if self.attribute_types[selfeat]!='numeric':
-                    raise NameError("Selected feature not numeric.")
-                indexfeat=self.attributes.index(selfeat)
-                floatdata=datasave[:,indexfeat].astype(float)
-                datasave=datasave[np.argsort(floatdata)]
-                floatdata=floatdata[np.argsort(floatdata)]
-                cutpoint=[]
-                newname=[]
-                for i in range(numint):
-                    cutpoint.append(datasave[int((i+1)*(numitem/(numint)))-1,indexfeat])
-                for i in range(numint):
-                    if i==0:
-                        string=str(cutpoint[i])
-                        newname.append('<='+string[0:min(len(string),7)])
-                    elif i==(numint-1):
-                        string=str(cutpoint[i-1])
-                        newname.append('>'+string[0:min(len(string),7)])
-                    else:
-                        string1=str(cutpoint[i-1])
-                        string2=str(cutpoint[i])
-                        newname.append('('+string1[0:min(len(string1),7)]
-                                        +';'+string2[0:min(len(string2),7)]+']')
-                for i in range(numint):
-                    if i==0:
-                        datasave[(floatdata<=float(cutpoint[i])),indexfeat]=newname[i]
-                    elif i==(numint-1):
-                        datasave[(floatdata>float(cutpoint[i-1])),indexfeat]=newname[i]
-                    else:
-                        datasave[(floatdata>float(cutpoint[i-1])) &
-                            (floatdata<=float(cutpoint[i])),indexfeat]=newname[i]
-                self.data=datasave.tolist()
-                self.attribute_types[selfeat]='nominal'
-                self.attribute_data[selfeat]=newname
-            else:
-                for i in range(len(self.attributes)):
-                    feature=self.attributes[i]
-                    if self.attribute_types[feature]=='numeric':
-                        floatdata=datasave[:,i].astype(float)
-                        datasave=datasave[np.argsort(floatdata)]
-                        floatdata=floatdata[np.argsort(floatdata)]
-                        cutpoint=[]
-                        newname=[]
-                        for j in range(numint):
-                            cutpoint.append(datasave[int((j+1)*(numitem/(numint)))-1,i])
-                        for j in range(numint):
-                            if j==0:
-                                string=str(cutpoint[j])
-                                newname.append('<='+string[0:min(len(string),7)])
-                            elif j==(numint-1):
-                                string=str(cutpoint[j-1])
-                                newname.append('>'+string[0:min(len(string),7)])
-                            else:
-                                string1=str(cutpoint[j-1])
-                                string2=str(cutpoint[j])
-                                newname.append('('+string1[0:min(len(string1),7)]
-                                        +';'+string2[0:min(len(string2),7)]+']')
-                        for j in range(numint):
-                            if j==0:
-                                datasave[(floatdata<=float(cutpoint[j])),i]=newname[j]
-                            elif j==(numint-1):
-                                datasave[(floatdata>float(cutpoint[j-1])),i]=newname[j]
-                            else:
-                                datasave[(floatdata>float(cutpoint[j-1])) &
-                                    (floatdata<=float(cutpoint[j])),i]=newname[j]
-                        self.attribute_types[feature]='nominal'
-                        self.attribute_data[feature]=newname
-                self.data=datasave.tolist()
-                
-        if discmet=='eqwidth':
-            if selfeat!=None:
-                if self.attribute_types[selfeat]!='numeric':
-                    raise NameError("Selected feature not numeric.")
-                indexfeat=self.attributes.index(selfeat)
-                floatdata=datasave[:,indexfeat].astype(float)
-                cutpoint=[]
-                newname=[]
-                totalwidth=(floatdata.max()-floatdata.min())
-                for i in range(numint):
-                    cutpoint.append(floatdata.min()+(i+1)*totalwidth/numint)
-                for i in range(numint):
-                    if i==0:
-                        string=str(cutpoint[i])
-                        newname.append('<='+string[0:min(len(string),7)])
-                    elif i==(numint-1):
-                        string=str(cutpoint[i-1])
-                        newname.append('>'+string[0:min(len(string),7)])
-                    else:
-                        string1=str(cutpoint[i-1])
-                        string2=str(cutpoint[i])
-                        newname.append('('+string1[0:min(len(string1),7)]
-                                        +';'+string2[0:min(len(string2),7)]+']')
-                for i in range(numint):
-                    if i==0:
-                        datasave[(floatdata<=cutpoint[i]),indexfeat]=newname[i]
-                    elif i==(numint-1):
-                        datasave[(floatdata>cutpoint[i-1]),indexfeat]=newname[i]
-                    else:
-                        datasave[(floatdata >cutpoint[i-1]) &
-                            (floatdata <=cutpoint[i]),indexfeat]=newname[i]
-                self.data=datasave.tolist()
-                self.attribute_types[selfeat]='nominal'
-                self.attribute_data[selfeat]=newname
-            else:
-                for i in range(len(self.attributes)):
-                    feature=self.attributes[i]
-                    if self.attribute_types[feature]=='numeric':
-                        floatdata=datasave[:,i].astype(float)
-                        cutpoint=[]
-                        newname=[]
-                        totalwidth=(floatdata.max()-floatdata.min())
-                        for j in range(numint):
-                            cutpoint.append(floatdata.min()+(j+1)*totalwidth/numint)
-                        for j in range(numint):
-                            if j==0:
-                                string=str(cutpoint[j])
-                                newname.append('<='+string[0:min(len(string),7)])
-                            elif j==(numint-1):
-                                string=str(cutpoint[j-1])
-                                newname.append('>'+string[0:min(len(string),7)])
-                            else:
-                                string1=str(cutpoint[j-1])
-                                string2=str(cutpoint[j])
-                                newname.append('('+string1[0:min(len(string1),7)]
-                                               +';'+string2[0:min(len(string2),7)]+']')
-                        for j in range(numint):
-                            if j==0:
-                                datasave[(floatdata<=cutpoint[j]),i]=newname[j]
-                            elif j==(numint-1):
-                                datasave[(floatdata>cutpoint[j-1]),i]=newname[j]
-                            else:
-                                datasave[(floatdata>cutpoint[j-1]) &
-                                    (floatdata<=cutpoint[j]),i]=newname[j]
-                        self.attribute_types[feature]='nominal'
-                        self.attribute_data[feature]=newname
-                self.data=datasave.tolist()
-        
-        if discmet=='ent':
-            print("sorry, not implemented, please use discretize_ent function of classifip.datasets")
+        discretizer = Discretizer(discmet, numint).fit(self, selfeat)
+        if discmet == 'eqfreq':
+            order = discretizer.eqfreq_order(self)
+            self.data = [self.data[i] for i in order]
+        discretizer.transform(self)
+        return discretizer
 
     @staticmethod
     def parse(s):
@@ -448,6 +332,26 @@ class ArffFile(object):
             a.lineno += 1
         return a
 
+    @staticmethod
+    def parse_header(lines):
+        """Parse the header of an ARFF File, stopping after the @data line.
+
+        :param lines: iterator over the lines of the file (e.g. an open file),
+            which is left positioned on the first line of the data section
+        :type lines: iterator of strings
+        :return: an ArffFile structure without data
+        :rtype: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        a = ArffFile()
+        a.state = 'comment'
+        a.lineno = 1
+        for l in lines:
+            a.__parseline(l.rstrip('\r\n'))
+            a.lineno += 1
+            if a.state == 'data':
+                break
+        return a
+
     def save(self, filename):
         """Save an arff structure to a file.
         
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from .columnar import ColumnarArffFile
+
+CACHE_VERSION = 1
+
+
+def content_hash(filename, block_size=1 << 20):
+    """Return the SHA-1 hash of the content of a file
+
+    :param filename: the name of the file
+    :type filename: string
+    :rtype: string
+    """
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as stream:
+        for block in iter(lambda: stream.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(filename, discmet=None, numint=4, selfeat=None):
+    """Return the key of a parsed (and discretized) ARFF file in the cache,
+    built from the content of the file and the discretization parameters
+
+    :rtype: string
+    """
+    key = json.dumps([CACHE_VERSION, content_hash(filename), discmet, numint, selfeat])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def save_columnar(dataset, directory):
+    """Save a columnar data set in a directory: one .npy file by column plus a
+    JSON header (attributes, types, modalities, ...)
+
+    :param dataset: data set to save
+    :type dataset: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+    :param directory: the name of the directory (created if needed)
+    :type directory: string
+    """
+    os.makedirs(directory, exist_ok=True)
+    header = {
+        'relation': dataset.relation,
+        'attributes': dataset.attributes,
+        'attribute_types': dataset.attribute_types,
+        'attribute_data': dataset.attribute_data,
+        'comment': dataset.comment,
+        'column_values': dataset.column_values,
+        'nb_rows': dataset.nb_rows
+    }
+    for j, column in enumerate(dataset.columns):
+        if column.dtype == object:
+            # strings are stored with a fixed width so that they do not need pickling
+            column = column.astype(str)
+        np.save(os.path.join(directory, 'column_%d.npy' % j), column, allow_pickle=False)
+    with open(os.path.join(directory, 'header.json'), 'w') as stream:
+        json.dump(header, stream)
+
+
+def load_columnar(directory, mmap_mode='r'):
+    """Load a columnar data set saved by :func:`save_columnar`
+
+    :param directory: the name of the directory
+    :type directory: string
+    :param mmap_mode: memory-map mode of numeric and nominal columns (see
+        :func:`numpy.load`), None to load them in memory
+    :type mmap_mode: string
+    :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+
+    .. warning::
+
+        memory-mapped columns are read-only (by default), a column must be
+        replaced (see :meth:`~classifip.dataset.columnar.ColumnarArffFile.set_column`)
+        rather than modified in place.
+    """
+    with open(os.path.join(directory, 'header.json')) as stream:
+        header = json.load(stream)
+    dataset = ColumnarArffFile()
+    dataset.relation = header['relation']
+    dataset.attributes = header['attributes']
+    dataset.attribute_types = header['attribute_types']
+    dataset.attribute_data = header['attribute_data']
+    dataset.comment = header['comment']
+    dataset.column_values = header['column_values']
+    dataset.nb_rows = header['nb_rows']
+    for j, attribute in enumerate(dataset.attributes):
+        column = np.load(os.path.join(directory, 'column_%d.npy' % j), mmap_mode=mmap_mode, allow_pickle=False)
+        if dataset.attribute_types[attribute] in ('string', 'ranking'):
+            column = column.astype(object)
+        dataset.columns.append(column)
+    return dataset
+
+
+def load_cached(filename, discmet=None, numint=4, selfeat=None, cache_dir=None):
+    """Load an ARFF file, discretized if discmet is given, using a cache of
+    parsed data sets: the first call parses (and discretizes) the file and saves
+    the result, the next ones with the same file content and discretization
+    parameters memory-map the saved columns.
+
+    :param filename: the name of the ARFF file
+    :type filename: string
+    :param discmet: discretization method, see
+        :meth:`~classifip.dataset.arff.ArffFile.discretize` (None: no discretization)
+    :type discmet: string
+    :param numint: number of intervals into which divide attributes
+    :type numint: integer
+    :param selfeat: name of a particular feature to discretize, if None discretize all
+    :type selfeat: string
+    :param cache_dir: directory of the cache (default: directory '.arff_cache'
+        next to the ARFF file)
+    :type cache_dir: string
+    :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(filename)), '.arff_cache')
+    directory = os.path.join(cache_dir, cache_key(filename, discmet, numint, selfeat))
+    if os.path.exists(os.path.join(directory, 'header.json')):
+        return load_columnar(directory)
+
+    dataset = ColumnarArffFile()
+    dataset.load(filename)
+    if discmet is not None:
+        dataset.discretize(discmet, numint, selfeat)
+    # saved in a temporary directory and then renamed, so that concurrent runs
+    # never read a partially written entry
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_directory = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        save_columnar(dataset, tmp_directory)
+        os.rename(tmp_directory, directory)
+    except OSError:
+        # entry already written by another run
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+    return load_columnar(directory)
@@ -0,0 +1,484 @@
+import numpy as np
+from itertools import islice
+from .arff import ArffFile
+from .discretization import Discretizer
+
+
+class ColumnarArffFile(ArffFile):
+    """Columnar storage engine behind :class:`~classifip.dataset.arff.ArffFile`
+
+    Each attribute is stored in its own NumPy array, aligned with the list of
+    attributes:
+
+    - 'nominal': small integer codes (-1 for missing values) indexing a table of
+      values, made of the modalities of the attribute followed by any other
+      value found in the data (e.g. '-1' for missing labels)
+    - 'numeric': float64 values (nan for missing values)
+    - 'string' and 'ranking': arrays of Python strings
+
+    so that selecting rows, removing columns or cloning the data set are index
+    and array operations rather than loops over Python rows.
+
+    The attribute :attr:`data` remains available for existing callers as a list
+    of rows, built from the columns on first access and cached until columns
+    change. Assigning a list of rows to :attr:`data` rebuilds the columns.
+
+    Files are loaded by chunks of lines (see :meth:`load`), and can be read by
+    batches of rows with :meth:`iter_batches`.
+
+    >>> from classifip.dataset.columnar import ColumnarArffFile
+    >>> dataset = ColumnarArffFile()
+    >>> dataset.define_attribute('size', 'numeric')
+    >>> dataset.define_attribute('class', 'nominal', ['a', 'b'])
+    >>> dataset.data = [[1.5, 'a'], [0.5, 'b'], [2., 'a']]
+    >>> dataset.columns[1]
+    array([0, 1, 0], dtype=int32)
+    >>> dataset.select_class(['a']).data
+    [[1.5, 'a'], [2.0, 'a']]
+
+    .. warning::
+
+        In-place modifications of the rows of :attr:`data` are not reported to
+        the columns: modified rows must be assigned again to :attr:`data`.
+    """
+
+    def __init__(self):
+        """Construct an empty columnar ARFF structure."""
+        self.columns = []
+        self.column_values = []
+        self.nb_rows = 0
+        self._rows = None
+        super(ColumnarArffFile, self).__init__()
+
+    @classmethod
+    def from_arff(cls, dataset):
+        """Build a columnar data set from an :class:`~classifip.dataset.arff.ArffFile`
+
+        :param dataset: data set stored by rows
+        :type dataset: :class:`~classifip.dataset.arff.ArffFile`
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        columnar = cls()
+        columnar.relation = dataset.relation
+        columnar.attributes = dataset.attributes[:]
+        columnar.attribute_types = dataset.attribute_types.copy()
+        columnar.attribute_data = dataset.attribute_data.copy()
+        columnar.comment = dataset.comment[:]
+        columnar.data = dataset.data
+        return columnar
+
+    def to_arff(self):
+        """Return the data set stored by rows
+
+        :rtype: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        dataset = ArffFile()
+        dataset.relation = self.relation
+        dataset.attributes = self.attributes[:]
+        dataset.attribute_types = self.attribute_types.copy()
+        dataset.attribute_data = self.attribute_data.copy()
+        dataset.comment = self.comment[:]
+        dataset.data = self.data
+        return dataset
+
+    def load(self, filename, batch_size=10000):
+        """Load an ARFF File from a file, reading the data section by chunks of
+        rows which are parsed column by column.
+
+        :param filename: the name of the file containing data
+        :type filename: string
+        :param batch_size: number of lines parsed at once
+        :type batch_size: integer
+        """
+        self.__init__()
+        with open(filename) as stream:
+            self.__set_header(ArffFile.parse_header(stream))
+            chunks = [[] for _ in self.attributes]
+            for columns in self.__parse_stream(stream, batch_size):
+                for j, column in enumerate(columns):
+                    chunks[j].append(column)
+        for j, attribute in enumerate(self.attributes):
+            if self.attribute_types[attribute] == 'nominal':
+                self.column_values.append(list(self.attribute_data[attribute]))
+            else:
+                self.column_values.append(None)
+            self.columns.append(np.concatenate(chunks[j]) if len(chunks[j]) > 0 else self.__empty_column(j))
+        self.nb_rows = len(self.columns[0]) if len(self.columns) > 0 else 0
+
+    @classmethod
+    def iter_batches(cls, filename, batch_size=10000):
+        """Iterate over an ARFF File by batches of rows, without loading the
+        whole file in memory.
+
+        :param filename: the name of the file containing data
+        :type filename: string
+        :param batch_size: number of lines parsed at once (a batch can have
+            less rows, e.g. if the chunk contains comments or malformed rows)
+        :type batch_size: integer
+        :return: data sets sharing the header of the file
+        :rtype: iterator of :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        header = cls()
+        with open(filename) as stream:
+            header.__set_header(ArffFile.parse_header(stream))
+            for j, attribute in enumerate(header.attributes):
+                is_nominal = header.attribute_types[attribute] == 'nominal'
+                header.column_values.append(list(header.attribute_data[attribute]) if is_nominal else None)
+                header.columns.append(header.__empty_column(j))
+            for columns in header.__parse_stream(stream, batch_size):
+                batch = header.take_rows(slice(None))
+                batch.columns = columns
+                batch.nb_rows = len(columns[0]) if len(columns) > 0 else 0
+                yield batch
+
+    def __set_header(self, header):
+        self.relation = header.relation
+        self.attributes = header.attributes
+        self.attribute_types = header.attribute_types
+        self.attribute_data = header.attribute_data
+        self.comment = header.comment
+        self.lineno = header.lineno
+
+    def __empty_column(self, index):
+        atype = self.attribute_types[self.attributes[index]]
+        if atype == 'nominal':
+            return np.empty(0, dtype=np.int32)
+        return np.empty(0, dtype=float if atype == 'numeric' else object)
+
+    def __parse_stream(self, stream, batch_size):
+        while True:
+            lines = list(islice(stream, batch_size))
+            if len(lines) == 0:
+                break
+            yield self.__parse_lines(lines)
+            self.lineno += len(lines)
+
+    def __parse_lines(self, lines):
+        """Parse a chunk of lines of the data section into a list of columns"""
+        nb_attributes = len(self.attributes)
+        rows, linenos = [], []
+        for i, l in enumerate(lines):
+            l = l.strip()
+            if len(l) == 0 or l[0] == '%':
+                continue
+            cells = self.sparse_cells(l) if l[0] == '{' else l.split(',')
+            if len(cells) == nb_attributes:
+                rows.append(cells)
+                linenos.append(self.lineno + i)
+        cells = list(zip(*rows)) if len(rows) > 0 else [()] * nb_attributes
+        is_valid = np.ones(len(rows), dtype=bool)
+        columns = []
+        for j, attribute in enumerate(self.attributes):
+            atype = self.attribute_types[attribute]
+            if atype == 'numeric':
+                try:
+                    columns.append(np.array(cells[j], dtype=float))
+                    continue
+                except ValueError:
+                    # missing ('?') or non numeric values, rows are checked value by value
+                    pass
+            column_cells = np.char.strip(np.array(cells[j], dtype=str))
+            values, inverse = np.unique(column_cells, return_inverse=True)
+            if atype == 'nominal':
+                index_values = {value: code for code, value in enumerate(self.attribute_data[attribute])}
+                index_values['?'] = -1
+                # unknown values are flagged by -2 and their rows skipped
+                codes = np.array([index_values.get(value, -2) for value in values], dtype=np.int32)
+                column = codes[inverse.reshape(-1)]
+                is_unknown = column == -2
+            elif atype == 'numeric':
+                floats = np.full(len(values), np.nan)
+                is_unknown_value = np.zeros(len(values), dtype=bool)
+                for k, value in enumerate(values):
+                    if value != '?':
+                        try:
+                            floats[k] = float(value)
+                        except ValueError:
+                            is_unknown_value[k] = True
+                column = floats[inverse.reshape(-1)]
+                is_unknown = is_unknown_value[inverse.reshape(-1)]
+            else:
+                if atype == 'ranking':
+                    for value in values:
+                        if set(value.split('>')) - set(self.attribute_data[attribute]) != set([]):
+                            print('Warning: incorrect label %s for ranking attribute %s' % (value, attribute))
+                column = values.astype(object)[inverse.reshape(-1)]
+                is_unknown = np.zeros(len(rows), dtype=bool)
+            for i in np.flatnonzero(is_unknown & is_valid):
+                print('Warning (line %d): incorrect value %s for %s attribute %s, row skipped'
+                      % (linenos[i], column_cells[i], atype, attribute))
+            is_valid &= ~is_unknown
+            columns.append(column)
+        return [column[is_valid] for column in columns]
+
+    def sparse_cells(self, l):
+        """Convert a sparse ARFF row into the list of its (dense) values, missing
+        values being '0'
+
+        :param l: sparse row, e.g. '{1 a,4 2.5}'
+        :type l: string
+        :rtype: list of strings
+        """
+        cells = ['0'] * len(self.attributes)
+        for pair in l.strip('{}').split(','):
+            pair = pair.strip()
+            if len(pair) > 0:
+                index, value = pair.split(' ', 1)
+                cells[int(index)] = value
+        return cells
+
+    @property
+    def data(self):
+        if self._rows is None:
+            if len(self.columns) == 0:
+                self._rows = [[] for _ in range(self.nb_rows)]
+            else:
+                values = [self.get_column_values(j).tolist() for j in range(len(self.columns))]
+                self._rows = [list(row) for row in zip(*values)]
+        return self._rows
+
+    @data.setter
+    def data(self, rows):
+        self.nb_rows = len(rows)
+        self.columns, self.column_values = [], []
+        for j, attribute in enumerate(self.attributes):
+            column = [row[j] for row in rows]
+            self.columns.append(None)
+            self.column_values.append(None)
+            self.set_column(j, column)
+        self._rows = None
+
+    def set_column(self, index, values):
+        """Store the values of the attribute of the given index
+
+        :param index: index of the attribute
+        :type index: integer
+        :param values: values of the attribute, one by row
+        :type values: list or :class:`~numpy.array`
+        """
+        attribute = self.attributes[index]
+        atype = self.attribute_types[attribute]
+        if atype == 'nominal':
+            table = list(self.attribute_data[attribute] or [])
+            index_values = {value: code for code, value in enumerate(table)}
+            codes = np.empty(len(values), dtype=np.int32)
+            for i, value in enumerate(values):
+                if value is None:
+                    codes[i] = -1
+                    continue
+                if value not in index_values:
+                    index_values[value] = len(table)
+                    table.append(value)
+                codes[i] = index_values[value]
+            self.columns[index], self.column_values[index] = codes, table
+        elif atype == 'numeric':
+            column = np.array([np.nan if value is None or value == '?' else value for value in values])
+            self.columns[index], self.column_values[index] = column.astype(float), None
+        else:
+            column = np.empty(len(values), dtype=object)
+            column[:] = list(values)
+            self.columns[index], self.column_values[index] = column, None
+        self._rows = None
+
+    def set_codes(self, index, codes, values):
+        """Store the codes of a nominal attribute
+
+        :param index: index of the attribute
+        :type index: integer
+        :param codes: code of each row, -1 for missing values
+        :type codes: :class:`~numpy.array`
+        :param values: the value of a code being at its position in this list
+        :type values: list
+        """
+        self.columns[index] = np.asarray(codes, dtype=np.int32)
+        self.column_values[index] = list(values)
+        self._rows = None
+
+    def get_column_values(self, index):
+        """Return the values of the attribute of the given index (decoded values
+        for nominal attributes, None being a missing value)
+
+        :param index: index of the attribute
+        :type index: integer
+        :rtype: :class:`~numpy.array`
+        """
+        if self.column_values[index] is None:
+            return self.columns[index]
+        table = np.empty(len(self.column_values[index]) + 1, dtype=object)
+        table[:-1] = self.column_values[index]
+        table[-1] = None
+        return table[self.columns[index]]
+
+    def nominal_codes(self, attribute, values=None):
+        """Return the codes of a nominal attribute with respect to a list of values
+
+        :param attribute: name of the attribute
+        :type attribute: string
+        :param values: the code of a value being its position in this list
+            (default: modalities of the attribute)
+        :type values: list
+        :returns: codes of each row, -1 for missing values or values not in the list
+        :rtype: :class:`~numpy.array`
+        """
+        index = self.attributes.index(attribute)
+        if values is None:
+            values = self.attribute_data[attribute]
+        position = {value: code for code, value in enumerate(values)}
+        # conversion table from the codes of the column to the codes of values (-1 at last for missing)
+        conversion = np.array([position.get(value, -1) for value in self.column_values[index]] + [-1],
+                              dtype=np.intp)
+        return conversion[self.columns[index]]
+
+    def take_rows(self, indices):
+        """Return a new data set made of the selected rows
+
+        :param indices: indices (or boolean mask) of the selected rows
+        :type indices: :class:`~numpy.array`
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        selection = self.__copy_header()
+        selection.columns = [column[indices] for column in self.columns]
+        selection.column_values = [None if table is None else table[:] for table in self.column_values]
+        if len(self.columns) > 0:
+            selection.nb_rows = len(selection.columns[0])
+        else:
+            selection.nb_rows = len(np.arange(self.nb_rows)[indices])
+        return selection
+
+    def __copy_header(self):
+        selection = ColumnarArffFile()
+        selection.attribute_data = self.attribute_data.copy()
+        selection.attribute_types = self.attribute_types.copy()
+        selection.relation = self.relation
+        selection.attributes = self.attributes[:]
+        selection.comment = self.comment[:]
+        return selection
+
+    def __selected_rows(self, column, select):
+        index = self.attributes.index(column)
+        if self.column_values[index] is None:
+            return np.isin(self.columns[index], list(select))
+        selected_codes = [code for code, value in enumerate(self.column_values[index]) if value in select]
+        return np.isin(self.columns[index], selected_codes)
+
+    def select_class(self, select):
+        """return an ARFF object where only some classes are selected
+
+        :param select: the names of the classes to retain
+        :type select: list
+        :return: a new ArffFile structure containing only selected classes
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        if 'class' not in self.attribute_data.keys():
+            raise NameError("Cannot find a class attribute.")
+        if set(select) - set(self.attribute_data['class']) != set([]):
+            raise NameError("Specified classes not a subset of existing ones!")
+        # assume the class is the last provided item
+        selection = self.take_rows(self.__selected_rows(self.attributes[-1], select))
+        selection.attribute_data['class'] = select
+        return selection
+
+    def select_col_vals(self, column, select, missing_index=None):
+        """return an ARFF File where only some rows are selected in data
+
+        :param select: the values to retain
+        :type select: list
+        :param column: name of the attribute
+        :type column: string
+        :param missing_index: set index missing instances
+        :type missing_index: list
+        :return: a new ArffFile structure containing only selected values in the column
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        if column not in self.attribute_data.keys():
+            raise NameError("Cannot find specified column.")
+        selected = self.__selected_rows(column, select)
+        if missing_index is not None and len(missing_index) > 0:
+            selected[np.asarray(list(missing_index), dtype=int)] = False
+        selection = self.take_rows(selected)
+        if self.attribute_types[column] == 'nominal':
+            selection.attribute_data[column] = select
+        return selection
+
+    def select_class_binary(self, positive, negative):
+        """return an ARFF object where only some classes are selected in order
+        to form a dataset for a binary classification problem.
+
+        :param positive: classes values to be considered as 'positive'
+        :type positive: list
+        :param negative: classes values to be considered as 'negative'
+        :type negative: list
+        :returns: a new ArffFile structure containing only selected classes
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        if 'class' not in self.attribute_data.keys():
+            raise NameError("Cannot find a class attribute.")
+        if set(positive) - set(self.attribute_data['class']) != set([]):
+            raise NameError("Specified 'positive' classes not a subset of existing ones!")
+        if set(negative) - set(self.attribute_data['class']) != set([]):
+            raise NameError("Specified 'negative' classes not a subset of existing ones!")
+
+        class_index = len(self.attributes) - 1
+        is_positive = self.__selected_rows(self.attributes[class_index], positive)
+        is_negative = self.__selected_rows(self.attributes[class_index], negative)
+        selection = self.take_rows(is_positive | is_negative)
+        # codes 0: positive and 1: negative
+        selection.columns[class_index] = np.where(is_positive[is_positive | is_negative], 0, 1).astype(np.int32)
+        selection.column_values[class_index] = ['positive', 'negative']
+        selection.attribute_data['class'] = ['positive', 'negative']
+        return selection
+
+    def remove_col(self, column):
+        """return an ARFF File where the specified column is removed
+
+        :param column: name of the attribute
+        :type column: string
+        :return: the same (modified) structure excluding the specified column
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        if column not in self.attribute_data.keys():
+            raise NameError("Cannot find specified column.")
+        col_ind = self.attributes.index(column)
+        del self.attributes[col_ind]
+        del self.attribute_types[column]
+        del self.attribute_data[column]
+        del self.columns[col_ind]
+        del self.column_values[col_ind]
+        self._rows = None
+        return self
+
+    def make_clone(self):
+        """Make a copy of the current object
+
+        :return: a copy
+        :rtype: :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        """
+        return self.take_rows(slice(None))
+
+    def define_attribute(self, name, atype, data=None):
+        """Define a new attribute, with missing values for the existing rows.
+
+        :param atype: 'numeric', 'string', 'ranking' and 'nominal'.
+        :type atype: string
+        :param name: name of the attribute
+        :type name: string
+        :param data: modalities/labels of the attribute
+        :type data: list
+        """
+        super(ColumnarArffFile, self).define_attribute(name, atype, data)
+        self.columns.append(None)
+        self.column_values.append(None)
+        self.set_column(len(self.attributes) - 1, [None] * self.nb_rows)
+
+    def discretize(self, discmet, numint=4, selfeat=None):
+        """Discretize selected features (if none, then discretize all numeric
+        ones), see :meth:`~classifip.dataset.arff.ArffFile.discretize`.
+        """
+        discretizer = Discretizer(discmet, numint).fit(self, selfeat)
+        order = discretizer.eqfreq_order(self) if discmet == 'eqfreq' else None
+        discretizer.transform(self)
+        if order is not None:
+            sorted_rows = self.take_rows(order)
+            self.columns, self.column_values = sorted_rows.columns, sorted_rows.column_values
+            self._rows = None
+        return discretizer
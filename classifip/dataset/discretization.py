@@ -0,0 +1,241 @@
+import numpy as np
+
+
+def interval_names(cutpoints):
+    """Return the names of the intervals delimited by cut points, e.g.
+    ['<=1.5', '(1.5;3.0]', '>3.0'] for the cut points [1.5, 3.0]
+
+    :param cutpoints: increasing cut points
+    :type cutpoints: list of floats
+    :rtype: list of strings
+    """
+    if len(cutpoints) == 0:
+        return ['(-inf;inf)']
+    strings = [str(float(cutpoint))[0:7] for cutpoint in cutpoints]
+    names = ['<=' + strings[0]]
+    for i in range(1, len(strings)):
+        names.append('(' + strings[i - 1] + ';' + strings[i] + ']')
+    names.append('>' + strings[-1])
+    return names
+
+
+def entropy_mdl_cutpoints(values, classes, nb_classes):
+    """Cut points of the entropy-based discretization with the MDL stopping
+    criterion of [#fayyad1993]_: an interval is recursively split at the
+    boundary point minimizing the class entropy, as long as the information
+    gain exceeds the MDL threshold.
+
+    :param values: values of the feature (no missing values)
+    :type values: :class:`~numpy.array`
+    :param classes: class codes of the instances
+    :type classes: :class:`~numpy.array`
+    :param nb_classes: number of classes
+    :type nb_classes: integer
+    :returns: increasing cut points (middle of the boundary values)
+    :rtype: list of floats
+    """
+    order = np.argsort(values, kind='stable')
+    values, classes = values[order], classes[order]
+    # cumulated class counts: cum_counts[i] are the counts of values[:i]
+    cum_counts = np.zeros((len(values) + 1, nb_classes), dtype=int)
+    cum_counts[1:] = np.cumsum(np.eye(nb_classes, dtype=int)[classes], axis=0)
+
+    def entropy(counts):
+        sizes = counts.sum(axis=-1, keepdims=True)
+        probabilities = counts / np.maximum(sizes, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where(counts > 0, probabilities * np.log2(probabilities), 0.)
+        return -terms.sum(axis=-1)
+
+    cutpoints = []
+    segments = [(0, len(values))]
+    while len(segments) > 0:
+        start, end = segments.pop()
+        # boundary points: between two different consecutive values
+        splits = start + 1 + np.flatnonzero(values[start:end - 1] < values[start + 1:end])
+        if len(splits) == 0:
+            continue
+        counts = cum_counts[end] - cum_counts[start]
+        left = cum_counts[splits] - cum_counts[start]
+        right = counts - left
+        size = end - start
+        weighted = ((splits - start) * entropy(left) + (end - splits) * entropy(right)) / size
+        best = np.argmin(weighted)
+        split = splits[best]
+        entropy_all = entropy(counts)
+        gain = entropy_all - weighted[best]
+        k, k1, k2 = (counts > 0).sum(), (left[best] > 0).sum(), (right[best] > 0).sum()
+        delta = np.log2(3 ** k - 2) - (k * entropy_all - k1 * entropy(left[best]) - k2 * entropy(right[best]))
+        if gain > (np.log2(size - 1) + delta) / size:
+            cutpoints.append((values[split - 1] + values[split]) / 2.)
+            segments.append((start, split))
+            segments.append((split, end))
+    return sorted(cutpoints)
+
+
+class Discretizer(object):
+    """Discretizer of numeric features whose cut points are learned on a data
+    set and can then be applied to other data sets (e.g. a test set).
+
+    if discmet='eqfreq', discretization is done so that each interval have
+    equal frequencies in the data set
+
+    if discmet='eqwidth', discretization is done so that each interval has
+    equal length, according to maximum and minimum of data set
+
+    if discmet='ent', the entropy-based method with MDL stopping criterion of
+    [#fayyad1993]_ (numint is not used)
+
+    Values are coded by the index of their interval, i.e. the number of cut
+    points strictly lower than the value (-1 for missing values), and named
+    as in :meth:`~classifip.dataset.arff.ArffFile.discretize`.
+
+    >>> from classifip.dataset.columnar import ColumnarArffFile
+    >>> from classifip.dataset.discretization import Discretizer
+    >>> dataset = ColumnarArffFile()
+    >>> dataset.define_attribute('size', 'numeric')
+    >>> dataset.data = [[1.], [2.], [3.], [4.]]
+    >>> discretizer = Discretizer('eqfreq', numint=2).fit(dataset)
+    >>> discretizer.names['size']
+    ['<=2.0', '>2.0']
+    >>> discretizer.transform_values('size', [0.5, 2.5, float('nan')])
+    array([ 0,  1, -1])
+
+    :param cutpoints: cut points of each discretized feature
+    :type cutpoints: dictionary associating each feature name to an array
+    :param names: names of the intervals of each discretized feature
+    :type names: dictionary associating each feature name to a list
+    """
+
+    def __init__(self, discmet='eqfreq', numint=4):
+        """
+        :param discmet: discretization method. Can be either 'ent','eqfreq' or 'eqwidth'
+        :type discmet: string
+        :param numint: number of intervals into which divide attributes
+        :type numint: integer
+        """
+        if discmet not in ('eqfreq', 'eqwidth', 'ent'):
+            raise NameError("Discretization method %s not supported." % discmet)
+        self.discmet = discmet
+        self.numint = numint
+        self.cutpoints = dict()
+        self.names = dict()
+
+    @staticmethod
+    def float_column(dataset, attribute):
+        """Return the values of an attribute of a (row or columnar) data set as
+        a float array, nan for missing values"""
+        index = dataset.attributes.index(attribute)
+        if hasattr(dataset, 'columns'):
+            return np.asarray(dataset.columns[index], dtype=float)
+        return np.array([np.nan if row[index] is None else row[index] for row in dataset.data], dtype=float)
+
+    def fit(self, dataset, selfeat=None, target='class'):
+        """Learn the cut points of the selected feature (if none, then of all
+        numeric features).
+
+        :param dataset: learning instances
+        :type dataset: :class:`~classifip.dataset.arff.ArffFile` or
+            :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        :param selfeat: name of a particular feature to discretize, if None discretize all
+        :type selfeat: string
+        :param target: name of the nominal attribute used by the 'ent' method
+        :type target: string
+        :returns: the fitted discretizer
+        :rtype: :class:`~classifip.dataset.discretization.Discretizer`
+        """
+        if selfeat is not None:
+            if dataset.attribute_types[selfeat] != 'numeric':
+                raise NameError("Selected feature not numeric.")
+            features = [selfeat]
+        else:
+            features = [f for f in dataset.attributes if dataset.attribute_types[f] == 'numeric']
+
+        if self.discmet == 'ent':
+            if target not in dataset.attribute_data.keys() or dataset.attribute_types[target] != 'nominal':
+                raise NameError("Cannot find the nominal target attribute %s." % target)
+            target_index = dataset.attributes.index(target)
+            target_values = dataset.attribute_data[target]
+            if hasattr(dataset, 'nominal_codes'):
+                classes = dataset.nominal_codes(target)
+            else:
+                index_values = {value: code for code, value in enumerate(target_values)}
+                classes = np.array([index_values.get(row[target_index], -1) for row in dataset.data])
+
+        self.cutpoints, self.names = dict(), dict()
+        for feature in features:
+            values = self.float_column(dataset, feature)
+            if self.discmet == 'eqfreq':
+                # cut points are values of the data set, at each frequency step
+                sorted_values = np.sort(values)
+                positions = [int((i + 1) * (len(values) / self.numint)) - 1 for i in range(self.numint - 1)]
+                cutpoints = sorted_values[positions]
+            elif self.discmet == 'eqwidth':
+                width = values.max() - values.min()
+                cutpoints = np.array([values.min() + (i + 1) * width / self.numint for i in range(self.numint - 1)])
+            else:
+                is_known = ~np.isnan(values) & (classes >= 0)
+                cutpoints = np.array(entropy_mdl_cutpoints(values[is_known], classes[is_known],
+                                                           len(target_values)))
+            self.cutpoints[feature] = cutpoints
+            self.names[feature] = interval_names(cutpoints)
+        return self
+
+    def transform_values(self, feature, values):
+        """Return the interval codes of values of a fitted feature
+
+        :param feature: name of the feature
+        :type feature: string
+        :param values: values of the feature
+        :type values: :class:`~numpy.array`
+        :returns: codes of the intervals, -1 for missing values
+        :rtype: :class:`~numpy.array`
+        """
+        values = np.asarray(values, dtype=float)
+        codes = np.searchsorted(self.cutpoints[feature], values, side='left')
+        return np.where(np.isnan(values), -1, codes)
+
+    def transform(self, dataset):
+        """Discretize the fitted features of a data set (which becomes nominal)
+
+        :param dataset: instances to discretize
+        :type dataset: :class:`~classifip.dataset.arff.ArffFile` or
+            :class:`~classifip.dataset.columnar.ColumnarArffFile`
+        :return: the same (modified) data set
+        """
+        transformed = dict()
+        for feature in self.cutpoints:
+            index = dataset.attributes.index(feature)
+            codes = self.transform_values(feature, self.float_column(dataset, feature))
+            dataset.attribute_types[feature] = 'nominal'
+            dataset.attribute_data[feature] = self.names[feature]
+            if hasattr(dataset, 'columns'):
+                dataset.set_codes(index, codes, self.names[feature])
+            else:
+                transformed[index] = codes
+        if not hasattr(dataset, 'columns') and len(transformed) > 0:
+            # rows can be shared with other data sets, they are copied
+            rows = [row[:] for row in dataset.data]
+            for index, codes in transformed.items():
+                table = self.names[dataset.attributes[index]] + [None]
+                for row, code in zip(rows, codes.tolist()):
+                    row[index] = table[code]
+            dataset.data = rows
+        return dataset
+
+    def eqfreq_order(self, dataset):
+        """Return the order in which :meth:`~classifip.dataset.arff.ArffFile.discretize`
+        leaves the rows with the 'eqfreq' method: rows are successively sorted by
+        the values of each discretized feature.
+
+        :rtype: :class:`~numpy.array`
+        """
+        order = np.arange(len(dataset.data) if not hasattr(dataset, 'columns') else dataset.nb_rows)
+        for feature in dataset.attributes:
+            if feature in self.cutpoints:
+                order = order[np.argsort(self.float_column(dataset, feature)[order])]
+        return order
+
+    def fit_transform(self, dataset, selfeat=None, target='class'):
+        """Learn the cut points on a data set and discretize it, see :meth:`fit`"""
+        return self.fit(dataset, selfeat, target).transform(dataset)
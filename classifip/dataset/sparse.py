@@ -0,0 +1,290 @@
+import numpy as np
+from itertools import islice
+from scipy.sparse import csr_matrix
+from .arff import ArffFile
+
+
+class SparseArffFile(ArffFile):
+    """Sparse storage of ARFF data sets (e.g. text-derived multilabel data sets
+    with rows written as ``{index value, ...}``)
+
+    The first attributes (features) are stored in a CSR matrix :attr:`features`
+    whose stored entries are the values given in the file: the code of the
+    value (position in the modalities, -1 for '?') for nominal attributes and
+    the value itself for numeric attributes. Entries which are not stored take
+    the default value of sparse rows: '0' for nominal attributes (i.e. the code
+    of '0', see :attr:`default_codes`) and 0. for numeric ones.
+
+    The last ``nb_labels`` attributes (labels, or the class), which must be
+    nominal, are stored as dense columns of codes in :attr:`label_columns`.
+
+    The attribute :attr:`data` remains available for existing callers, but
+    builds the dense rows of the data set.
+
+    >>> from classifip.dataset.sparse import SparseArffFile
+    >>> dataset = SparseArffFile(nb_labels=1)
+    >>> dataset.define_attribute('word', 'nominal', ['0', '1'])
+    >>> dataset.define_attribute('class', 'nominal', ['a', 'b'])
+    >>> dataset.data = [['1', 'a'], ['0', 'b'], ['0', 'a']]
+    >>> dataset.features.nnz
+    1
+    >>> dataset.count_features(dataset.nominal_codes('class'), 2)[:, 0, :]
+    array([[1, 1],
+           [1, 0]])
+    """
+
+    def __init__(self, nb_labels=1):
+        """Construct an empty sparse ARFF structure.
+
+        :param nb_labels: number of last attributes stored as dense columns
+        :type nb_labels: integer
+        """
+        self.nb_labels = nb_labels
+        self.features = csr_matrix((0, 0))
+        self.label_columns = []
+        super(SparseArffFile, self).__init__()
+
+    @property
+    def feature_attributes(self):
+        return self.attributes[:len(self.attributes) - self.nb_labels]
+
+    @property
+    def label_attributes(self):
+        return self.attributes[len(self.attributes) - self.nb_labels:]
+
+    @property
+    def default_codes(self):
+        """Codes of the default value '0' of nominal features (-1 if '0' is not
+        a modality), 0. for numeric features"""
+        defaults = np.zeros(len(self.feature_attributes))
+        for j, attribute in enumerate(self.feature_attributes):
+            if self.attribute_types[attribute] == 'nominal':
+                values = self.attribute_data[attribute]
+                defaults[j] = values.index('0') if '0' in values else -1
+        return defaults
+
+    def load(self, filename, nb_labels=None, batch_size=10000):
+        """Load a (sparse) ARFF File from a file, by chunks of lines, without
+        building dense rows.
+
+        :param filename: the name of the file containing data
+        :type filename: string
+        :param nb_labels: number of last attributes stored as dense columns
+            (default: current value of :attr:`nb_labels`)
+        :type nb_labels: integer
+        :param batch_size: number of lines parsed at once
+        :type batch_size: integer
+        """
+        self.__init__(self.nb_labels if nb_labels is None else nb_labels)
+        with open(filename) as stream:
+            header = ArffFile.parse_header(stream)
+            self.relation = header.relation
+            self.attributes = header.attributes
+            self.attribute_types = header.attribute_types
+            self.attribute_data = header.attribute_data
+            self.comment = header.comment
+            lineno = header.lineno
+            chunks = []
+            while True:
+                lines = list(islice(stream, batch_size))
+                if len(lines) == 0:
+                    break
+                chunks.append(self.__parse_lines(lines, lineno))
+                lineno += len(lines)
+        self.__set_chunks(chunks)
+
+    def __parse_lines(self, lines, lineno):
+        """Parse a chunk of lines into (nb_rows, row, column, value) entries of
+        the features and the label columns"""
+        nb_features = len(self.feature_attributes)
+        defaults = self.default_codes
+        index_values = [{value: code for code, value in enumerate(self.attribute_data[attribute])}
+                        if self.attribute_types[attribute] == 'nominal' else None
+                        for attribute in self.attributes]
+        rows, cols, values = [], [], []
+        labels = [[] for _ in range(self.nb_labels)]
+        nb_rows = 0
+        for i, l in enumerate(lines):
+            l = l.strip()
+            if len(l) == 0 or l[0] == '%':
+                continue
+            if l[0] == '{':
+                pairs = [pair.strip().split(' ', 1) for pair in l.strip('{}').split(',') if len(pair.strip()) > 0]
+            else:
+                pairs = list(enumerate(l.split(',')))
+                if len(pairs) != len(self.attributes):
+                    continue
+            row_labels = ['0'] * self.nb_labels
+            row_entries = []
+            is_valid = True
+            for index, value in pairs:
+                index, value = int(index), value.strip()
+                if index >= nb_features:
+                    row_labels[index - nb_features] = value
+                    continue
+                if index_values[index] is None:
+                    value = np.nan if value == '?' else float(value)
+                elif value == '?':
+                    value = -1
+                elif value in index_values[index]:
+                    value = index_values[index][value]
+                else:
+                    print('Warning (line %d): incorrect value %s for nominal attribute %s, row skipped'
+                          % (lineno + i, value, self.attributes[index]))
+                    is_valid = False
+                    break
+                if value != defaults[index]:
+                    row_entries.append((index, value))
+            for k, value in enumerate(row_labels):
+                attribute = self.label_attributes[k]
+                if value != '?' and value not in index_values[nb_features + k]:
+                    print('Warning (line %d): incorrect value %s for nominal attribute %s, row skipped'
+                          % (lineno + i, value, attribute))
+                    is_valid = False
+            if not is_valid:
+                continue
+            for index, value in row_entries:
+                rows.append(nb_rows)
+                cols.append(index)
+                values.append(value)
+            for k, value in enumerate(row_labels):
+                labels[k].append(index_values[nb_features + k].get(value, -1))
+            nb_rows += 1
+        return nb_rows, rows, cols, values, labels
+
+    def __set_chunks(self, chunks):
+        nb_features = len(self.feature_attributes)
+        offsets = np.cumsum([0] + [chunk[0] for chunk in chunks])
+        rows = np.concatenate([np.asarray(chunk[1], dtype=np.intp) + offsets[k] for k, chunk in enumerate(chunks)]
+                              + [np.empty(0, dtype=np.intp)])
+        cols = np.concatenate([np.asarray(chunk[2], dtype=np.intp) for chunk in chunks]
+                              + [np.empty(0, dtype=np.intp)])
+        values = np.concatenate([np.asarray(chunk[3], dtype=float) for chunk in chunks] + [np.empty(0)])
+        # entries are added row by row, so that they are already sorted by rows
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=offsets[-1]))))
+        self.features = csr_matrix((values, cols, indptr), shape=(offsets[-1], nb_features))
+        self.label_columns = [np.concatenate([np.asarray(chunk[4][k], dtype=np.int32) for chunk in chunks]
+                                             + [np.empty(0, dtype=np.int32)])
+                              for k in range(self.nb_labels)]
+
+    @property
+    def nb_rows(self):
+        return self.features.shape[0]
+
+    @property
+    def data(self):
+        """Dense rows of the data set (built at each access)"""
+        nb_features = len(self.feature_attributes)
+        dense = np.tile(self.default_codes, (self.nb_rows, 1))
+        coo = self.features.tocoo()
+        dense[coo.row, coo.col] = coo.data
+        columns = []
+        for j, attribute in enumerate(self.attributes):
+            if j >= nb_features:
+                codes = self.label_columns[j - nb_features]
+            elif self.attribute_types[attribute] == 'nominal':
+                codes = dense[:, j].astype(int)
+            else:
+                columns.append(dense[:, j].tolist())
+                continue
+            table = list(self.attribute_data[attribute]) + [None]
+            columns.append([table[code] for code in codes])
+        return [list(row) for row in zip(*columns)] if len(columns) > 0 else []
+
+    @data.setter
+    def data(self, rows):
+        nb_features = len(self.feature_attributes)
+        defaults = self.default_codes
+        entries = [], [], []
+        labels = [[] for _ in range(self.nb_labels)]
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row[:nb_features]):
+                if self.attribute_types[self.attributes[j]] == 'nominal':
+                    value = -1 if value is None else self.attribute_data[self.attributes[j]].index(value)
+                if value != defaults[j]:
+                    entries[0].append(i)
+                    entries[1].append(j)
+                    entries[2].append(value)
+            for k, value in enumerate(row[nb_features:]):
+                values = self.attribute_data[self.label_attributes[k]]
+                labels[k].append(values.index(value) if value in values else -1)
+        self.__set_chunks([(len(rows), entries[0], entries[1], entries[2], labels)])
+
+    def take_rows(self, indices):
+        """Return a new data set made of the selected rows
+
+        :param indices: indices (or boolean mask) of the selected rows
+        :type indices: :class:`~numpy.array`
+        :rtype: :class:`~classifip.dataset.sparse.SparseArffFile`
+        """
+        selection = SparseArffFile(self.nb_labels)
+        selection.attribute_data = self.attribute_data.copy()
+        selection.attribute_types = self.attribute_types.copy()
+        selection.relation = self.relation
+        selection.attributes = self.attributes[:]
+        selection.comment = self.comment[:]
+        indices = np.arange(self.nb_rows)[indices]
+        selection.features = self.features[indices]
+        selection.label_columns = [column[indices] for column in self.label_columns]
+        return selection
+
+    def nominal_codes(self, attribute, values=None):
+        """Return the codes of a label (dense) attribute with respect to a list
+        of values
+
+        :param attribute: name of the attribute
+        :type attribute: string
+        :param values: the code of a value being its position in this list
+            (default: modalities of the attribute)
+        :type values: list
+        :returns: codes of each row, -1 for missing values or values not in the list
+        :rtype: :class:`~numpy.array`
+        """
+        index = self.label_attributes.index(attribute)
+        if values is None:
+            values = self.attribute_data[attribute]
+        position = {value: code for code, value in enumerate(values)}
+        conversion = np.array([position.get(value, -1) for value in self.attribute_data[attribute]] + [-1],
+                              dtype=np.intp)
+        return conversion[self.label_columns[index]]
+
+    def count_features(self, groups, nb_groups, max_values=None):
+        """Count the values of nominal features in each group of rows, touching
+        only the stored entries of :attr:`features`: the counts of the default
+        value are deduced from the size of the groups.
+
+        :param groups: group (e.g. class code) of each row, -1 if the row is ignored
+        :type groups: :class:`~numpy.array`
+        :param nb_groups: number of groups
+        :type nb_groups: integer
+        :param max_values: size of the last dimension (default: maximal number
+            of modalities of the nominal features)
+        :type max_values: integer
+        :returns: a (nb_groups, nb_features, max_values) array of counts, null
+            for numeric features
+        :rtype: :class:`~numpy.array`
+        """
+        features = self.feature_attributes
+        nb_features = len(features)
+        is_nominal = np.array([self.attribute_types[f] == 'nominal' for f in features], dtype=bool)
+        if max_values is None:
+            max_values = max([len(self.attribute_data[f]) for f in np.array(features)[is_nominal]] + [1])
+        groups = np.asarray(groups)
+        entry_groups = np.repeat(groups, np.diff(self.features.indptr))
+        entry_features = self.features.indices
+        entry_codes = self.features.data.astype(np.intp)
+        # stored entries of each (group, feature), whatever their value
+        is_counted = (entry_groups >= 0) & is_nominal[entry_features]
+        nb_stored = np.bincount(entry_groups[is_counted] * nb_features + entry_features[is_counted],
+                                minlength=nb_groups * nb_features).reshape((nb_groups, nb_features))
+        is_counted &= entry_codes >= 0
+        flat_index = (entry_groups[is_counted] * nb_features + entry_features[is_counted]) * max_values \
+            + entry_codes[is_counted]
+        counts = np.bincount(flat_index, minlength=nb_groups * nb_features * max_values) \
+            .reshape((nb_groups, nb_features, max_values))
+        # the other rows of each group take the default value '0'
+        group_sizes = np.bincount(groups[groups >= 0], minlength=nb_groups)
+        defaults = self.default_codes.astype(np.intp)
+        for j in np.flatnonzero(is_nominal & (defaults >= 0)):
+            counts[:, j, defaults[j]] += group_sizes - nb_stored[:, j]
+        return counts
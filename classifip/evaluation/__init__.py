@@ -1,14 +1,83 @@
 from . import costMatrix, measures
 
 import random
+import numpy as np
 
 
-def k_fold_cross_validation(data, K, randomise=False, random_seed=None, structured=False):
+def shuffled_indices(nb_rows, random_seed=None):
+    """
+    Return a random permutation of the row indices, identical to the order
+    random.shuffle gives to the rows of a data set with the same seed.
+
+    :param nb_rows: number of rows
+    :type nb_rows: integer
+    :param random_seed: set the seed for the randomisation (None: the
+        current state of the random module is used)
+    :type random_seed: integer
+    :rtype: :class:`~numpy.array`
+    """
+    if random_seed is not None:
+        random.seed(random_seed)
+    indices = list(range(nb_rows))
+    random.shuffle(indices)
+    return np.array(indices, dtype=int)
+
+
+def k_fold_indices(nb_rows, K, randomise=False, random_seed=None, classes=None):
+    """
+    Generates K (training, validation) pairs of row indices: the row at
+    position i (after randomisation) is in the validation set of the fold i % K.
+
+    If classes are given, the splitting is structured: rows are sorted by
+    class (keeping their relative order) before being dealt into folds, so that
+    each class is evenly split between folds.
+
+    :param nb_rows: number of rows
+    :type nb_rows: integer
+    :param K: number of folds
+    :type K: integer
+    :param randomise: randomise or not rows before splitting
+    :type randomise: boolean
+    :param random_seed: set the seed for the randomisation to reproduce
+        identical splits if needed
+    :type random_seed: integer
+    :param classes: class of each row (structured splitting)
+    :type classes: :class:`~numpy.array`
+    :returns: list of (training indices, validation indices) pairs
+    :rtype: list of tuples of :class:`~numpy.array`
+    """
+    order = shuffled_indices(nb_rows, random_seed) if randomise else np.arange(nb_rows)
+    if classes is not None:
+        order = order[np.argsort(np.asarray(classes)[order], kind='stable')]
+    folds = np.empty(nb_rows, dtype=int)
+    folds[order] = np.arange(nb_rows) % K
+    # indices are kept in the order of rows (after randomisation and sorting by class)
+    folds = folds[order]
+    return [(order[folds != k], order[folds == k]) for k in range(K)]
+
+
+def _class_codes(data):
+    """return the code of the output class (last attribute) of each row"""
+    if hasattr(data, 'label_columns'):
+        return data.label_columns[-1]
+    if hasattr(data, 'columns'):
+        return data.columns[-1]
+    values = [row[-1] for row in data.data]
+    index_values = {value: code for code, value in enumerate(sorted(set(values), key=str))}
+    return np.array([index_values[value] for value in values])
+
+
+def k_fold_cross_validation(data, K, randomise=False, random_seed=None, structured=False, nb_repeats=1):
     """
     Generates K (training, validation) pairs from the items in X.
     Each pair is a partition of X, where validation is an iterable
     of length len(X)/K. So each training iterable is of length (K-1)*len(X)/K.
 
+    Folds are computed on row indices (see :func:`k_fold_indices`), and each
+    training/validation set only refers to the rows of data (see
+    :meth:`~classifip.dataset.arff.ArffFile.take_rows`): rows are neither
+    shuffled in place nor deep-copied.
+
     :param data: the observed class value
     :type data: :class:`~classifip.dataset.arff.ArffFile`
     :param K: number of folds
@@ -18,43 +87,34 @@ def k_fold_cross_validation(data, K, randomise=False, random_seed=None, structur
     :param random_seed: set the seed for the randomisation to reproduce
         identical splits if needed 
     :type random_seed: integer
-    :param structured: evenly split between output class (not implemented)
+    :param structured: evenly split between output class (last attribute)
     :type structured: boolean 
+    :param nb_repeats: number of repetitions of the K-fold splitting, with
+        different randomisations (randomise should be True)
+    :type nb_repeats: integer
     :returns: iterable over training/evluation pairs
     :rtype: list of :class:`~classifip.dataset.arff.ArffFile`
-    
-    ..todo::
-        * implement the structured k-fold validation
 
     warning:
-        Making a clone of the datatr and datatst if you want save them in another list
-        because the clause yield of python send the address memory of variables (datatr, datatst),
-        so you will get a list filled with same elements of the last loop.
+        Rows are shared between data and the training/validation sets, they
+        should not be modified in place.
 
     """
-    if randomise:
-        import random
-        if random_seed != None:
-            random.seed(random_seed)
-        random.shuffle(data.data)
-    datatr = data.make_clone()
-    datatst = data.make_clone()
-    for k in range(K):
-        datatr.data = [x for i, x in enumerate(data.data) if i % K != k]
-        datatst.data = [x for i, x in enumerate(data.data) if i % K == k]
-        yield datatr, datatst
+    nb_rows = data.nb_rows if hasattr(data, 'nb_rows') else len(data.data)
+    classes = _class_codes(data) if structured else None
+    for repeat in range(nb_repeats):
+        # the seed is only set once, so that repetitions are different
+        seed = random_seed if repeat == 0 else None
+        for train_index, test_index in k_fold_indices(nb_rows, K, randomise, seed, classes):
+            yield data.take_rows(train_index), data.take_rows(test_index)
 
 
 def train_test_split(dataArff, test_pct=0.5, random_seed=None):
     """
        Generates partition (training, testing) pairs from the items in X
+       (rows are shared with dataArff, not copied)
     """
-    training = dataArff.make_clone()
-    if random_seed is not None:
-        random.seed(random_seed)
-        random.shuffle(training.data)
-    testing = training.make_clone()
-    idx_end_train = int(len(dataArff.data) * (1 - test_pct))
-    training.data = training.data[:idx_end_train]
-    testing.data = testing.data[idx_end_train:]
-    return training, testing
+    nb_rows = dataArff.nb_rows if hasattr(dataArff, 'nb_rows') else len(dataArff.data)
+    order = shuffled_indices(nb_rows, random_seed) if random_seed is not None else np.arange(nb_rows)
+    idx_end_train = int(nb_rows * (1 - test_pct))
+    return dataArff.take_rows(order[:idx_end_train]), dataArff.take_rows(order[idx_end_train:])
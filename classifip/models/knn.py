@@ -1,8 +1,8 @@
 from ..dataset.arff import ArffFile
-from scipy.spatial import kdtree, distance
+from scipy.spatial import cKDTree
 from ..representations.intervalsProbability import IntervalsProbability
+from ..utils import mean_pairwise_distance
 import numpy as np
-from math import exp
 
 class IPKNN(object):
     """IPKNN implements a K-nearest neighbour method using lower previsions.
@@ -12,9 +12,11 @@ class IPKNN(object):
     equivalent to a linear vacuous model. The method is based on [#destercke2012]_
  
     :param tree: kdtree structure storing learning data set instances
-    :type tree: scipy.spatial.kdtree
+    :type tree: :class:`~scipy.spatial.cKDTree`
     :param truelabels: store the true labels of learning instances
     :type truelabels: list of labels
+    :param trueclasses: index (in classes) of the true labels of learning instances
+    :type trueclasses: :class:`~numpy.array`
     :param beta: exponent parameter used in discounting rate
     :type beta: positive float
     :param epsilon: base discounting rate
@@ -40,6 +42,7 @@ class IPKNN(object):
         """
         self.tree=None
         self.truelabels=[]
+        self.trueclasses=np.zeros(0,dtype=int)
         self.beta=1.5
         self.epsilon=0.99
         self.classes=[]
@@ -57,19 +60,14 @@ class IPKNN(object):
         for i in learndataset.attribute_data['class']:
             class_set=learndataset.select_class([i])
             values=[row[0:len(row)-1] for row in class_set.data]
-            if len(values) > 1000:
-                valred=np.random.permutation(values)[0:1000]
-                class_distances=distance.cdist(valred,valred)
-            else:
-                class_distances=distance.cdist(values,values)
-            average=class_distances.sum()/(len(class_distances)**2
-                                           -len(class_distances))
+            average=mean_pairwise_distance(values,sample_size=1000)
             self.av_dist.append(average)
            
         # training the whole thing
         learndata=[row[0:len(row)-1] for row in learndataset.data]
         self.truelabels=[row[-1] for row in learndataset.data]
-        self.tree=kdtree.KDTree(learndata)
+        self.trueclasses=np.array([self.classes.index(label) for label in self.truelabels],dtype=int)
+        self.tree=cKDTree(np.array(learndata,dtype=float))
             
             
         
@@ -88,39 +86,48 @@ class IPKNN(object):
         :rtype: lists of :class:`~classifip.representations.intervalsProbability.IntervalsProbability`
         
         """
-        final=[]
-        self.beta=knn_beta
-        self.epsilon=knn_epsilon
-        answers=[]        
-        for i in testdataset:
-
+        lower,upper=self.evaluate_proba(testdataset,knn_beta,knn_epsilon,knn_nb_neigh)
+        answers=[]
+        for i in range(len(lower)):
             resulting_int=np.zeros((2,len(self.classes)))
-            query=self.tree.query(i,knn_nb_neigh)
-            #ensure query returns list of array
-            if query[0].__class__.__name__!='ndarray':
-                query=list(query)
-                query[0]=[query[0]]
-                query[1]=[query[1]]
-            for k in range(len(query[0])):
-                #retrieve class index of kth neighbour
-                neigh_class=self.classes.index(self.truelabels[query[1][k]])
-                #compute the linear vacuous model of this neighbour
-                #the higher discount, the most original info is kept
-                #discount~reliability of the information between [0,1]
-                expon=-((query[0][k])**(self.beta))/self.av_dist[neigh_class]
-                discount=(self.epsilon)*(exp(expon))
-                up=np.zeros(len(self.classes))
-                up.fill(1-discount)
-                up[neigh_class]=1
-                down=np.zeros(len(self.classes))
-                down[neigh_class]=discount
-                resulting_int[0]+=up
-                resulting_int[1]+=down
-            # make the average of all k obtained models
-            resulting_int[0]=resulting_int[0]/knn_nb_neigh
-            resulting_int[1]=resulting_int[1]/knn_nb_neigh
+            resulting_int[0]=upper[i]
+            resulting_int[1]=lower[i]
             result=IntervalsProbability(resulting_int)
             answers.append(result)
         
         return answers
+
+    def evaluate_proba(self,testdataset,knn_beta=1.5,knn_epsilon=0.99,knn_nb_neigh=3):
+        """evaluate the instances and return the bounds of probability intervals
+        as two dense arrays, without building one representation object per instance
         
+        :param testdataset: list of input features of instances to evaluate
+        :type dataset: list
+        :param knn_beta: value of beta parameter used in evaluation
+        :type knn_beta: float
+        :param knn_epsilon: value of base discounting rate to use
+        :type knn_epsilon: float
+        :param knn_nb_neigh: values of number f neighbours to use
+        :type knn_nb_neigh: int
+        :returns: lower and upper probabilities of each class (ordered as classes)
+        :rtype: tuple of two (n_samples, n_classes) :class:`~numpy.array`
+        
+        """
+        self.beta=knn_beta
+        self.epsilon=knn_epsilon
+        dataset=np.array(testdataset,dtype=float).reshape((len(testdataset),-1))
+        #query all instances at once, distances and neighbours as (n_samples, k) arrays
+        distances,neighbours=self.tree.query(dataset,k=knn_nb_neigh,workers=-1)
+        distances=distances.reshape((len(dataset),-1))
+        neigh_class=self.trueclasses[neighbours.reshape((len(dataset),-1))]
+        #compute the linear vacuous model of each neighbour
+        #the higher discount, the most original info is kept
+        #discount~reliability of the information between [0,1]
+        expon=-(distances**self.beta)/np.array(self.av_dist)[neigh_class]
+        discount=self.epsilon*np.exp(expon)
+        is_class=neigh_class[:,:,None]==np.arange(len(self.classes))
+        lower=(is_class*discount[:,:,None]).sum(axis=1)
+        #upper is 1 for the class of the neighbour, 1-discount for the others
+        upper=(1-discount).sum(axis=1)[:,None]+lower
+        # make the average of all k obtained models
+        return lower/knn_nb_neigh,upper/knn_nb_neigh
@@ -1,8 +1,8 @@
 from ..dataset.arff import ArffFile
-from scipy.spatial import kdtree, distance
+from scipy.spatial import cKDTree
 from ..representations.voting import Scores
+from ..utils import mean_pairwise_distance
 import numpy as np
-from math import exp
 
 class IPKNNBR(object):
     """IPKNNBR implements a K-nearest neighbour method using lower previsions for
@@ -12,9 +12,11 @@ class IPKNNBR(object):
     :class:`~classifip.representations.voting.Scores` 
  
     :param tree: kdtree structure storing learning data set instances
-    :type tree: scipy.spatial.kdtree
+    :type tree: :class:`~scipy.spatial.cKDTree`
     :param truelabels: store the true labels of learning instances
     :type truelabels: list of labels
+    :param labelvalues: (n_instances, nblabels) array of the true labels as integers
+    :type labelvalues: :class:`~numpy.array`
     :param beta: exponent parameter used in discounting rate
     :type beta: positive float
     :param epsilon: base discounting rate
@@ -41,6 +43,7 @@ class IPKNNBR(object):
         """
         self.tree=None
         self.truelabels=[]
+        self.labelvalues=np.zeros((0,0),dtype=int)
         self.beta=1.5
         self.epsilon=0.99
         self.classes=[]
@@ -84,31 +87,22 @@ class IPKNNBR(object):
             class_set=learndataset.select_col_vals(i,['0'])
             values=[row[0:len(row)-nblabels] for row in class_set.data]
             if len(values) < 2:
-                class_distances=np.array([0.1,0.1])
-            elif len(values) > 1000:
-                valred=np.random.permutation(values)[0:1000]
-                class_distances=distance.cdist(valred,valred)
+                averagein=0.1
             else:
-                class_distances=distance.cdist(values,values)
-            averagein=class_distances.sum()/(len(class_distances)**2
-                                           -len(class_distances))
+                averagein=mean_pairwise_distance(values,sample_size=1000)
             
             class_set=learndataset.select_col_vals(i,['1'])
             values=[row[0:len(row)-nblabels] for row in class_set.data]
             if len(values) < 2:
-                class_distances=np.array([0.1,0.1])
-            elif len(values) > 1000:
-                valred=np.random.permutation(values)[0:1000]
-                class_distances=distance.cdist(valred,valred)
+                averageout=0.1
             else:
-                class_distances=distance.cdist(values,values)
-            averageout=class_distances.sum()/(len(class_distances)**2
-                                           -len(class_distances))
+                averageout=mean_pairwise_distance(values,sample_size=1000)
             self.av_dist.append([averageout,averagein])
            
         # training the whole thing
         learndata=[row[0:len(row)-nblabels] for row in learndataset.data]
-        self.tree=kdtree.KDTree(learndata)
+        self.labelvalues=np.array(self.truelabels,dtype=int).reshape((len(learndata),nblabels))
+        self.tree=cKDTree(np.array(learndata,dtype=float))
             
             
         
@@ -123,6 +117,10 @@ class IPKNNBR(object):
         :type knnbr_epsilon: float
         :param knnbr_nbneigh: values of number of neighbours to use
         :type knnbr_nbneigh: list of int
+        :param missing: probability that the label of a neighbour is missing (None: no missing label)
+        :type missing: float
+        :param MAR: (True) missing labels are ignored, (False) they count as vacuous
+        :type MAR: boolean
         :returns: for each value of knnbr_nbneigh, a set of scores for each label
         :rtype: lists of :class:`~classifip.representations.voting.Scores`
         
@@ -135,38 +133,26 @@ class IPKNNBR(object):
         if self.normal[0] == True:
             dataset=(dataset-self.normal[2])/self.normal[1]
 
-        answers=[]       
-        for i in dataset:
-
-            #scan all specified values of neighbours
-            query=self.tree.query(i,k=knnbr_nb_neigh)
-            #ensure query returns list of array
-            if query[0].__class__.__name__!='ndarray':
-                query=list(query)
-                query[0]=[query[0]]
-                query[1]=[query[1]]
-            #scan all labels and affect a score
-            resulting_score=np.zeros((self.nblabels,2))
-            for j in range(self.nblabels):
-                up=0.
-                down=0.
-                for k in range(len(query[0])):                 
-                    label_in=int(self.truelabels[query[1][k]][j])
-                    expon=-((query[0][k])**(self.beta))/self.av_dist[j][label_in]
-                    discount=(self.epsilon)*(exp(expon))
-                    randmiss=np.random.random()
-                    if missing==None or randmiss>=missing:    
-                        if label_in==1:
-                            up+=1
-                            down+=discount
-                        else:
-                            up+=1-discount
-                    elif MAR==False: up+=1
-                resulting_score[j,0]=down
-                resulting_score[j,1]=up
-            resulting_score=resulting_score/knnbr_nb_neigh
-            result=Scores(resulting_score)
-            answers.append(result)
+        dataset=dataset.reshape((len(testdataset),-1))
+        #query all instances at once, distances and neighbours as (n_samples, k) arrays
+        distances,neighbours=self.tree.query(dataset,k=knnbr_nb_neigh,workers=-1)
+        distances=distances.reshape((len(dataset),-1))
+        neighbours=neighbours.reshape((len(dataset),-1))
+        #labels of the neighbours, as a (n_samples, nblabels, k) array
+        label_in=self.labelvalues[neighbours].transpose((0,2,1))
+        av_dist=np.array(self.av_dist)[np.arange(self.nblabels)[:,None],label_in]
+        expon=-(distances[:,None,:]**self.beta)/av_dist
+        discount=self.epsilon*np.exp(expon)
+        #missingness draws, in the order of a loop over instances, labels and neighbours
+        randmiss=np.random.random(label_in.shape)
+        if missing is None:
+            is_known=np.ones(label_in.shape,dtype=bool)
+        else:
+            is_known=randmiss>=missing
+        up=np.where(label_in==1,1.,1-discount)
+        up=np.where(is_known,up,0. if MAR else 1.)
+        down=np.where(is_known & (label_in==1),discount,0.)
+        resulting_scores=np.stack((down.sum(axis=2),up.sum(axis=2)),axis=2)/knnbr_nb_neigh
         
+        answers=[Scores(resulting_score) for resulting_score in resulting_scores]
         return answers
-        
@@ -1,7 +1,8 @@
 from .pairpip import get_binomial_int 
 from ..dataset.arff import ArffFile
-from scipy.spatial import kdtree, distance
+from scipy.spatial import kdtree
 from ..representations.credalset import CredalSet
+from ..utils import mean_pairwise_distance
 import numpy as np
 from scipy.sparse import dok_matrix
 from math import fabs
@@ -82,12 +83,7 @@ class LikOvo(object):
             self.normal.append(False)
             
         #Initalise radius as average distance between all learning instances
-        if len(data_array) > 1000:
-                valred=np.random.permutation(data_array)[0:1000]
-                distances=distance.cdist(valred,valred)
-        else:
-                distances=distance.cdist(data_array,data_array)
-        self.radius=distances.sum()/(2*(len(distances)**2-len(distances)))
+        self.radius=mean_pairwise_distance(data_array,sample_size=1000)/2
         self.tree=kdtree.KDTree(data_array)
         self.trueclasses=[row[-1] for row in learndataset.data]
             
@@ -107,41 +107,51 @@ class BinaryILogisticLasso(ImpreciseLogistic):
                  test_dataset,
                  with_precise_probabilities=False,
                  **kwargs):
-        assert len(self._lasso_models) > 0, "No lasso model is learning."
-        set_probabilities = np.ones(shape=(len(test_dataset), 2, len(self._lasso_models))) * -1
-        answers, answers_precise = [], []
-        for t, test in enumerate(test_dataset):
-            resulting_int = np.zeros((2, 2))
-            for i, lasso_fitted in enumerate(self._lasso_models):
-                _probability = cvglmnetPredict(obj=lasso_fitted,
-                                               newx=np.array([test]),
-                                               s='lambda_1se',
-                                               ptype='response')[0]
-                set_probabilities[t, 1, i] = _probability
-                set_probabilities[t, 0, i] = 1 - _probability
-            self._logger.debug("Set of probabilities of class 0: %s",
-                               set_probabilities[t, 0, :])
-            self._logger.debug("Set of probabilities of class 1: %s",
-                               set_probabilities[t, 1, :])
-            # computing the lower and upper probability
-            resulting_int[0, :] = [np.max(set_probabilities[t, 0, :]),
-                                   np.max(set_probabilities[t, 1, :])]
-            resulting_int[1, :] = [np.min(set_probabilities[t, 0, :]),
-                                   np.min(set_probabilities[t, 1, :])]
-            answers.append(IntervalsProbability(resulting_int))
-            # computing the precise probability
-            precise_probability = np.zeros(2)
-            precise_probability[1] = cvglmnetPredict(obj=self._precise_logit,
-                                                     newx=np.array([test]),
-                                                     s='lambda_1se',
-                                                     ptype='response')[0]
-            precise_probability[0] = 1 - precise_probability[1]
-            answers_precise.append(precise_probability)
+        results = self.evaluate_proba(test_dataset, with_precise_probabilities)
+        lower, upper = results[0], results[1]
+        self._logger.debug("Lower probabilities of classes: %s", lower)
+        self._logger.debug("Upper probabilities of classes: %s", upper)
+        answers = [IntervalsProbability(np.array([upper[t], lower[t]])) for t in range(len(lower))]
         if with_precise_probabilities:
-            return answers, answers_precise
+            return answers, list(results[2])
         else:
             return answers
 
+    def evaluate_proba(self,
+                       test_dataset,
+                       with_precise_probabilities=False):
+        """
+            Batch version of evaluate: every lasso model predicts all the test
+            instances at once and the bounds are returned as dense arrays
+            (columns ordered as get_clazz()), without building one
+            IntervalsProbability by instance.
+
+        :param test_dataset: list of input features of instances to evaluate
+        :param with_precise_probabilities: also return the probabilities of the precise model
+        :return: lower and upper probabilities, each one of shape (n_samples, 2)
+            (and precise probabilities of shape (n_samples, 2) if required)
+        """
+        assert len(self._lasso_models) > 0, "No lasso model is learning."
+        newx = np.array(test_dataset, dtype="float64")
+        set_probabilities = np.zeros((len(newx), len(self._lasso_models)))
+        for i, lasso_fitted in enumerate(self._lasso_models):
+            set_probabilities[:, i] = cvglmnetPredict(obj=lasso_fitted,
+                                                      newx=newx,
+                                                      s='lambda_1se',
+                                                      ptype='response')[:, 0]
+        lower, upper = np.zeros((len(newx), 2)), np.zeros((len(newx), 2))
+        lower[:, 1], upper[:, 1] = set_probabilities.min(axis=1), set_probabilities.max(axis=1)
+        lower[:, 0], upper[:, 0] = 1 - upper[:, 1], 1 - lower[:, 1]
+        if with_precise_probabilities:
+            precise_probabilities = np.zeros((len(newx), 2))
+            precise_probabilities[:, 1] = cvglmnetPredict(obj=self._precise_logit,
+                                                          newx=newx,
+                                                          s='lambda_1se',
+                                                          ptype='response')[:, 0]
+            precise_probabilities[:, 0] = 1 - precise_probabilities[:, 1]
+            return lower, upper, precise_probabilities
+        return lower, upper
+
     def get_maximality_from_credal(self, credal_set):
         max_decision = credal_set.getmaximaldecision()
         return self._clazz[max_decision == 1]
@@ -2,7 +2,8 @@ import abc, math, time
 import numpy as np
 from .mlcncc import MLCNCC
 from enum import Enum
-from classifip.utils import create_logger
+from scipy.special import expit
+from classifip.utils import create_logger, encode_nominal
 
 
 class IMLCStrategy(Enum):
@@ -15,8 +16,71 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
 
     def __init__(self, DEBUG=False):
         super(MLChaining, self).__init__(DEBUG)
+        # bounds of the feature part and of the label part (product over the labels
+        # precisely inferred so far) of each label, for the instance being evaluated
+        self._context_item = None
+        self._context_labels = []
+        self._context_feature_bounds = dict()
+        self._context_label_bounds = dict()
+        # ratios of the optimal paths of imprecise branching, for the learned counts and a value of s
+        self._opt_path_tables = None
         self._logger = create_logger("MLChaining", DEBUG)
 
+    def __start_context(self, new_instance):
+        """Reset the cached bounds for a new instance to evaluate"""
+        self._context_item = new_instance
+        self._context_labels = []
+        self._context_feature_bounds = dict()
+        self._context_label_bounds = dict()
+
+    def __fix_context_label(self, idx_inferred_label, inferred_label, chain_predicted_labels,
+                            ncc_s_param, ncc_epsilon):
+        """Update incrementally the label part of the cached bounds of the labels
+        not inferred yet, once a label is precisely inferred (no update otherwise)"""
+        if inferred_label == str(MLCNCC.LABEL_PARTIAL_VALUE):
+            return
+        self._context_labels.append(idx_inferred_label)
+        for idx_label, label_bounds in self._context_label_bounds.items():
+            if chain_predicted_labels[idx_label] is None:
+                new_bounds = self.lower_upper_probability_labels(idx_label, chain_predicted_labels, ncc_s_param,
+                                                                 ncc_epsilon, [idx_inferred_label])
+                if self.has_log_space:
+                    self._context_label_bounds[idx_label] = [a + b for a, b in zip(label_bounds, new_bounds)]
+                else:
+                    self._context_label_bounds[idx_label] = [a * b for a, b in zip(label_bounds, new_bounds)]
+
+    def __context_cond_probability(self,
+                                   idx_label_to_infer,
+                                   new_instance,
+                                   augmented_labels,
+                                   ncc_s_param,
+                                   ncc_epsilon,
+                                   idx_chain_predict_labels):
+        """Compute :meth:`~classifip.models.mlc.mlcncc.MLCNCC.lower_upper_cond_probability`
+        from the cached bounds of the instance being evaluated: the feature part of a
+        label is computed once, and its label part is updated as labels are inferred."""
+        if new_instance is not self._context_item or list(idx_chain_predict_labels) != self._context_labels:
+            return super(MLChaining, self).lower_upper_cond_probability(idx_label_to_infer,
+                                                                        new_instance,
+                                                                        augmented_labels,
+                                                                        ncc_s_param,
+                                                                        ncc_epsilon,
+                                                                        idx_chain_predict_labels)
+        if idx_label_to_infer not in self._context_feature_bounds:
+            self._context_feature_bounds[idx_label_to_infer] = \
+                self.lower_upper_probability_feature(idx_label_to_infer, new_instance, ncc_s_param, ncc_epsilon)
+            self._context_label_bounds[idx_label_to_infer] = \
+                self.lower_upper_probability_labels(idx_label_to_infer, augmented_labels, ncc_s_param,
+                                                    ncc_epsilon, idx_chain_predict_labels)
+        return super(MLChaining, self).lower_upper_cond_probability(idx_label_to_infer,
+                                                                    new_instance,
+                                                                    augmented_labels,
+                                                                    ncc_s_param,
+                                                                    ncc_epsilon,
+                                                                    idx_chain_predict_labels,
+                                                                    self._context_feature_bounds[idx_label_to_infer],
+                                                                    self._context_label_bounds[idx_label_to_infer])
+
     @staticmethod
     def __maximality_decision(interval_probability):
         if interval_probability[0] > 0.5:
@@ -26,6 +90,33 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
         else:
             return str(MLCNCC.LABEL_PARTIAL_VALUE)
 
+    def __opt_path_tables(self, ncc_s_param):
+        """Ratios of the paths 0 and 1 of each imprecise label y_i, for each label y_j
+        to infer, computed once for the learned counts and a value of s.
+
+        :returns: lower ratios, (n_{y_i=k}(y_j=0) + s) / n_{y_i=k}(y_j=1), and upper ratios,
+            n_{y_i=k}(y_j=0) / (n_{y_i=k}(y_j=1) + s), at index [j, i, k]
+        :rtype: tuple of two (nb_labels, nb_labels, 2) :class:`~numpy.array`
+        """
+        if self._opt_path_tables is None or self._opt_path_tables[0] is not self.label_count_tensor or \
+                self._opt_path_tables[1] != ncc_s_param:
+            idx_labels = np.arange(self.nb_labels)
+            f_val_idx_0 = np.array([self.feature_values[label_name].index('0') for label_name in self.label_names])
+            f_val_idx_1 = np.array([self.feature_values[label_name].index('1') for label_name in self.label_names])
+            # avoiding ZeroDivision and infinity values
+            # and uppers equals to 0.0
+            counts = np.maximum(self.label_count_tensor.astype(float), 1e-19)
+            n_fi_c00 = counts[:, 0, idx_labels, f_val_idx_0]  # n_{y_i=0}(y_j=0)
+            n_fi_c10 = counts[:, 1, idx_labels, f_val_idx_0]  # n_{y_i=0}(y_j=1)
+            n_fi_c01 = counts[:, 0, idx_labels, f_val_idx_1]  # n_{y_i=1}(y_j=0)
+            n_fi_c11 = counts[:, 1, idx_labels, f_val_idx_1]  # n_{y_i=1}(y_j=1)
+            # for computing \underline{P}(Y_j=1)
+            lower_paths = np.stack(((n_fi_c00 + ncc_s_param) / n_fi_c10, (n_fi_c01 + ncc_s_param) / n_fi_c11), axis=2)
+            # for computing \overline{P}(Y_j=1)
+            upper_paths = np.stack((n_fi_c00 / (n_fi_c10 + ncc_s_param), n_fi_c01 / (n_fi_c11 + ncc_s_param)), axis=2)
+            self._opt_path_tables = (self.label_count_tensor, ncc_s_param, lower_paths, upper_paths)
+        return self._opt_path_tables[2], self._opt_path_tables[3]
+
     def __compute_opt_path_branching(self,
                                      idx_label_to_infer,
                                      idx_imprecise_labels,
@@ -39,75 +130,30 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
         :param ncc_s_param:
         :return:
         """
-
-        optimal_lower_path = ['-1'] * len(idx_imprecise_labels)
-        optimal_upper_path = ['-1'] * len(idx_imprecise_labels)
-        lower_cum_max, upper_cum_min = 1, 1
-
-        for i, l_index in enumerate(idx_imprecise_labels):  # l_index: label of index
-            label_name = self.label_names[l_index]
-            label_class_1 = self.label_names[idx_label_to_infer] + '|in|' + label_name
-            label_class_0 = self.label_names[idx_label_to_infer] + '|out|' + label_name
-
-            f_val_idx_0 = self.feature_values[label_name].index('0')
-            n_fi_c00 = self.feature_count[label_class_0][f_val_idx_0]  # n_{y_i=0}(y_j=0)
-            n_fi_c10 = self.feature_count[label_class_1][f_val_idx_0]  # n_{y_i=0}(y_j=1)
-
-            f_val_idx_1 = self.feature_values[label_name].index('1')
-            n_fi_c01 = self.feature_count[label_class_0][f_val_idx_1]  # n_{y_i=1}(y_j=0)
-            n_fi_c11 = self.feature_count[label_class_1][f_val_idx_1]  # n_{y_i=1}(y_j=1)
-
-            # avoiding ZeroDivision and infinity values
-            # and uppers equals to 0.0
-            if n_fi_c11 < 1e-19:
-                n_fi_c11 = 1e-19
-            if n_fi_c10 < 1e-19:
-                n_fi_c10 = 1e-19
-            if n_fi_c00 < 1e-19:
-                n_fi_c00 = 1e-19
-            if n_fi_c01 < 1e-19:
-                n_fi_c01 = 1e-19
-
-            # for computing \underline{P}(Y_j=1)
-            lower_path_0 = (n_fi_c00 + ncc_s_param) / n_fi_c10
-            lower_path_1 = (n_fi_c01 + ncc_s_param) / n_fi_c11
-
-            # for computing \overline{P}(Y_j=1)
-            upper_path_0 = n_fi_c00 / (n_fi_c10 + ncc_s_param)
-            upper_path_1 = n_fi_c01 / (n_fi_c11 + ncc_s_param)
-
-            # cumulative binary path 010101...(of lower and upper values)
-            lower_path_0 = lower_cum_max * lower_path_0
-            lower_path_1 = lower_cum_max * lower_path_1
-            upper_path_0 = upper_cum_min * upper_path_0
-            upper_path_1 = upper_cum_min * upper_path_1
-
-            # arg_max: lower maximal path
-            self._logger.debug("IB (lower_path_0, lower_path_1) (%s, %s)", lower_path_0, lower_path_1)
-            if lower_path_0 > lower_path_1:
-                optimal_lower_path[i] = '0'
-                lower_cum_max = lower_path_0
-            elif lower_path_0 < lower_path_1:
-                optimal_lower_path[i] = '1'
-                lower_cum_max = lower_path_1
-            else:
-                self._logger.info("Random-IB (lower_path_0, lower_path_1) (%s, %s)", lower_path_0, lower_path_1)
+        lower_paths, upper_paths = self.__opt_path_tables(ncc_s_param)
+        lower_paths = lower_paths[idx_label_to_infer, idx_imprecise_labels]
+        upper_paths = upper_paths[idx_label_to_infer, idx_imprecise_labels]
+
+        # cumulative binary path 010101...(of lower and upper values)
+        lower_cum_max = np.concatenate(([1.], np.cumprod(lower_paths.max(axis=1))[:-1]))
+        upper_cum_min = np.concatenate(([1.], np.cumprod(upper_paths.min(axis=1))[:-1]))
+        lower_paths = lower_cum_max[:, None] * lower_paths
+        upper_paths = upper_cum_min[:, None] * upper_paths
+        self._logger.debug("IB (lower_paths, upper_paths) (%s, %s)", lower_paths, upper_paths)
+
+        # arg_max: lower maximal path, and arg_min: upper minimal path
+        optimal_lower_path = np.where(lower_paths[:, 0] > lower_paths[:, 1], '0', '1').tolist()
+        optimal_upper_path = np.where(upper_paths[:, 0] < upper_paths[:, 1], '0', '1').tolist()
+        is_lower_tie = lower_paths[:, 0] == lower_paths[:, 1]
+        is_upper_tie = upper_paths[:, 0] == upper_paths[:, 1]
+        for i in np.flatnonzero(is_lower_tie | is_upper_tie):
+            if is_lower_tie[i]:
+                self._logger.info("Random-IB (lower_path_0, lower_path_1) (%s, %s)", *lower_paths[i])
                 optimal_lower_path[i] = np.random.choice(['0', '1'], 1)[0]
-                lower_cum_max = lower_path_1
                 # raise Exception("Not implemented yet __compute_opt_path_branching") @salmuz
-
-            # arg_max: upper minimal path
-            self._logger.debug("IB (upper_path_0, upper_path_1) (%s, %s)", upper_path_0, upper_path_1)
-            if upper_path_0 < upper_path_1:
-                optimal_upper_path[i] = '0'
-                upper_cum_min = upper_path_0
-            elif upper_path_0 > upper_path_1:
-                optimal_upper_path[i] = '1'
-                upper_cum_min = upper_path_1
-            else:
-                self._logger.info("Random-IB (upper_path_0, upper_path_1) (%s, %s)", upper_path_0, upper_path_1)
+            if is_upper_tie[i]:
+                self._logger.info("Random-IB (upper_path_0, upper_path_1) (%s, %s)", *upper_paths[i])
                 optimal_upper_path[i] = np.random.choice(['0', '1'], 1)[0]
-                upper_cum_min = upper_path_1
 
         return optimal_lower_path, optimal_upper_path
 
@@ -132,42 +178,42 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
                            partial_opt_predicted_labels, optimal_lower_path, optimal_upper_path)
         if len(idx_imprecise_labels) == 0:
             u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
-                super(MLChaining, self).lower_upper_cond_probability(idx_current_label,
-                                                                     new_instance,
-                                                                     partial_opt_predicted_labels,
-                                                                     ncc_s_param,
-                                                                     ncc_epsilon,
-                                                                     idx_predicted_labels)
+                self.__context_cond_probability(idx_current_label,
+                                                new_instance,
+                                                partial_opt_predicted_labels,
+                                                ncc_s_param,
+                                                ncc_epsilon,
+                                                idx_predicted_labels)
             # calculating lower and upper probability [\underline P(Y_j=1), \overline P(Y_j=1)]
-            lower_cond_prob_1 = l_numerator_1 / (l_numerator_1 + u_denominator_0)
-            upper_cond_prob_1 = u_numerator_1 / (u_numerator_1 + l_denominator_0)
+            lower_cond_prob_1 = self.posterior_probability(l_numerator_1, u_denominator_0)
+            upper_cond_prob_1 = self.posterior_probability(u_numerator_1, l_denominator_0)
         else:
             self._logger.debug("IB (idx_label, chaining, lower_path, upper_path) (%s, %s, %s, %s)",
                                idx_current_label, chain_predicted_labels, optimal_lower_path, optimal_upper_path)
             # computing lower probability: \underline P(Y_j=1)
             partial_opt_predicted_labels[idx_imprecise_labels] = optimal_lower_path
             _, l_numerator_1, u_denominator_0, _ = \
-                super(MLChaining, self).lower_upper_cond_probability(idx_current_label,
-                                                                     new_instance,
-                                                                     partial_opt_predicted_labels,
-                                                                     ncc_s_param,
-                                                                     ncc_epsilon,
-                                                                     idx_predicted_labels)
-
-            lower_cond_prob_1 = l_numerator_1 / (l_numerator_1 + u_denominator_0)
+                self.__context_cond_probability(idx_current_label,
+                                                new_instance,
+                                                partial_opt_predicted_labels,
+                                                ncc_s_param,
+                                                ncc_epsilon,
+                                                idx_predicted_labels)
+
+            lower_cond_prob_1 = self.posterior_probability(l_numerator_1, u_denominator_0)
             self._logger.debug("IB (idx_label, opt_upper_path (%s, %s)",
                                idx_current_label, partial_opt_predicted_labels)
 
             # computing upper probability: \overline P(Y_j=1)
             partial_opt_predicted_labels[idx_imprecise_labels] = optimal_upper_path
             u_numerator_1, _, _, l_denominator_0 = \
-                super(MLChaining, self).lower_upper_cond_probability(idx_current_label,
-                                                                     new_instance,
-                                                                     partial_opt_predicted_labels,
-                                                                     ncc_s_param,
-                                                                     ncc_epsilon,
-                                                                     idx_predicted_labels)
-            upper_cond_prob_1 = u_numerator_1 / (u_numerator_1 + l_denominator_0)
+                self.__context_cond_probability(idx_current_label,
+                                                new_instance,
+                                                partial_opt_predicted_labels,
+                                                ncc_s_param,
+                                                ncc_epsilon,
+                                                idx_predicted_labels)
+            upper_cond_prob_1 = self.posterior_probability(u_numerator_1, l_denominator_0)
             self._logger.debug("IB (idx_label, opt_lower_path (%s, %s)",
                                idx_current_label, partial_opt_predicted_labels)
             self._logger.debug("IB (idx_label, resulting_score (%s, %s)",
@@ -208,6 +254,8 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
             self._logger.debug("BR (chain_predicted_labels, idx_current_label, inferred_label) (%s, %s, %s)",
                                chain_predicted_labels, idx_current_label, inferred_label)
             chain_predicted_labels[idx_current_label] = inferred_label
+            self.__fix_context_label(idx_current_label, inferred_label, chain_predicted_labels,
+                                     ncc_s_param, ncc_epsilon)
             if inferred_label == '-1':
                 idx_imprecise_labels.append(idx_current_label)
             else:
@@ -224,15 +272,15 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
         self._logger.debug("TE (idx_imprecise_labels, idx_predicted_labels) (%s,%s)",
                            idx_imprecise_labels, idx_predicted_labels)
         u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
-            super(MLChaining, self).lower_upper_cond_probability(idx_current_label,
-                                                                 new_instance,
-                                                                 chain_predicted_labels,
-                                                                 ncc_s_param,
-                                                                 ncc_epsilon,
-                                                                 idx_predicted_labels)
+            self.__context_cond_probability(idx_current_label,
+                                            new_instance,
+                                            chain_predicted_labels,
+                                            ncc_s_param,
+                                            ncc_epsilon,
+                                            idx_predicted_labels)
         # calculating lower and upper probability [\underline P(Y_j=1), \overline P(Y_j=1)]
-        upper_cond_prob_1 = u_numerator_1 / (u_numerator_1 + l_denominator_0)
-        lower_cond_prob_1 = l_numerator_1 / (l_numerator_1 + u_denominator_0)
+        upper_cond_prob_1 = self.posterior_probability(u_numerator_1, l_denominator_0)
+        lower_cond_prob_1 = self.posterior_probability(l_numerator_1, u_denominator_0)
         return lower_cond_prob_1, upper_cond_prob_1
 
     def __strategy_ternary_tree(self, new_instance, ncc_s_param, ncc_epsilon, is_dynamic_context):
@@ -269,6 +317,8 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
             self._logger.debug("TE (chain_predicted_labels, idx_current_label, inferred_label) (%s, %s, %s)",
                                chain_predicted_labels, idx_current_label, inferred_label)
             chain_predicted_labels[idx_current_label] = inferred_label
+            self.__fix_context_label(idx_current_label, inferred_label, chain_predicted_labels,
+                                     ncc_s_param, ncc_epsilon)
             if inferred_label == '-1':
                 idx_imprecise_labels.append(idx_current_label)
             else:
@@ -345,6 +395,84 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
 
         return idx_dynamic_selected
 
+    def __evaluate_static_batch(self, test_dataset, ncc_s_param, ncc_epsilon):
+        """Infer the labels in the static order (0, 1, ..., m-1) for all instances
+        at once: the bounds of label j are computed for all instances with array
+        operations over precomputed tables of bounds, the inferred labels of
+        each instance being kept in an array of codes.
+
+        The label part of the bounds only involves the labels precisely inferred
+        before label j, so that both strategies (imprecise branching and ternary
+        tree) lead to the same bounds in the static order.
+
+        Products of bounds are accumulated as sums of logarithms when the
+        evaluation is performed in log-space (has_log_space).
+
+        :returns: (n_samples, nb_labels, 2) lower and upper probabilities, and
+            (n_samples, nb_labels) inferred labels (-1 if imprecise)
+        :rtype: tuple of :class:`~numpy.array`
+        """
+        codes = encode_nominal(test_dataset, [self.feature_values[f] for f in self.feature_names],
+                               len(self.feature_names))
+        if np.any(codes < 0):
+            raise ValueError('Some feature values of test instances were not seen in the learning step.')
+        nb_instances = len(test_dataset)
+        idx_features = np.arange(len(self.feature_names))
+        # code of the inferred value of each label (position in its modalities), -1 if imprecise
+        value_codes = [np.array([self.feature_values[label].index(v) for v in ('0', '1')])
+                       for label in self.label_names]
+        chain_codes = np.full((nb_instances, self.nb_labels), -1, dtype=int)
+        chains = np.full((nb_instances, self.nb_labels), MLCNCC.LABEL_PARTIAL_VALUE, dtype=int)
+        scores = np.zeros((nb_instances, self.nb_labels, 2))
+        with np.errstate(divide='ignore'):
+            for idx_current_label in range(self.nb_labels):
+                # bounds of P(f_i|Y_j=c) and P(y_k|Y_j=c) for all values, c=0 at index 0 and c=1 at index 1
+                f_lower, f_upper = self.lower_upper_count_tables(self.feature_count_tensor[idx_current_label],
+                                                                 self.nb_feature_values, ncc_s_param, ncc_epsilon)
+                l_lower, l_upper = self.lower_upper_count_tables(self.label_count_tensor[idx_current_label],
+                                                                 self.nb_label_values, ncc_s_param, ncc_epsilon)
+                # (2, n_samples, p) bounds of the features and (2, n_samples, j) bounds of the labels
+                # inferred before label j, set to 1 for the imprecise ones (not in the product)
+                is_precise = chain_codes[:, :idx_current_label] >= 0
+                idx_labels = np.arange(idx_current_label)
+                label_codes = np.maximum(chain_codes[:, :idx_current_label], 0)
+                f_lower_items, f_upper_items = f_lower[:, idx_features, codes], f_upper[:, idx_features, codes]
+                l_lower_items = np.where(is_precise, l_lower[:, idx_labels, label_codes], 1.)
+                l_upper_items = np.where(is_precise, l_upper[:, idx_labels, label_codes], 1.)
+                u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
+                    self.lower_upper_marginal_bounds(idx_current_label, ncc_s_param)
+                if self.has_log_space:
+                    # (n_samples, 2) sums of logarithms of the bounds
+                    cond_lower = np.log(f_lower_items).sum(axis=2).T + np.log(l_lower_items).sum(axis=2).T
+                    cond_upper = np.log(f_upper_items).sum(axis=2).T + np.log(l_upper_items).sum(axis=2).T
+                    u_numerator_1 = np.log(u_numerator_1) + cond_upper[:, 1]
+                    l_numerator_1 = np.log(l_numerator_1) + cond_lower[:, 1]
+                    u_denominator_0 = np.log(u_denominator_0) + cond_upper[:, 0]
+                    l_denominator_0 = np.log(l_denominator_0) + cond_lower[:, 0]
+                    # calculating lower and upper probability [\underline P(Y_j=1), \overline P(Y_j=1)]
+                    lower_cond_prob_1 = expit(l_numerator_1 - u_denominator_0)
+                    upper_cond_prob_1 = expit(u_numerator_1 - l_denominator_0)
+                else:
+                    # (n_samples, 2) products of the bounds
+                    cond_lower = f_lower_items.prod(axis=2).T * l_lower_items.prod(axis=2).T
+                    cond_upper = f_upper_items.prod(axis=2).T * l_upper_items.prod(axis=2).T
+                    u_numerator_1 = u_numerator_1 * cond_upper[:, 1]
+                    l_numerator_1 = l_numerator_1 * cond_lower[:, 1]
+                    u_denominator_0 = u_denominator_0 * cond_upper[:, 0]
+                    l_denominator_0 = l_denominator_0 * cond_lower[:, 0]
+                    # calculating lower and upper probability [\underline P(Y_j=1), \overline P(Y_j=1)]
+                    lower_cond_prob_1 = l_numerator_1 / (l_numerator_1 + u_denominator_0)
+                    upper_cond_prob_1 = u_numerator_1 / (u_numerator_1 + l_denominator_0)
+                scores[:, idx_current_label, 0] = lower_cond_prob_1
+                scores[:, idx_current_label, 1] = upper_cond_prob_1
+                # maximality decision
+                inferred = np.where(lower_cond_prob_1 > 0.5, 1, np.where(upper_cond_prob_1 < 0.5, 0, -1))
+                chains[:, idx_current_label] = inferred
+                chain_codes[:, idx_current_label] = np.where(inferred >= 0,
+                                                             value_codes[idx_current_label][np.maximum(inferred, 0)],
+                                                             -1)
+        return scores, chains
+
     def evaluate(self,
                  test_dataset,
                  ncc_epsilon=0.001,
@@ -352,29 +480,42 @@ class MLChaining(MLCNCC, metaclass=abc.ABCMeta):
                  with_imprecise_marginal=False,
                  type_strategy=IMLCStrategy.IMPRECISE_BRANCHING,
                  is_dynamic_context=False,
-                 has_set_probabilities=False):
+                 has_set_probabilities=False,
+                 with_log_space=False):
         # setting the global class-scope variable
         self.has_imprecise_marginal = with_imprecise_marginal
-        interval_prob_answers, predict_chain_answers = [], []
-
-        for item in test_dataset:
-            if IMLCStrategy.IMPRECISE_BRANCHING == type_strategy:
-                rs_score, prediction = self.__strategy_imprecise_branching(item,
-                                                                           ncc_s_param,
-                                                                           ncc_epsilon,
-                                                                           is_dynamic_context)
-            elif IMLCStrategy.TERNARY_IMPRECISE_TREE == type_strategy:
-                rs_score, prediction = self.__strategy_ternary_tree(item,
-                                                                    ncc_s_param,
-                                                                    ncc_epsilon,
-                                                                    is_dynamic_context)
+        self.has_log_space = with_log_space
+        try:
+            interval_prob_answers, predict_chain_answers = [], []
+
+            if not is_dynamic_context and type_strategy in (IMLCStrategy.IMPRECISE_BRANCHING,
+                                                            IMLCStrategy.TERNARY_IMPRECISE_TREE):
+                # same label order for all instances: labels are inferred for all instances at once
+                scores, chains = self.__evaluate_static_batch(test_dataset, ncc_s_param, ncc_epsilon)
+                interval_prob_answers = list(scores)
+                predict_chain_answers = chains.tolist()
             else:
-                raise Exception("Not STRATEGY implemented yet")
-
-            interval_prob_answers.append(rs_score)
-            predict_chain_answers.append(list(map(int, prediction)))
-
-        self.has_imprecise_marginal = False  # reboot the global class-scope variable
+                for item in test_dataset:
+                    self.__start_context(item)
+                    if IMLCStrategy.IMPRECISE_BRANCHING == type_strategy:
+                        rs_score, prediction = self.__strategy_imprecise_branching(item,
+                                                                                   ncc_s_param,
+                                                                                   ncc_epsilon,
+                                                                                   is_dynamic_context)
+                    elif IMLCStrategy.TERNARY_IMPRECISE_TREE == type_strategy:
+                        rs_score, prediction = self.__strategy_ternary_tree(item,
+                                                                            ncc_s_param,
+                                                                            ncc_epsilon,
+                                                                            is_dynamic_context)
+                    else:
+                        raise Exception("Not STRATEGY implemented yet")
+
+                    interval_prob_answers.append(rs_score)
+                    predict_chain_answers.append(list(map(int, prediction)))
+        finally:
+            self.has_imprecise_marginal = False  # reboot the global class-scope variable
+            self.has_log_space = False
+            self.__start_context(None)
         if has_set_probabilities:
             return predict_chain_answers, interval_prob_answers
         else:
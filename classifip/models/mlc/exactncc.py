@@ -1,8 +1,7 @@
-from classifip.evaluation.measures import hamming_distance
 from classifip.representations import binaryTree as bt
 from classifip.representations.intervalsProbability import IntervalsProbability
 from itertools import permutations, combinations, product
-import queue, copy, math, abc, time, xxhash
+import queue, copy, math, abc, time, multiprocessing
 from classifip.utils import timeit
 import numpy as np
 from .mlcncc import MLCNCC
@@ -10,8 +9,81 @@ from classifip.utils import create_logger
 from itertools import compress
 
 
+class LevelExpectationTree(object):
+    """
+        Level-ordered probability tree of a multi-label problem for a given instance.
+
+        The probability intervals of the 2^l nodes of the level l (the node of the path of
+        labels y_1...y_l being at the index int("y_1...y_l", 2)) are stored in a NumPy array,
+        and the lower expectation is computed bottom-up, level by level, as the minimum of
+        the two linear forms given by the extreme points of each binary node.
+    """
+
+    def __init__(self, nb_labels):
+        self.nb_labels = nb_labels
+        # lproba[l][i] is the 2x2 array [[upper y=0, upper y=1], [lower y=0, lower y=1]] of the node i of level l
+        self.lproba = [np.zeros((2 ** level, 2, 2)) for level in range(nb_labels)]
+
+    def getlowerexpectation(self, costs):
+        """
+            Computing the lower expectation of one or several cost vectors in a single pass.
+
+        :param costs: cost vector of the 2^m label vectors (the label vector y being at the index
+            int("y", 2)), or a k x 2^m matrix of k cost vectors
+        :return: the lower expectation (a vector of k values for a matrix)
+        """
+        costs = np.asarray(costs, dtype=float)
+        if costs.ndim > 2 or costs.shape[-1] != 2 ** self.nb_labels:
+            raise Exception('Size of cost vector is not correct:', costs.shape)
+        values = np.atleast_2d(costs)
+        for level in reversed(range(self.nb_labels)):
+            lproba = self.lproba[level]
+            values = values.reshape(len(values), 2 ** level, 2)
+            values_0, values_1 = values[:, :, 0], values[:, :, 1]
+            values = np.minimum(values_0 * lproba[:, 1, 0] + values_1 * lproba[:, 0, 1],
+                                values_0 * lproba[:, 0, 0] + values_1 * lproba[:, 1, 1])
+        return values[0, 0] if costs.ndim == 1 else values[:, 0]
+
+
 class BinaryMultiLabel(bt.BinaryTree):
 
+    @staticmethod
+    def set_reachable_probability(bound_probabilities):
+        if bound_probabilities.isreachable() == 0:
+            # do approximation in precise case with parameter s nearly zero 0
+            # check precision 0.9...9 (10 times), supremum should be greater than 1
+            sum_sup_prob = bound_probabilities.lproba[0, :].sum()
+            if (1 - 1e-10) < sum_sup_prob < 1:
+                idx_big_prob = np.argmin(bound_probabilities.lproba[0, :])
+                value_big_prob = bound_probabilities.lproba[0, idx_big_prob]
+                bound_probabilities.lproba[0, idx_big_prob] = value_big_prob + (1 - sum_sup_prob)
+            bound_probabilities.setreachableprobability()
+
+    def getlowerexpectationTree(self, item, ncc_s_param=2, ncc_epsilon=0.001):
+        """
+            Computing the (reachable) probability intervals of all nodes of the binary tree
+            of a multi-label problem, stored level by level, from which lower expectations
+            of many cost vectors can be computed without walking the tree again.
+
+        :param item:
+        :param ncc_s_param:
+        :param ncc_epsilon:
+        :return: the level-ordered probability tree
+        :rtype: :class:`LevelExpectationTree`
+        """
+        nb_labels = int(math.log2(self.node.count()))
+        expectation_tree = LevelExpectationTree(nb_labels)
+        nodes = [(self, 0, 0)]
+        while len(nodes) > 0:
+            NDtree, level, index = nodes.pop()
+            bound_probabilities = NDtree.node.proba(item, ncc_s_param, ncc_epsilon)
+            BinaryMultiLabel.set_reachable_probability(bound_probabilities)
+            expectation_tree.lproba[level][index] = bound_probabilities.lproba
+            if level + 1 < nb_labels:
+                nodes.append((NDtree.left, level + 1, 2 * index))
+                nodes.append((NDtree.right, level + 1, 2 * index + 1))
+        return expectation_tree
+
     def getlowerexpectation(self, function, item, ncc_s_param=2, ncc_epsilon=0.001):
         """
            Computing the lower expectation recursively of a multi-label problem,
@@ -33,15 +105,7 @@ class BinaryMultiLabel(bt.BinaryTree):
 
         def lowerExp(NDtree):
             bound_probabilities = NDtree.node.proba(item, ncc_s_param, ncc_epsilon)
-            if bound_probabilities.isreachable() == 0:
-                # do approximation in precise case with parameter s nearly zero 0
-                # check precision 0.9...9 (10 times), supremum should be greater than 1
-                sum_sup_prob = bound_probabilities.lproba[0, :].sum()
-                if (1 - 1e-10) < sum_sup_prob < 1:
-                    idx_big_prob = np.argmin(bound_probabilities.lproba[0, :])
-                    value_big_prob = bound_probabilities.lproba[0, idx_big_prob]
-                    bound_probabilities.lproba[0, idx_big_prob] = value_big_prob + (1 - sum_sup_prob)
-                bound_probabilities.setreachableprobability()
+            BinaryMultiLabel.set_reachable_probability(bound_probabilities)
 
             if NDtree.left.node.count() == 1 and NDtree.left.node.count() == 1:
                 expInf = bound_probabilities.getlowerexpectation(
@@ -66,80 +130,9 @@ class BinaryMultiLabel(bt.BinaryTree):
 
         return lowerExp(self)
 
-    def getlowerexpectationGeneration(self, item, ncc_s_param=2, ncc_epsilon=0.001):
-        """
-            A improved version of the lower expectation calculation in a multi-label problem.
-            This solution recursively walk the binary tree just one time and it builds a Python function
-            in string to accelarate quickly the calculation.
-
-            This procedure works very well for little binary tree with deepness < 20
-            and with a precision numeric decimal of
-                |getlowerexpectationGeneration - getlowerexpectation| < 1e-16
 
-        :param item:
-        :param ncc_s_param:
-        :param ncc_epsilon:
-        :return:
-        """
-        leafs = dict()
-        leafs_var = dict()
-
-        def __hash(query):
-            _hash = xxhash.xxh64()
-            _hash.update(query)
-            res_hash = _hash.hexdigest()
-            _hash.reset()
-            return res_hash
-
-        def binaryToDecimal(n):
-            return int(n, 2)
-
-        def getlowerexpectation(prob, is_leaf=False, idx0=None, idx1=None):
-            if is_leaf:
-                expDichStr = "min(c[%s]*%s+c[%s]*%s,c[%s]*%s+c[%s]*%s)" % \
-                             (idx0, prob[1, 0], idx1, prob[0, 1], idx0, prob[0, 0], idx1, prob[1, 1])
-                name_var = "a" + str(idx0) + str(idx1)
-                leafs_var[__hash(expDichStr)] = name_var + "=" + expDichStr
-                leafs[__hash(expDichStr)] = name_var
-            else:
-                keyx0 = __hash(idx0)
-                new_idx0 = leafs[keyx0] if keyx0 in leafs else idx0
-                keyx1 = __hash(idx1)
-                new_idx1 = leafs[keyx1] if keyx1 in leafs else idx1
-                expDichStr = "min(%s*%s+%s*%s,%s*%s+%s*%s)" \
-                             % (new_idx0, prob[1, 0], new_idx1, prob[0, 1], new_idx0, prob[0, 0], new_idx1, prob[1, 1])
-                name_var = str(new_idx0) + str(new_idx1)
-                leafs_var[__hash(expDichStr)] = name_var + "=" + expDichStr
-                leafs[__hash(expDichStr)] = name_var
-
-            return expDichStr
-
-        def lowerExp(NDtree):
-            bound_probabilities = NDtree.node.proba(item, ncc_s_param, ncc_epsilon)
-            if bound_probabilities.isreachable() == 0:
-                # do approximation in precise case with parameter s nearly zero 0
-                # check precision 0.9...9 (10 times), supremum should be greater than 1
-                sum_sup_prob = bound_probabilities.lproba[0, :].sum()
-                if (1 - 1e-10) < sum_sup_prob < 1:
-                    idx_big_prob = np.argmin(bound_probabilities.lproba[0, :])
-                    value_big_prob = bound_probabilities.lproba[0, idx_big_prob]
-                    bound_probabilities.lproba[0, idx_big_prob] = value_big_prob + (1 - sum_sup_prob)
-                bound_probabilities.setreachableprobability()
-
-            if NDtree.left.node.count() == 1 and NDtree.left.node.count() == 1:
-                expInfStr = getlowerexpectation(bound_probabilities.lproba,
-                                                is_leaf=True,
-                                                idx0=binaryToDecimal(NDtree.left.node.label[0]),
-                                                idx1=binaryToDecimal(NDtree.right.node.label[0]))
-            else:
-                expInfStr = getlowerexpectation(bound_probabilities.lproba,
-                                                idx0=lowerExp(NDtree.left),
-                                                idx1=lowerExp(NDtree.right))
-            return expInfStr
-
-        lexp = lowerExp(self)
-        lexp_cost_var = "\n\t".join(list(leafs_var.values())[:-1])
-        return lexp, lexp_cost_var
+# maximum number of cost values evaluated at once (bounding memory)
+_MAX_SIZE_COSTS = 2 ** 22
 
 
 class MLCNCCExact(MLCNCC):
@@ -148,6 +141,9 @@ class MLCNCCExact(MLCNCC):
         super(MLCNCCExact, self).__init__(DEBUG)
         self.power_set = []
         self.root = None
+        # bounds of the feature part of each label for the instance being evaluated
+        self._feature_bounds_item = None
+        self._feature_bounds = dict()
         self.DEBUG = DEBUG
         self._logger = create_logger("MLCNCCExact", DEBUG)
 
@@ -177,134 +173,205 @@ class MLCNCCExact(MLCNCC):
         augmented_input_labels = [str(lab) for lab in labels[0][:level_tree_model]]
 
         def __inference(item, ncc_s_param=2, ncc_epsilon=0.001):
+            # the feature part is shared by all nodes of a same level (same label to infer)
+            feature_bounds = None
+            if item is self._feature_bounds_item:
+                key_bounds = (level_tree_model, ncc_s_param, ncc_epsilon, self.has_log_space)
+                if key_bounds not in self._feature_bounds:
+                    self._feature_bounds[key_bounds] = \
+                        self.lower_upper_probability_feature(level_tree_model, item, ncc_s_param, ncc_epsilon)
+                feature_bounds = self._feature_bounds[key_bounds]
             u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
                 super(MLCNCCExact, self).lower_upper_cond_probability(level_tree_model, item,
                                                                       augmented_input_labels,
-                                                                      ncc_s_param, ncc_epsilon)
-            y1_upper = u_numerator_1 / (u_numerator_1 + l_denominator_0)
-            y1_lower = l_numerator_1 / (l_numerator_1 + u_denominator_0)
-            y0_upper = u_denominator_0 / (u_denominator_0 + l_numerator_1)
-            y0_lower = l_denominator_0 / (l_denominator_0 + u_numerator_1)
+                                                                      ncc_s_param, ncc_epsilon,
+                                                                      feature_bounds=feature_bounds)
+            y1_upper = self.posterior_probability(u_numerator_1, l_denominator_0)
+            y1_lower = self.posterior_probability(l_numerator_1, u_denominator_0)
+            y0_upper = self.posterior_probability(u_denominator_0, l_numerator_1)
+            y0_lower = self.posterior_probability(l_denominator_0, u_numerator_1)
             interval_probability = np.array([[y0_upper, y1_upper], [y0_lower, y1_lower]])
             return IntervalsProbability(interval_probability)
 
         return __inference
 
+    def __lower_expectation_tree(self, item, ncc_s_param, ncc_epsilon):
+        """
+            Computing the probabilities of all nodes of the tree for a new instance, the
+            bounds of the feature part being computed once per label (not once per node).
+        """
+        self._feature_bounds_item = item
+        self._feature_bounds = dict()
+        try:
+            return self.root.getlowerexpectationTree(item, ncc_s_param, ncc_epsilon)
+        finally:
+            self._feature_bounds_item = None
+            self._feature_bounds = dict()
+
+    def __output_space_popcount(self):
+        """
+            Integer encoding of the output space (the first label being the most significant bit)
+            and the number of ones of each integer, i.e. Hamming costs: |y-y'| = popcount(y ^ y').
+        """
+        all_output_space = np.arange(2 ** self.nb_labels)
+        popcount = np.zeros(len(all_output_space), dtype=int)
+        for j in range(self.nb_labels):
+            popcount += (all_output_space >> j) & 1
+        return all_output_space, popcount
+
     def __evaluate_single_instance(self, new_instance, ncc_s_param=2, ncc_epsilon=0.001):
         """
-            It only works for a single new instance
+            It only works for a single new instance.
+
+            Label vectors are encoded as integers (their index in the output space, the first
+            label being the most significant bit), and the non-dominated solutions are kept
+            in a boolean mask over the output space.
         :param new_instance:
         :param ncc_s_param:
         :param ncc_epsilon:
         :return:
         """
-        indices_labels = list(range(self.nb_labels))
-        all_output_space = list(product([0, 1], repeat=self.nb_labels))
-        maximality_sets = dict.fromkeys(all_output_space, True)
-        cardinal_all_output = len(all_output_space)
-        all_output_space = np.array(all_output_space)
-        PARTIAL_VALUE = MLCNCC.LABEL_PARTIAL_VALUE
+        nb_labels = self.nb_labels
+        cardinal_all_output = 2 ** nb_labels
+        maximality_mask = np.ones(cardinal_all_output, dtype=bool)
+        all_output_space, popcount = self.__output_space_popcount()
         __logger = self._logger
 
-        # creation of binary tree in memory as a function (faster execution instead of recursive method)
-        expectation_infimum_str, exp_cost_leaf_var = self.root.getlowerexpectationGeneration(new_instance,
-                                                                                             ncc_s_param,
-                                                                                             ncc_epsilon)
-        exec_function_dynamic = "global exec_expectation_inf\ndef exec_expectation_inf(c):\n\t" + \
-                                exp_cost_leaf_var + "\n\treturn " + expectation_infimum_str
-        exec(exec_function_dynamic)
+        # probabilities of the binary tree stored level by level (faster execution instead of recursive method)
+        expectation_tree = self.__lower_expectation_tree(new_instance, ncc_s_param, ncc_epsilon)
 
-        def calculation_cost(a_sub_vector, neq_idx_labels=None):
+        def inf_not_equal_labels(neq_idx):
             """
-                Applying by column with a binary singleton Hamming loss function:
-                            L(y1, y2) = 1_{y1 \neq y2}
-                            L(y1, y2) = 1_{y1 ==0 and y2==1} + 1_{y1 ==1 and y2==0}
-                            L(y1, y2) = (1-y1)*y2 + (1-y2)*y1
-                            L(y1, y2) = y1 + y2 - 2*y2*y1
-                            L(y1, y2) = (y2 - y1)^2 = | y2 - y1 |
-                This operation can be computed by column to get vector cost hamming multilabel
-            :param a_sub_vector:
-            :param neq_idx_labels:
-            :return:
+                Comparing every partial binary vector a on the labels neq_idx with its opposite 1-a,
+                (the other labels being equal), a dominating 1-a if the lower expectation of the
+                Hamming cost of 1-a on neq_idx is greater than |neq_idx|/2.
             """
-            a_fully = np.array([a_sub_vector, ] * cardinal_all_output)
-            if neq_idx_labels is not None:
-                return np.sum(abs(all_output_space[:, neq_idx_labels] - a_fully), axis=1)
-            else:
-                return np.sum(abs(all_output_space - a_fully), axis=1)
-
-        def expansion_partial_binary_vector(binary_vector):
-            new_partial_vector = list()
-            new_net_partial_vector = list()
-            for label in binary_vector:
-                if label == PARTIAL_VALUE:
-                    new_partial_vector.append([1, 0])
-                    new_net_partial_vector.append([1, 0])
-                else:
-                    new_partial_vector.append([label])
-                    new_net_partial_vector.append([1 - label])
-
-            set_binary_vector = list(product(*new_partial_vector))
-            set_dominated_vector = list(product(*new_net_partial_vector))
-            return set_binary_vector, set_dominated_vector
-
-        def is_solution_not_dominated(partial_prediction):
-            if PARTIAL_VALUE in partial_prediction:
-                set_dominant, set_dominated = expansion_partial_binary_vector(partial_prediction)
-            else:
-                set_dominant, set_dominated = [tuple(partial_prediction)], [tuple(1 - partial_prediction)]
-            is_not_dominated = False
-            for idx in range(len(set_dominant)):
-                if maximality_sets[set_dominant[idx]] and maximality_sets[set_dominated[idx]]:
-                    is_not_dominated = True
-                    break
-            return is_not_dominated, set_dominated
-
-        def mark_solution_dominated(set_dominated_preds):
-            for dominated in set_dominated_preds:
-                maximality_sets[dominated] = False
-
-        def inf_not_equal_labels(nb_labels, p_n_not_equal_indices, p_neq_idx=None):
-            for a_vector in product([0, 1], repeat=p_n_not_equal_indices):
-                partial_prediction = PARTIAL_VALUE * np.ones(nb_labels, dtype=int)
-                partial_prediction[p_neq_idx] = np.array(a_vector)
-                is_not_dominated, set_dominated_preds = is_solution_not_dominated(partial_prediction)
-                __logger.debug("%s ==> is_not_dominated %s", partial_prediction, is_not_dominated)
-                if is_not_dominated:
-                    not_a_vector = 1 - np.array(a_vector)
-                    cost_vector = calculation_cost(not_a_vector, p_neq_idx)
-                    # inf_expectation = root.getlowerexpectation(cost_vector, new_instance, ncc_s_param, ncc_epsilon)
-                    inf_expectation = exec_expectation_inf(cost_vector)
-                    __logger.debug("%s >_M %s ==> %s <? %s", partial_prediction, not_a_vector,
-                                   (p_n_not_equal_indices * 0.5), inf_expectation)
-                    if (p_n_not_equal_indices * 0.5) < inf_expectation:
-                        mark_solution_dominated(set_dominated_preds)
+            n_not_equal_indices = len(neq_idx)
+            nb_partial_vectors = 2 ** n_not_equal_indices
+            # maximality mask with a row by partial vector a (in product order) and
+            # a column by values of the other labels
+            axes = list(neq_idx) + [j for j in range(nb_labels) if j not in neq_idx]
+            mask = maximality_mask.reshape((2,) * nb_labels).transpose(axes).reshape(nb_partial_vectors, -1)
+            # integer encoding of the partial vectors a
+            partial_vectors = np.arange(nb_partial_vectors)
+            a_bits, neq_bits = np.zeros(nb_partial_vectors, dtype=int), 0
+            for k, j in enumerate(neq_idx):
+                label_bit = 1 << (nb_labels - 1 - j)
+                neq_bits |= label_bit
+                a_bits |= ((partial_vectors >> (n_not_equal_indices - 1 - k)) & 1) * label_bit
+
+            # the opposite of the row a is the row nb_partial_vectors-1-a, a pair of solutions
+            # (dominant, dominated) being in the same column
+            candidates = np.flatnonzero(np.any(mask & mask[::-1], axis=1))
+            if len(candidates) == 0:
+                return
+            not_a_bits = ~a_bits[candidates] & neq_bits
+            inf_expectations = np.empty(len(candidates))
+            step = max(1, _MAX_SIZE_COSTS // cardinal_all_output)
+            for start in range(0, len(candidates), step):
+                cost_vectors = popcount[(all_output_space[None, :] ^ not_a_bits[start:start + step, None]) & neq_bits]
+                inf_expectations[start:start + step] = expectation_tree.getlowerexpectation(cost_vectors)
+
+            for a_vector, inf_expectation in zip(candidates, inf_expectations):
+                opposite = nb_partial_vectors - 1 - a_vector
+                is_not_dominated = np.any(mask[a_vector] & mask[opposite])
+                __logger.debug("%s on %s >_M opposite ==> %s <? %s (is_not_dominated %s)", a_vector, neq_idx,
+                               (n_not_equal_indices * 0.5), inf_expectation, is_not_dominated)
+                if is_not_dominated and (n_not_equal_indices * 0.5) < inf_expectation:
+                    mask[opposite] = False
+
+            maximality_mask[:] = mask.reshape((2,) * nb_labels).transpose(np.argsort(axes)).reshape(-1)
 
         # some equal labels in comparison (m1 > m2)
-        for i in reversed(range(self.nb_labels - 1)):
-            n_not_equal_indices = (self.nb_labels - 1) - i
-            a_set_indices = list(combinations(indices_labels, n_not_equal_indices))
-            for neq_idx in a_set_indices:
-                inf_not_equal_labels(self.nb_labels, n_not_equal_indices, list(neq_idx))
+        for n_not_equal_indices in range(1, nb_labels):
+            for neq_idx in combinations(range(nb_labels), n_not_equal_indices):
+                inf_not_equal_labels(neq_idx)
         # none equal labels (all different)
-        inf_not_equal_labels(self.nb_labels, self.nb_labels)
+        inf_not_equal_labels(tuple(range(nb_labels)))
 
-        solution_exact = list(filter(lambda k: maximality_sets[k], maximality_sets.keys()))
+        solution_exact = list(compress(product([0, 1], repeat=nb_labels), maximality_mask))
         self._logger.debug("set solutions improved exact inference %s", solution_exact)
         return solution_exact
 
-    def evaluate(self, test_dataset, ncc_s_param=2, ncc_epsilon=0.001, precision=None):
-        solutions = []
-        for item in test_dataset:
-            start = time.time()
-            solutions.append(self.__evaluate_single_instance(item, ncc_s_param, ncc_epsilon))
-            self._logger.debug("Time-Inference-Instance %s ", (time.time() - start))
-            if self.DEBUG:
-                self._logger.debug("Tree-probabilities")
-                self.root.printProba(item)
-        return solutions
-
-    def evaluate_exact(self, test_dataset, ncc_s_param=2, ncc_epsilon=0.001):
+    def _evaluate_instance(self, item, ncc_s_param=2, ncc_epsilon=0.001):
+        start = time.time()
+        solution = self.__evaluate_single_instance(item, ncc_s_param, ncc_epsilon)
+        self._logger.debug("Time-Inference-Instance %s ", (time.time() - start))
+        if self.DEBUG:
+            self._logger.debug("Tree-probabilities")
+            self.root.printProba(item)
+        return solution
+
+    def _evaluate_exact_instance(self, item, ncc_s_param=2, ncc_epsilon=0.001):
+        all_output_space, popcount = self.__output_space_popcount()
+        cardinal_all_output = len(all_output_space)
+        step = max(1, _MAX_SIZE_COSTS // cardinal_all_output)
+        expectation_tree = self.__lower_expectation_tree(item, ncc_s_param, ncc_epsilon)
+        maximality_idx = np.ones(cardinal_all_output, dtype=bool)
+        for i1 in range(cardinal_all_output):
+            if maximality_idx[i1]:
+                # all comparisons m1 >_M m2 with the not yet dominated m2, by chunks of m2
+                idx_m2 = np.flatnonzero(maximality_idx)
+                idx_m2 = idx_m2[idx_m2 != i1]
+                m1_costs = popcount[all_output_space ^ i1]
+                for start in range(0, len(idx_m2), step):
+                    chunk_m2 = idx_m2[start:start + step]
+                    l_cost_vectors = popcount[all_output_space[None, :] ^ chunk_m2[:, None]] - m1_costs
+                    l_exps = expectation_tree.getlowerexpectation(l_cost_vectors)
+                    self._logger.debug("%s >_M %s  <=>  %s >? 0 ", i1, chunk_m2, l_exps)
+                    maximality_idx[chunk_m2[l_exps > 0]] = False
+        solution_exact = list(compress(product([0, 1], repeat=self.nb_labels), maximality_idx))
+        self._logger.debug("set solutions exact inference %s", solution_exact)
+        return solution_exact
+
+    def __map_instances(self, name_method, test_dataset, ncc_s_param, ncc_epsilon, n_jobs):
+        """
+            Applying an inference method to each instance, sequentially or with a pool of n_jobs
+            processes (-1 or None for all processors). The learned model is shared with the processes
+            of the pool by fork (i.e. it is not pickled for each task), and the solutions are returned
+            in the order of the instances. Without the 'fork' start method, instances are evaluated
+            sequentially.
+        """
+        global _shared_exact_model
+        if n_jobs is None or n_jobs < 0:
+            n_jobs = multiprocessing.cpu_count()
+        n_jobs = min(n_jobs, len(test_dataset))
+        if n_jobs > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self._logger.warning("The 'fork' start method is not available on this platform, "
+                                 "the %s instances are evaluated sequentially instead of by %s processes.",
+                                 len(test_dataset), n_jobs)
+            n_jobs = 1
+        if n_jobs <= 1:
+            return [getattr(self, name_method)(item, ncc_s_param, ncc_epsilon) for item in test_dataset]
+
+        _shared_exact_model = self
+        try:
+            with multiprocessing.get_context('fork').Pool(processes=n_jobs) as pool:
+                return pool.map(_evaluate_shared_instance,
+                                [(name_method, item, ncc_s_param, ncc_epsilon) for item in test_dataset])
+        finally:
+            _shared_exact_model = None
+
+    def evaluate(self, test_dataset, ncc_s_param=2, ncc_epsilon=0.001, precision=None, with_log_space=False,
+                 n_jobs=1):
+        """
+        :param test_dataset:
+        :param ncc_s_param:
+        :param ncc_epsilon:
+        :param with_log_space: accumulate the products of the node probabilities in log-space
+        :param n_jobs: number of processes evaluating the instances in parallel (-1 for all processors),
+            the instances being evaluated sequentially (with a warning) on platforms without the
+            'fork' start method (e.g. Windows)
+        :return:
+        """
+        # setting the global class-scope variable
+        self.has_log_space = with_log_space
+        try:
+            return self.__map_instances("_evaluate_instance", test_dataset, ncc_s_param, ncc_epsilon, n_jobs)
+        finally:
+            self.has_log_space = False  # reboot the global class-scope variable
+
+    def evaluate_exact(self, test_dataset, ncc_s_param=2, ncc_epsilon=0.001, with_log_space=False, n_jobs=1):
         """
             This algorithm use the criterion of maximality used in CredalSet class
             it exploits the transitivity property checking only dominant class with
@@ -315,27 +382,23 @@ class MLCNCCExact(MLCNCC):
         :param test_dataset:
         :param ncc_s_param:
         :param ncc_epsilon:
+        :param with_log_space: accumulate the products of the node probabilities in log-space
+        :param n_jobs: number of processes evaluating the instances in parallel (-1 for all processors),
+            the instances being evaluated sequentially (with a warning) on platforms without the
+            'fork' start method (e.g. Windows)
         :return:
         """
-        all_output_space = list(product([0, 1], repeat=self.nb_labels))
-        solutions = []
-        # it only works for one test item for a moment
-        for item in test_dataset:
-            maximality_idx = np.ones(len(all_output_space), dtype=bool)
-            for i1, m1 in enumerate(all_output_space):
-                for i2, m2 in enumerate(all_output_space):
-                    if i1 != i2 and maximality_idx[i1] and maximality_idx[i2]:
-                        m1_cost_vector, m2_cost_vector = [], []
-                        for y in all_output_space:
-                            m1_cost_vector.append(hamming_distance(y, m1))
-                            m2_cost_vector.append(hamming_distance(y, m2))
-                        l_cost_vector = np.array(m2_cost_vector) - np.array(m1_cost_vector)
-                        l_exp = self.root.getlowerexpectation(l_cost_vector, item, ncc_s_param, ncc_epsilon)
-                        self._logger.debug("%s >_M %s  <=>  %s >? 0 ", m1, m2, l_exp)
-                        if l_exp > 0:
-                            maximality_idx[i2] = False
-            solution_exact = list(compress(all_output_space, maximality_idx))
-            self._logger.debug("set solutions exact inference %s", solution_exact)
-            solutions.append(solution_exact)
-
-        return solutions
+        self.has_log_space = with_log_space
+        try:
+            return self.__map_instances("_evaluate_exact_instance", test_dataset, ncc_s_param, ncc_epsilon, n_jobs)
+        finally:
+            self.has_log_space = False
+
+
+# learned model inherited (by fork) by the processes of the pool of MLCNCCExact
+_shared_exact_model = None
+
+
+def _evaluate_shared_instance(args):
+    name_method, item, ncc_s_param, ncc_epsilon = args
+    return getattr(_shared_exact_model, name_method)(item, ncc_s_param, ncc_epsilon)
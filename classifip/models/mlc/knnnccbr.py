@@ -2,7 +2,8 @@ from classifip.dataset.arff import ArffFile
 from classifip.representations.voting import Scores
 from classifip.models.mlc.mlcncc import MLCNCC
 from classifip.models.ncc import NCC
-from scipy.spatial import kdtree, distance
+from scipy.spatial import kdtree
+from classifip.utils import mean_pairwise_distance
 import numpy as np
 import copy
 from math import exp
@@ -39,7 +40,7 @@ class KNN_NCC_BR(MLCNCC):
         _index_features = np.array(range(self.nb_feature))
         _index_labels = np.array(np.arange(self.nb_feature,
                                            self.nb_feature + self.nb_labels))
-        self.x_learning = np.array(_np_data[:, _index_features], dtype=np.float)
+        self.x_learning = np.array(_np_data[:, _index_features], dtype=float)
         self.y_learning = _np_data[:, _index_labels].copy()
 
         # procedure create kd_tree by classifier with missing instances
@@ -52,8 +53,7 @@ class KNN_NCC_BR(MLCNCC):
                 if row_instance[self.nb_feature + label_index] == '-1':
                     missing_index.append(row_index)
             x_marginal = np.delete(self.x_learning, missing_index, axis=0)
-            _distances = distance.cdist(x_marginal, self.x_learning)
-            self.radius[label_index] = np.mean(_distances[np.tril_indices(len(x_marginal), k=-1)])
+            self.radius[label_index] = mean_pairwise_distance(x_marginal, self.x_learning)
             self.kd_tree[label_index] = kdtree.KDTree(x_marginal)
 
         self.learn_disc_set = learn_disc_set.make_clone()
@@ -95,12 +95,48 @@ class KNN_NCC_BR(MLCNCC):
 
         :return:
         """
+        lower, upper, precise = self.evaluate_proba(test_dataset,
+                                                    ncc_epsilon=ncc_epsilon,
+                                                    ncc_s_param=ncc_s_param,
+                                                    k=k,
+                                                    type_knn=type_knn,
+                                                    laplace_smoothing=laplace_smoothing,
+                                                    with_precise_probabilities=True)
+        answers = []
+        for i in range(len(lower)):
+            resulting_score_ncc = np.column_stack((lower[i], upper[i]))
+            resulting_score_prec = np.column_stack((precise[i], precise[i]))
+            ans_credal = Scores(resulting_score_ncc, precision=precision)
+            ans_precise = Scores(resulting_score_prec, precision=precision)
+            answers.append((ans_credal, ans_precise))
+
+        return answers
+
+    def evaluate_proba(self, test_dataset,
+                       ncc_epsilon=0.001,
+                       ncc_s_param=2.0,
+                       k=1,
+                       type_knn=2,
+                       laplace_smoothing=False,
+                       with_precise_probabilities=False):
+        """
+            Batch version of evaluate returning dense arrays instead of a couple of
+            Scores by instance.
+
+        :param test_dataset: list of couples (raw instance, discretized instance)
+        :param with_precise_probabilities: also return the precise probabilities P(Y_j=1)
+            obtained with the local precise NCC (s=0 and epsilon=0)
+        :return: lower and upper probabilities P(Y_j=1), each one of shape (n_samples, n_labels)
+            (and precise probabilities of shape (n_samples, n_labels) if required)
+        """
         if type_knn not in [1, 2]:
             raise Exception('Setting k-nearest neighbors is not implemented yet.')
 
-        answers = []
+        lower = np.zeros((len(test_dataset), self.nb_labels))
+        upper = np.zeros((len(test_dataset), self.nb_labels))
+        precise = np.zeros((len(test_dataset), self.nb_labels))
         model_ncc = NCC()
-        for raw_instance, disc_instance in test_dataset:
+        for i, (raw_instance, disc_instance) in enumerate(test_dataset):
 
             # validate instance is np-array
             instance = np.array(raw_instance)
@@ -109,8 +145,6 @@ class KNN_NCC_BR(MLCNCC):
             else:
                 instance = instance.astype(dtype=float)
 
-            resulting_score_ncc = np.zeros((self.nb_labels, 2))
-            resulting_score_prec = np.zeros((self.nb_labels, 2))
             for label_index in range(self.nb_labels):
                 if type_knn == 1:
                     _, index_disk_knn = self.kd_tree[label_index].query(instance, k=k)
@@ -118,9 +152,8 @@ class KNN_NCC_BR(MLCNCC):
                     index_disk_knn = self.kd_tree[label_index].query_ball_point(instance, k * self.radius[label_index])
                 # learning and predicting in local model by with respect to unlabelled instance
                 if len(index_disk_knn) == 0:
-                    resulting_score_ncc[label_index, 1] = 1
-                    resulting_score_prec[label_index, 1] = np.random.uniform(size=1)
-                    resulting_score_prec[label_index, 0] = resulting_score_prec[label_index, 1]
+                    upper[i, label_index] = 1
+                    precise[i, label_index] = np.random.uniform(size=1)[0]
                 else:
                     data_knn = list()
                     for row_index in index_disk_knn:
@@ -131,19 +164,18 @@ class KNN_NCC_BR(MLCNCC):
                     data_learn_knn = self.skeleton_learn_knn.make_clone()
                     data_learn_knn.data = data_knn
                     model_ncc.learn(data_learn_knn)
-                    ans_credal = model_ncc.evaluate(test_dataset=[disc_instance],
-                                                    ncc_s_param=ncc_s_param,
-                                                    precision=precision,
-                                                    laplace_smoothing=laplace_smoothing)[0]
-                    ans_precise = model_ncc.evaluate(test_dataset=[disc_instance],
-                                                     ncc_s_param=0,
-                                                     ncc_epsilon=0,
-                                                     precision=precision,
-                                                     laplace_smoothing=laplace_smoothing)[0]
-                    resulting_score_ncc[label_index, :] = list(reversed(ans_credal.lproba[:, 1]))
-                    resulting_score_prec[label_index, :] = ans_precise.proba[1]
-            ans_credal = Scores(resulting_score_ncc, precision=precision)
-            ans_precise = Scores(resulting_score_prec, precision=precision)
-            answers.append((ans_credal, ans_precise))
-
-        return answers
+                    ans_lower, ans_upper = model_ncc.evaluate_proba(test_dataset=[disc_instance],
+                                                                    ncc_s_param=ncc_s_param,
+                                                                    laplace_smoothing=laplace_smoothing)
+                    lower[i, label_index] = ans_lower[0, 1]
+                    upper[i, label_index] = ans_upper[0, 1]
+                    if with_precise_probabilities:
+                        _, ans_precise = model_ncc.evaluate_proba(test_dataset=[disc_instance],
+                                                                  ncc_s_param=0,
+                                                                  ncc_epsilon=0,
+                                                                  laplace_smoothing=laplace_smoothing)
+                        precise[i, label_index] = ans_precise[0, 1] / ans_precise[0].sum()
+
+        if with_precise_probabilities:
+            return lower, upper, precise
+        return lower, upper
@@ -1,6 +1,9 @@
-import abc, math, time, random
+import abc, math, time, random, copy
 import numpy as np
-from classifip.utils import create_logger
+from scipy.special import expit
+from scipy.sparse import csr_matrix
+from classifip.utils import create_logger, encode_nominal
+from classifip.models.ncc import NCC
 
 
 class MLCNCC(metaclass=abc.ABCMeta):
@@ -15,8 +18,16 @@ class MLCNCC(metaclass=abc.ABCMeta):
         Base classifier NCC based on [#zaffalon2002]_ and on the improvement 
         proposed by [#corani2010]_
 
-        :param feature_count: store counts of couples label/feature
-        :type feature_count: dictionnary with keys label/feature
+        :param feature_count_tensor: store counts of couples label/feature, i.e.
+            n(f_i=v|y_j=c) at index [j, c, i, v] (zero for v >= |F_i|)
+        :type feature_count_tensor: (nb_labels, 2, nb_features, max_values) :class:`~numpy.array`
+        :param label_count_tensor: store counts of couples label/other label, i.e.
+            n(y_k=v|y_j=c) at index [j, c, k, v] (None if not learned)
+        :type label_count_tensor: (nb_labels, 2, nb_labels, max_values) :class:`~numpy.array`
+        :param nb_feature_values: number of modalities |F_i| of each feature
+        :type nb_feature_values: :class:`~numpy.array`
+        :param nb_label_values: number of modalities of each label
+        :type nb_label_values: :class:`~numpy.array`
         :param label_counts: store counts of class labels (to instanciate prior)
         :type label_counts: list
         :param feature_names: store the names of features
@@ -30,13 +41,17 @@ class MLCNCC(metaclass=abc.ABCMeta):
         self.feature_names = []
         self.label_names = []
         self.feature_values = dict()
-        self.feature_count = dict()
+        self.feature_count_tensor = None
+        self.label_count_tensor = None
+        self.nb_feature_values = np.zeros(0, dtype=int)
+        self.nb_label_values = np.zeros(0, dtype=int)
         self.label_counts = []
         self.nb_labels = 0
         self.training_size = 0
         self.marginal_props = None
         self.DEBUG = DEBUG
         self.has_imprecise_marginal = False
+        self.has_log_space = False
         self._logger = create_logger("MLCNCC", DEBUG)
 
     def learn(self,
@@ -45,7 +60,9 @@ class MLCNCC(metaclass=abc.ABCMeta):
         """learn the NCC for each label, mainly storing counts of feature/label pairs
 
         :param learn_data_set: learning instances
-        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`
+        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`,
+            :class:`~classifip.dataset.columnar.ColumnarArffFile` or
+            :class:`~classifip.dataset.sparse.SparseArffFile`
         :param nb_labels: number of labels
         :type nb_labels: integer
         """
@@ -60,46 +77,188 @@ class MLCNCC(metaclass=abc.ABCMeta):
         # computing precise marginal P(Y) count
         self.marginal_props = dict({i: dict() for i in range(self.nb_labels)})
 
+        self._learn_counts(learn_data_set, with_label_counts=True)
+
+    @property
+    def feature_count(self):
+        """Counts of couples label/feature (and label/other label) as lists in a
+        dictionary with keys label + '|in|' + feature (label relevant) and
+        label + '|out|' + feature (label irrelevant), built at each access"""
+        feature_count = dict()
+        if self.feature_count_tensor is None:
+            return feature_count
         for label_index, label_value in enumerate(self.label_names):
-            # recovery count of class 1 and 0
-            label_set_one = learn_data_set.select_col_vals(label_value, ['1'])
-            label_set_zero = learn_data_set.select_col_vals(label_value, ['0'])
-            nb_count_one, nb_count_zero = len(label_set_one.data), len(label_set_zero.data)
-            # if we works with missing label (label=-1: missing), the marginal values changes
-            # (1) Computing label proportions
-            try:
-                self.marginal_props[label_index][0] = nb_count_zero
-                self.marginal_props[label_index][1] = nb_count_one
-                self.marginal_props[label_index]['all'] = nb_count_one + nb_count_zero
-            except ZeroDivisionError:
-                self.marginal_props[label_index][0] = 0
-                self.marginal_props[label_index][1] = 0
-                self.marginal_props[label_index]['all'] = 0
-            # (2) Computing counting label|attributes
-            for feature in self.feature_names:
-                count_vector_one, count_vector_zero = [], []
-                feature_index = learn_data_set.attributes.index(feature)
-                for feature_value in learn_data_set.attribute_data[feature]:
-                    nb_items_one = [row[feature_index] for row in label_set_one.data].count(feature_value)
-                    count_vector_one.append(nb_items_one)
-                    nb_items_zero = [row[feature_index] for row in label_set_zero.data].count(feature_value)
-                    count_vector_zero.append(nb_items_zero)
-                self.feature_count[label_value + '|in|' + feature] = count_vector_one
-                self.feature_count[label_value + '|out|' + feature] = count_vector_zero
-            # (3) Computing counting label|other_labels
-            for label_feature in self.label_names:
-                if label_feature != label_value:
-                    label_feature_index = learn_data_set.attributes.index(label_feature)
-                    count_vector_one, count_vector_zero = [], []
-                    for label_feature_value in learn_data_set.attribute_data[label_feature]:
-                        nb_items_one = [row[label_feature_index] for row in label_set_one.data].count(
-                            label_feature_value)
-                        count_vector_one.append(nb_items_one)
-                        nb_items_zero = [row[label_feature_index] for row in label_set_zero.data].count(
-                            label_feature_value)
-                        count_vector_zero.append(nb_items_zero)
-                    self.feature_count[label_value + '|in|' + label_feature] = count_vector_one
-                    self.feature_count[label_value + '|out|' + label_feature] = count_vector_zero
+            for feature_index, feature in enumerate(self.feature_names):
+                nb_values = self.nb_feature_values[feature_index]
+                counts = self.feature_count_tensor[label_index, :, feature_index, :nb_values]
+                feature_count[label_value + '|in|' + feature] = counts[1].tolist()
+                feature_count[label_value + '|out|' + feature] = counts[0].tolist()
+            if self.label_count_tensor is None:
+                continue
+            for other_index, label_feature in enumerate(self.label_names):
+                if other_index != label_index:
+                    nb_values = self.nb_label_values[other_index]
+                    counts = self.label_count_tensor[label_index, :, other_index, :nb_values]
+                    feature_count[label_value + '|in|' + label_feature] = counts[1].tolist()
+                    feature_count[label_value + '|out|' + label_feature] = counts[0].tolist()
+        return feature_count
+
+    def partial_fit(self, learn_data_set, nb_labels=None):
+        """add the counts of new learning instances to the learned ones (learn
+        the model if it has not been learned yet)
+
+        :param learn_data_set: new learning instances, with the same attributes
+            and modalities as the learned ones
+        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`
+        :param nb_labels: number of labels (only needed if the model has not
+            been learned yet)
+        :type nb_labels: integer
+        """
+        if self.feature_count_tensor is None:
+            self.learn(learn_data_set, nb_labels)
+            return
+        self.merge(self.__learn_batch(learn_data_set))
+
+    def remove(self, learn_data_set):
+        """remove the counts of learning instances from the learned ones (the
+        instances should have been learned before)
+
+        :param learn_data_set: learning instances to forget
+        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        self.__add_counts(self.__learn_batch(learn_data_set), sign=-1)
+
+    def merge(self, other):
+        """add the counts of another model of the same class, learned on other
+        instances with the same attributes (e.g. a shard of the learning set)
+
+        :param other: model learned on other instances
+        :type other: :class:`~classifip.models.mlc.mlcncc.MLCNCC`
+        :returns: the updated model
+        :rtype: :class:`~classifip.models.mlc.mlcncc.MLCNCC`
+        """
+        self.__add_counts(other, sign=1)
+        return self
+
+    def leave_out(self, learn_data_set):
+        """return a copy of the model whose counts exclude some learned instances
+        (e.g. the validation fold of a cross-validation), obtained by
+        subtracting their counts rather than learning again
+
+        :param learn_data_set: learned instances to exclude
+        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`
+        :rtype: :class:`~classifip.models.mlc.mlcncc.MLCNCC`
+        """
+        # counts are replaced (not modified in place) when removing instances
+        model = copy.copy(self)
+        model.remove(learn_data_set)
+        return model
+
+    def __learn_batch(self, learn_data_set):
+        batch = self.__class__()
+        batch.learn(learn_data_set, self.nb_labels)
+        return batch
+
+    def __add_counts(self, other, sign):
+        if list(other.feature_names) != list(self.feature_names) or \
+                list(other.label_names) != list(self.label_names) or \
+                (other.label_count_tensor is None) != (self.label_count_tensor is None) or \
+                any(other.feature_values[name] != self.feature_values[name] for name in self.feature_values):
+            raise Exception('Attributes or modalities differ from the learned ones.')
+        feature_count_tensor = self.feature_count_tensor + sign * other.feature_count_tensor
+        label_count_tensor = None
+        if self.label_count_tensor is not None:
+            label_count_tensor = self.label_count_tensor + sign * other.label_count_tensor
+        marginal_props = {label_index: {key: count + sign * other.marginal_props[label_index][key]
+                                        for key, count in props.items()}
+                          for label_index, props in self.marginal_props.items()}
+        if feature_count_tensor.min(initial=0) < 0 or \
+                (label_count_tensor is not None and label_count_tensor.min(initial=0) < 0) or \
+                any(count < 0 for props in marginal_props.values() for count in props.values()):
+            raise Exception('Removing instances which were not learned (negative counts).')
+        self.feature_count_tensor, self.label_count_tensor = feature_count_tensor, label_count_tensor
+        self.marginal_props = marginal_props
+
+    def _learn_counts(self, learn_data_set, with_label_counts):
+        """store the marginal counts of labels and the counts of feature/label
+        pairs (and label/other label pairs if with_label_counts) in one pass: the
+        data set is encoded once into integer codes, from which all the
+        contingency tables are computed at once (see :meth:`_contingency`)
+
+        :param learn_data_set: learning instances
+        :type learn_data_set: :class:`~classifip.dataset.arff.ArffFile`,
+            :class:`~classifip.dataset.columnar.ColumnarArffFile` or
+            :class:`~classifip.dataset.sparse.SparseArffFile`
+        :param with_label_counts: computing counting label|other_labels
+        :type with_label_counts: boolean
+        """
+        feature_names, label_names = list(self.feature_names), list(self.label_names)
+        self.nb_feature_values = np.array([len(self.feature_values[f]) for f in feature_names], dtype=int)
+        self.nb_label_values = np.array([len(self.feature_values[l]) for l in label_names], dtype=int)
+        max_values = max(self.nb_feature_values.max(initial=0), 1)
+
+        # codes of the modalities of labels and features
+        is_sparse = hasattr(learn_data_set, 'count_features')
+        if hasattr(learn_data_set, 'nominal_codes'):
+            # columnar or sparse data set: codes are converted per column
+            label_value_codes = np.column_stack([learn_data_set.nominal_codes(l) for l in label_names])
+            if not is_sparse:
+                feature_codes = np.column_stack([learn_data_set.nominal_codes(f) for f in feature_names]
+                                                + [np.zeros((len(label_value_codes), 0), dtype=np.intp)])
+        else:
+            codes = encode_nominal(learn_data_set.data, [self.feature_values[a] for a in feature_names + label_names])
+            feature_codes, label_value_codes = codes[:, :len(feature_names)], codes[:, len(feature_names):]
+        # codes 0, 1 and -1 for missing labels (-1), which are not taken into account
+        label_codes = np.empty_like(label_value_codes)
+        for label_index, label_value in enumerate(label_names):
+            conversion = np.array([{'0': 0, '1': 1}.get(value, -1) for value in self.feature_values[label_value]]
+                                  + [-1], dtype=np.intp)
+            label_codes[:, label_index] = conversion[label_value_codes[:, label_index]]
+
+        # (1) Computing label proportions
+        for label_index in range(len(label_names)):
+            nb_count_zero = int((label_codes[:, label_index] == 0).sum())
+            nb_count_one = int((label_codes[:, label_index] == 1).sum())
+            self.marginal_props[label_index][0] = nb_count_zero
+            self.marginal_props[label_index][1] = nb_count_one
+            self.marginal_props[label_index]['all'] = nb_count_one + nb_count_zero
+        # (2) Computing counting label|attributes
+        if is_sparse:
+            # only the stored entries of features are counted
+            self.feature_count_tensor = np.stack([learn_data_set.count_features(label_codes[:, label_index], 2,
+                                                                                max_values)
+                                                  for label_index in range(len(label_names))])
+        else:
+            self.feature_count_tensor = MLCNCC._contingency(label_codes, feature_codes, max_values)
+        # (3) Computing counting label|other_labels
+        self.label_count_tensor = None
+        if with_label_counts:
+            max_label_values = max(self.nb_label_values.max(initial=0), 1)
+            self.label_count_tensor = MLCNCC._contingency(label_codes, label_value_codes, max_label_values)
+
+    @staticmethod
+    def _contingency(label_codes, codes, max_values):
+        """Count the codes of each column in the rows where each label is 0 and
+        where it is 1, as a single product of the one-hot encoding of the codes
+        by the indicators of the labels
+
+        :param label_codes: (n_rows, n_labels) codes 0 or 1 of the labels, -1 if missing
+        :type label_codes: :class:`~numpy.array`
+        :param codes: (n_rows, n_columns) codes, -1 for missing values
+        :type codes: :class:`~numpy.array`
+        :param max_values: size of the last dimension
+        :type max_values: integer
+        :returns: a (n_labels, 2, n_columns, max_values) array of counts
+        :rtype: :class:`~numpy.array`
+        """
+        nb_rows, nb_columns = codes.shape
+        nb_labels = label_codes.shape[1]
+        rows, columns = np.nonzero(codes >= 0)
+        one_hot = csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns * max_values + codes[rows, columns])),
+                             shape=(nb_rows, nb_columns * max_values))
+        indicators = np.concatenate((label_codes == 0, label_codes == 1), axis=1).astype(np.int64)
+        counts = np.asarray(one_hot.T @ indicators).reshape((nb_columns, max_values, 2, nb_labels))
+        return counts.transpose((3, 2, 0, 1)).astype(int)
 
     @abc.abstractmethod
     def evaluate(self, test_dataset,
@@ -275,7 +434,34 @@ class MLCNCC(metaclass=abc.ABCMeta):
             else:
                 raise Exception('Configuration noise label is not implemented yet.')
 
-    def lower_upper_probability(self, feature, feature_value, ncc_s_param, feature_class_name, ncc_epsilon):
+    def _to_space(self, probability):
+        """Express a probability in the space (linear or log) of the current evaluation"""
+        if self.has_log_space:
+            return math.log(probability) if probability > 0 else -math.inf
+        return probability
+
+    def _product(self, cumulative_prob, probability):
+        """Multiply a cumulative product by a probability, i.e. sum its logarithm in log-space"""
+        if self.has_log_space:
+            return cumulative_prob + (math.log(probability) if probability > 0 else -math.inf)
+        return cumulative_prob * probability
+
+    def posterior_probability(self, numerator, complement):
+        """Compute the bound numerator / (numerator + complement) of a conditional probability,
+        both terms being logarithms when the evaluation is performed in log-space (has_log_space),
+        in which case it uses the logistic function to avoid the underflow of the products.
+
+        :param numerator: product of the label value to infer, e.g. P(Y=1) prod P(f_i|Y=1)
+        :type numerator: float
+        :param complement: product of the opposite label value, e.g. P(Y=0) prod P(f_i|Y=0)
+        :type complement: float
+        :rtype: float
+        """
+        if self.has_log_space:
+            return float(expit(numerator - complement))
+        return numerator / (numerator + complement)
+
+    def lower_upper_probability(self, feature, feature_value, ncc_s_param, feature_class_counts, ncc_epsilon):
         """
          ... note:
             zero float division can happen if too many input features
@@ -284,7 +470,8 @@ class MLCNCC(metaclass=abc.ABCMeta):
         :param feature:
         :param feature_value:
         :param ncc_s_param:
-        :param feature_class_name:
+        :param feature_class_counts: counts n(f_i=v|c) of each modality v of the feature
+        :type feature_class_counts: :class:`~numpy.array`
         :param ncc_epsilon:
         :return:
         """
@@ -293,18 +480,16 @@ class MLCNCC(metaclass=abc.ABCMeta):
             return (1 - ncc_epsilon_ip) * probability + ncc_epsilon_ip / len_features
 
         f_val_index = self.feature_values[feature].index(feature_value)  #
-        num_items = float(sum(self.feature_count[feature_class_name]))
-        n_fi_c = self.feature_count[feature_class_name][f_val_index]  # n(f_i|c)
-        len_fi = len(self.feature_count[feature_class_name])  # |F_i|
-        # n(f_i|c)/(n(c)+s), lower probability: t(f_1|c)->0, t(c)->1
-        try:
+        num_items = float(feature_class_counts.sum())
+        n_fi_c = int(feature_class_counts[f_val_index])  # n(f_i|c)
+        len_fi = len(feature_class_counts)  # |F_i|
+        if num_items + ncc_s_param != 0:
+            # n(f_i|c)/(n(c)+s), lower probability: t(f_1|c)->0, t(c)->1
             p_lower = (n_fi_c / (num_items + ncc_s_param))
-        except ZeroDivisionError:
-            p_lower = (n_fi_c + 1) / (num_items + ncc_s_param + len_fi)
-        # (n(f_i|c)+s)/(n(c)+s), upper probability: t(f_1|c)->1, t(c)->1
-        try:
+            # (n(f_i|c)+s)/(n(c)+s), upper probability: t(f_1|c)->1, t(c)->1
             p_upper = ((n_fi_c + ncc_s_param) / (num_items + ncc_s_param))
-        except ZeroDivisionError:
+        else:
+            p_lower = (n_fi_c + 1) / (num_items + ncc_s_param + len_fi)
             p_upper = ((n_fi_c + ncc_s_param + 1) / (num_items + ncc_s_param + len_fi))
         # some regularization with epsilon
         p_lower = __restricting_idm(p_lower, ncc_epsilon, len_fi)
@@ -321,7 +506,12 @@ class MLCNCC(metaclass=abc.ABCMeta):
                            idx_label_to_infer, p_lower, p_upper)
         return p_lower, p_upper
 
-    def lower_upper_probability_feature(self, idx_label_to_infer, item, ncc_s_param, ncc_epsilon):
+    def lower_upper_marginal_bounds(self, idx_label_to_infer, ncc_s_param):
+        """Bounds of the marginal P(Y_j=1) and P(Y_j=0), precise unless has_imprecise_marginal
+
+        :returns: upper and lower P(Y_j=1), upper and lower P(Y_j=0)
+        :rtype: tuple of floats
+        """
         # (n(c)+st(c))/(N+s), with s=0 (i.e. prior probabilities precise, P(Y))
         if self.has_imprecise_marginal:
             l_denominator_0, u_denominator_0 = self.lower_upper_marginal_Y(idx_label_to_infer, 0, ncc_s_param)
@@ -333,21 +523,44 @@ class MLCNCC(metaclass=abc.ABCMeta):
             l_denominator_0 = 1 - prop_marginal_label_1  # \underline P(Yj=0)
             u_numerator_1 = prop_marginal_label_1  # \overline P(Yj=1)
             l_numerator_1 = prop_marginal_label_1  # \underline P(Yj=1)
+        return u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0
+
+    @staticmethod
+    def lower_upper_count_tables(counts, nb_values, ncc_s_param, ncc_epsilon):
+        """Bounds of :meth:`lower_upper_probability` for all the counts of a table at
+        once, e.g. ``feature_count_tensor[j]`` for all features and values (see
+        :meth:`~classifip.models.ncc.NCC.lower_upper_count_tables`).
+
+        :param counts: counts n(f_i=v|c) of modality v at index [..., i, v]
+        :type counts: :class:`~numpy.array`
+        :param nb_values: number of modalities |F_i| of each feature i (last
+            dimension of counts possibly larger)
+        :type nb_values: :class:`~numpy.array`
+        :returns: lower and upper probabilities, of the same shape as counts
+        :rtype: tuple of :class:`~numpy.array`
+        """
+        return NCC.lower_upper_count_tables(counts, nb_values, ncc_s_param, ncc_epsilon)
+
+    def lower_upper_probability_feature(self, idx_label_to_infer, item, ncc_s_param, ncc_epsilon):
+        u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
+            self.lower_upper_marginal_bounds(idx_label_to_infer, ncc_s_param)
+        u_numerator_1, l_numerator_1 = self._to_space(u_numerator_1), self._to_space(l_numerator_1)
+        u_denominator_0, l_denominator_0 = self._to_space(u_denominator_0), self._to_space(l_denominator_0)
 
         for f_index, feature in enumerate(self.feature_names):
             # computation of denominator (label=1)
-            feature_class_name = self.label_names[idx_label_to_infer] + '|in|' + feature  # (f_i, c=1)
+            feature_counts = self.feature_count_tensor[idx_label_to_infer, :, f_index,
+                                                       :self.nb_feature_values[f_index]]
             p_lower, p_upper = self.lower_upper_probability(feature, item[f_index], ncc_s_param,
-                                                            feature_class_name, ncc_epsilon)
-            l_numerator_1 = l_numerator_1 * p_lower  # prod \underline{P}(f_i|c=1)
-            u_numerator_1 = u_numerator_1 * p_upper  # prod \overline{P}(f_i|c=1)
+                                                            feature_counts[1], ncc_epsilon)  # (f_i, c=1)
+            l_numerator_1 = self._product(l_numerator_1, p_lower)  # prod \underline{P}(f_i|c=1)
+            u_numerator_1 = self._product(u_numerator_1, p_upper)  # prod \overline{P}(f_i|c=1)
 
             # computation of numerator (label=0)
-            feature_class_name = self.label_names[idx_label_to_infer] + '|out|' + feature
             p_lower, p_upper = self.lower_upper_probability(feature, item[f_index], ncc_s_param,
-                                                            feature_class_name, ncc_epsilon)
-            l_denominator_0 = l_denominator_0 * p_lower  # prod \underline{P}(f_i|c=0)
-            u_denominator_0 = u_denominator_0 * p_upper  # prod \overline{P}(f_i|c=0)
+                                                            feature_counts[0], ncc_epsilon)  # (f_i, c=0)
+            l_denominator_0 = self._product(l_denominator_0, p_lower)  # prod \underline{P}(f_i|c=0)
+            u_denominator_0 = self._product(u_denominator_0, p_upper)  # prod \overline{P}(f_i|c=0)
 
         return u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0
 
@@ -365,7 +578,7 @@ class MLCNCC(metaclass=abc.ABCMeta):
         :param idx_chain_predict_labels:
         :return:
         """
-        u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = 1, 1, 1, 1
+        u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = [self._to_space(1)] * 4
         if idx_chain_predict_labels is None:
             dependant_labels = enumerate(self.label_names[:len(augmented_labels)])
         else:
@@ -377,18 +590,17 @@ class MLCNCC(metaclass=abc.ABCMeta):
         for l_index, label in dependant_labels:
             label_predicted_value = str(augmented_labels[l_index])
             # computation of denominator (label=1)
-            label_class_name = self.label_names[idx_label_to_infer] + '|in|' + label  # (l_i=1, c=1)
+            label_counts = self.label_count_tensor[idx_label_to_infer, :, l_index, :self.nb_label_values[l_index]]
             p_lower, p_upper = self.lower_upper_probability(label, label_predicted_value, ncc_s_param,
-                                                            label_class_name, ncc_epsilon)
-            l_numerator_1 = l_numerator_1 * p_lower  # prod \underline{P}(f_i|c=1)
-            u_numerator_1 = u_numerator_1 * p_upper  # prod \overline{P}(f_i|c=1)
+                                                            label_counts[1], ncc_epsilon)  # (l_i=1, c=1)
+            l_numerator_1 = self._product(l_numerator_1, p_lower)  # prod \underline{P}(f_i|c=1)
+            u_numerator_1 = self._product(u_numerator_1, p_upper)  # prod \overline{P}(f_i|c=1)
 
             # computation of numerator (label=0)
-            label_class_name = self.label_names[idx_label_to_infer] + '|out|' + label  # (l_i=0, c=0)
             p_lower, p_upper = self.lower_upper_probability(label, label_predicted_value, ncc_s_param,
-                                                            label_class_name, ncc_epsilon)
-            l_denominator_0 = l_denominator_0 * p_lower  # prod \underline{P}(f_i|c=0)
-            u_denominator_0 = u_denominator_0 * p_upper  # prod \overline{P}(f_i|c=0)
+                                                            label_counts[0], ncc_epsilon)  # (l_i=0, c=0)
+            l_denominator_0 = self._product(l_denominator_0, p_lower)  # prod \underline{P}(f_i|c=0)
+            u_denominator_0 = self._product(u_denominator_0, p_upper)  # prod \overline{P}(f_i|c=0)
         return u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0
 
     def lower_upper_cond_probability(self,
@@ -397,7 +609,9 @@ class MLCNCC(metaclass=abc.ABCMeta):
                                      augmented_labels,
                                      ncc_s_param,
                                      ncc_epsilon,
-                                     idx_chain_predict_labels=None):
+                                     idx_chain_predict_labels=None,
+                                     feature_bounds=None,
+                                     label_bounds=None):
         """
         .. note::
             TO DO: To avoid probability zero, we use the Laplace Smoothing
@@ -408,24 +622,36 @@ class MLCNCC(metaclass=abc.ABCMeta):
         :param ncc_s_param:
         :param ncc_epsilon:
         :param idx_chain_predict_labels:
+        :param feature_bounds: bounds of the feature part already computed for this instance and
+            label by :meth:`lower_upper_probability_feature` (None to compute them)
+        :param label_bounds: bounds of the label part already computed for this instance and
+            label by :meth:`lower_upper_probability_labels` (None to compute them)
         :return:
         """
 
-        u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = \
-            self.lower_upper_probability_feature(idx_label_to_infer,
-                                                 instance,
-                                                 ncc_s_param,
-                                                 ncc_epsilon)
-
-        u_numerator_label_1, l_numerator_label_1, u_denominator_label_0, l_denominator_label_0 = \
-            self.lower_upper_probability_labels(idx_label_to_infer,
-                                                augmented_labels,
-                                                ncc_s_param,
-                                                ncc_epsilon,
-                                                idx_chain_predict_labels)
-
-        u_numerator_1 = u_numerator_1 * u_numerator_label_1
-        l_numerator_1 = l_numerator_1 * l_numerator_label_1
-        u_denominator_0 = u_denominator_0 * u_denominator_label_0
-        l_denominator_0 = l_denominator_0 * l_denominator_label_0
+        if feature_bounds is None:
+            feature_bounds = self.lower_upper_probability_feature(idx_label_to_infer,
+                                                                  instance,
+                                                                  ncc_s_param,
+                                                                  ncc_epsilon)
+        u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0 = feature_bounds
+
+        if label_bounds is None:
+            label_bounds = self.lower_upper_probability_labels(idx_label_to_infer,
+                                                               augmented_labels,
+                                                               ncc_s_param,
+                                                               ncc_epsilon,
+                                                               idx_chain_predict_labels)
+        u_numerator_label_1, l_numerator_label_1, u_denominator_label_0, l_denominator_label_0 = label_bounds
+
+        if self.has_log_space:
+            u_numerator_1 = u_numerator_1 + u_numerator_label_1
+            l_numerator_1 = l_numerator_1 + l_numerator_label_1
+            u_denominator_0 = u_denominator_0 + u_denominator_label_0
+            l_denominator_0 = l_denominator_0 + l_denominator_label_0
+        else:
+            u_numerator_1 = u_numerator_1 * u_numerator_label_1
+            l_numerator_1 = l_numerator_1 * l_numerator_label_1
+            u_denominator_0 = u_denominator_0 * u_denominator_label_0
+            l_denominator_0 = l_denominator_0 * l_denominator_label_0
         return u_numerator_1, l_numerator_1, u_denominator_0, l_denominator_0
@@ -1,9 +1,9 @@
 from classifip.dataset.arff import ArffFile
 from classifip.representations.voting import Scores
 from classifip.models.mlc.mlcncc import MLCNCC
-from classifip.models.ncc import NCC
 import numpy as np
-from math import exp
+from scipy.special import expit
+from classifip.utils import encode_nominal
 
 
 class NCCBR(MLCNCC):
@@ -35,32 +35,9 @@ class NCCBR(MLCNCC):
         self.feature_values = learn_data_set.attribute_data.copy()
         self.marginal_props = dict({i: dict() for i in range(self.nb_labels)})
 
-        for label_index, label_value in enumerate(self.label_names):
-            label_set_one = learn_data_set.select_col_vals(label_value, ['1'])
-            label_set_zero = learn_data_set.select_col_vals(label_value, ['0'])
-            nb_count_one, nb_count_zero = len(label_set_one.data), len(label_set_zero.data)
-            # The missing label is identified in the data set when the value of label is -1,
-            # so it does not take into account.
-            try:
-                self.marginal_props[label_index][0] = nb_count_zero
-                self.marginal_props[label_index][1] = nb_count_one
-                self.marginal_props[label_index]['all'] = nb_count_one + nb_count_zero
-            except ZeroDivisionError:
-                self.marginal_props[label_index][0] = 0
-                self.marginal_props[label_index][1] = 0
-                self.marginal_props[label_index]['all'] = 0
-
-            for feature in self.feature_names:
-                count_vector_one = []
-                count_vector_zero = []
-                feature_index = learn_data_set.attributes.index(feature)
-                for feature_value in learn_data_set.attribute_data[feature]:
-                    nb_items_one = [row[feature_index] for row in label_set_one.data].count(feature_value)
-                    count_vector_one.append(nb_items_one)
-                    nb_items_zero = [row[feature_index] for row in label_set_zero.data].count(feature_value)
-                    count_vector_zero.append(nb_items_zero)
-                self.feature_count[label_value + '|in|' + feature] = count_vector_one
-                self.feature_count[label_value + '|out|' + feature] = count_vector_zero
+        # The missing label is identified in the data set when the value of label is -1,
+        # so it does not take into account.
+        self._learn_counts(learn_data_set, with_label_counts=False)
 
     def lower_upper_marginal(self,
                              idx_label_to_infer,
@@ -68,7 +45,7 @@ class NCCBR(MLCNCC):
                              label_dimension,
                              ncc_s_param):
         """
-            ToDo: Code refactoring of NCC.__computing_laplace_smoothing method with this one.
+            ToDo: Code refactoring of NCC.lower_upper_count_tables method with this one.
         :param marginal_props:
         :param idx_label_to_infer:
         :param value_label_to_infer:
@@ -105,7 +82,8 @@ class NCCBR(MLCNCC):
                                           label_dimension)
         return p_lower, p_upper
 
-    def evaluate(self, test_dataset, ncc_epsilon=0.001, ncc_s_param=2.0, precision=None, **kargs):
+    def evaluate(self, test_dataset, ncc_epsilon=0.001, ncc_s_param=2.0, precision=None, with_log_space=False,
+                 **kargs):
         """evaluate the instances and return a list of probability intervals.
         
         :param test_dataset: list of input features of instances to evaluate
@@ -116,6 +94,8 @@ class NCCBR(MLCNCC):
         :param ncc_s_param: s parameter used in the IDM learning (settle imprecision level)
         :type ncc_s_param: float
         :param precision Number of digits of precision for floating, if necessary
+        :param with_log_space: accumulate products of bounds as sums of logarithms (avoid underflow)
+        :type with_log_space: boolean
         :returns: for each value of ncc_s_param, a set of scores for each label
         :rtype: lists of :class:`~classifip.representations.voting.Scores`
  
@@ -138,52 +118,116 @@ class NCCBR(MLCNCC):
             
         """
 
+        scores = self.evaluate_scores(test_dataset, ncc_epsilon, ncc_s_param, with_log_space)
         answers = []
-        for item in test_dataset:
-            # initializing scores
-            resulting_score = np.zeros((self.nb_labels, 2))
-            # computes product of lower/upper prob for each class
-            for j in range(self.nb_labels):
-                lower_cond_prob_0, upper_cond_prob_0 = self.lower_upper_marginal(idx_label_to_infer=j,
-                                                                                 value_label_to_infer=0,
-                                                                                 label_dimension=self.nb_labels,
-                                                                                 ncc_s_param=ncc_s_param)
-                lower_cond_prob_1, upper_cond_prob_1 = self.lower_upper_marginal(idx_label_to_infer=j,
-                                                                                 value_label_to_infer=1,
-                                                                                 label_dimension=self.nb_labels,
-                                                                                 ncc_s_param=ncc_s_param)
-
-                for f_index, feature in enumerate(self.feature_names):
-                    # computation of denominator (label=1)
-                    f_val_index = self.feature_values[feature].index(item[f_index])
-                    count_string = self.label_names[j] + '|in|' + feature
-                    all_count_of_feature_by_clazz = float(sum(self.feature_count[count_string]))
-                    feature_value_count = self.feature_count[count_string][f_val_index]
-                    feature_dimension = len(self.feature_count[count_string])
-                    lower, upper = NCC._computing_lower_and_upper(feature_value_count,
-                                                                  all_count_of_feature_by_clazz,
-                                                                  feature_dimension,
-                                                                  ncc_s_param,
-                                                                  laplace_smoothing=False)
-                    lower_cond_prob_1 = lower_cond_prob_1 * ((1 - ncc_epsilon) * lower + ncc_epsilon / feature_dimension)
-                    upper_cond_prob_1 = upper_cond_prob_1 * ((1 - ncc_epsilon) * upper + ncc_epsilon / feature_dimension)
-                    # computation of numerator (label=0)
-                    count_string = self.label_names[j] + '|out|' + feature
-                    all_count_of_feature_by_clazz = float(sum(self.feature_count[count_string]))
-                    feature_value_count = self.feature_count[count_string][f_val_index]
-                    feature_dimension = len(self.feature_count[count_string])
-                    lower, upper = NCC._computing_lower_and_upper(feature_value_count,
-                                                                  all_count_of_feature_by_clazz,
-                                                                  feature_dimension,
-                                                                  ncc_s_param,
-                                                                  laplace_smoothing=False)
-                    upper_cond_prob_0 = upper_cond_prob_0 * ((1 - ncc_epsilon) * upper + ncc_epsilon / feature_dimension)
-                    lower_cond_prob_0 = lower_cond_prob_0 * ((1 - ncc_epsilon) * lower + ncc_epsilon / feature_dimension)
-
-                resulting_score[j, 1] = upper_cond_prob_1 / (upper_cond_prob_1 + lower_cond_prob_0)
-                resulting_score[j, 0] = lower_cond_prob_1 / (lower_cond_prob_1 + upper_cond_prob_0)
+        for resulting_score in scores:
             # ToDo: change representation to IntervalsProbability
             result = Scores(resulting_score, precision=precision)
             answers.append(result)
 
         return answers
+
+    def evaluate_proba(self, test_dataset, ncc_epsilon=0.001, ncc_s_param=2.0, with_log_space=False):
+        """evaluate the instances and return the bounds of the probability of each
+        label being relevant as two dense arrays, without building one
+        representation object per instance.
+
+        :param test_dataset: list of input features of instances to evaluate
+        :type test_dataset: list
+        :param ncc_epsilon: espilon issued from [#corani2010]_ (should be > 0)
+        :type ncc_epsilon: float
+        :param ncc_s_param: s parameter used in the IDM learning (settle imprecision level)
+        :type ncc_s_param: float
+        :param with_log_space: accumulate products of bounds as sums of logarithms (avoid underflow)
+        :type with_log_space: boolean
+        :returns: lower and upper probabilities P(Y_j=1) of each label
+        :rtype: tuple of two (n_samples, n_labels) :class:`~numpy.array`
+        """
+        scores = self.evaluate_scores(test_dataset, ncc_epsilon, ncc_s_param, with_log_space)
+        return scores[:, :, 0], scores[:, :, 1]
+
+    def evaluate_scores(self, test_dataset, ncc_epsilon=0.001, ncc_s_param=2.0, with_log_space=False):
+        """evaluate the instances and return the scores of all instances and labels
+        as a single tensor: the feature values of all instances are encoded once,
+        and the bounds of each label are computed for all instances at once from
+        tables of bounds of the learned counts.
+
+        :param test_dataset: list of input features of instances to evaluate
+        :type test_dataset: list
+        :param ncc_epsilon: espilon issued from [#corani2010]_ (should be > 0)
+        :type ncc_epsilon: float
+        :param ncc_s_param: s parameter used in the IDM learning (settle imprecision level)
+        :type ncc_s_param: float
+        :param with_log_space: accumulate products of bounds as sums of logarithms (avoid underflow)
+        :type with_log_space: boolean
+        :returns: lower (index 0) and upper (index 1) probabilities P(Y_j=1) of each label
+        :rtype: (n_samples, n_labels, 2) :class:`~numpy.array`
+        """
+        return self.__scores(self.__encode_features(test_dataset), ncc_epsilon, ncc_s_param, with_log_space)
+
+    def evaluate_proba_grid(self, test_dataset, ncc_s_params, ncc_epsilons=(0.001,), with_log_space=False):
+        """evaluate the instances for several values of the s parameter and of
+        epsilon, the feature values of the test instances being encoded only once.
+
+        :param test_dataset: list of input features of instances to evaluate
+        :type test_dataset: list
+        :param ncc_s_params: values of the s parameter used in the IDM learning
+        :type ncc_s_params: list of floats
+        :param ncc_epsilons: values of espilon issued from [#corani2010]_
+        :type ncc_epsilons: list of floats
+        :param with_log_space: accumulate products of bounds as sums of logarithms (avoid underflow)
+        :type with_log_space: boolean
+        :returns: lower and upper probabilities P(Y_j=1) of each label, for each s and epsilon
+            (i.e. the output of :meth:`evaluate_proba` for ncc_s_params[i] and
+            ncc_epsilons[k] at index [i, k])
+        :rtype: tuple of two (n_s, n_epsilons, n_samples, n_labels) :class:`~numpy.array`
+        """
+        codes = self.__encode_features(test_dataset)
+        shape = (len(ncc_s_params), len(ncc_epsilons), len(test_dataset), self.nb_labels)
+        lower_post_prob, upper_post_prob = np.empty(shape), np.empty(shape)
+        for i, ncc_s_param in enumerate(ncc_s_params):
+            for k, ncc_epsilon in enumerate(ncc_epsilons):
+                scores = self.__scores(codes, ncc_epsilon, ncc_s_param, with_log_space)
+                lower_post_prob[i, k], upper_post_prob[i, k] = scores[:, :, 0], scores[:, :, 1]
+        return lower_post_prob, upper_post_prob
+
+    def __encode_features(self, test_dataset):
+        """encode the feature values of the test instances as a (n_samples, n_features) array of codes"""
+        codes = encode_nominal(test_dataset, [self.feature_values[f] for f in self.feature_names],
+                               len(self.feature_names))
+        if np.any(codes < 0):
+            raise ValueError('Some feature values of test instances were not seen in the learning step.')
+        return codes
+
+    def __scores(self, codes, ncc_epsilon, ncc_s_param, with_log_space):
+        """compute the (n_samples, n_labels, 2) scores of :meth:`evaluate_scores` from the codes
+        of the feature values of the test instances"""
+        idx_features = np.arange(len(self.feature_names))
+        scores = np.zeros((len(codes), self.nb_labels, 2))
+        for j in range(self.nb_labels):
+            lower_cond_prob_0, upper_cond_prob_0 = self.lower_upper_marginal(idx_label_to_infer=j,
+                                                                             value_label_to_infer=0,
+                                                                             label_dimension=self.nb_labels,
+                                                                             ncc_s_param=ncc_s_param)
+            lower_cond_prob_1, upper_cond_prob_1 = self.lower_upper_marginal(idx_label_to_infer=j,
+                                                                             value_label_to_infer=1,
+                                                                             label_dimension=self.nb_labels,
+                                                                             ncc_s_param=ncc_s_param)
+            lower_marginal = np.array([lower_cond_prob_0, lower_cond_prob_1])[:, None]
+            upper_marginal = np.array([upper_cond_prob_0, upper_cond_prob_1])[:, None]
+            # (2, n_samples, n_features) bounds of P(f_i|Y_j=0) (index 0) and P(f_i|Y_j=1) (index 1)
+            lower, upper = self.lower_upper_count_tables(self.feature_count_tensor[j], self.nb_feature_values,
+                                                         ncc_s_param, ncc_epsilon)
+            lower, upper = lower[:, idx_features, codes], upper[:, idx_features, codes]
+            if with_log_space:
+                with np.errstate(divide='ignore'):
+                    lower_cond_prob = np.log(lower_marginal) + np.log(lower).sum(axis=2)
+                    upper_cond_prob = np.log(upper_marginal) + np.log(upper).sum(axis=2)
+                scores[:, j, 0] = expit(lower_cond_prob[1] - upper_cond_prob[0])
+                scores[:, j, 1] = expit(upper_cond_prob[1] - lower_cond_prob[0])
+            else:
+                lower_cond_prob = lower_marginal * lower.prod(axis=2)
+                upper_cond_prob = upper_marginal * upper.prod(axis=2)
+                scores[:, j, 0] = lower_cond_prob[1] / (lower_cond_prob[1] + upper_cond_prob[0])
+                scores[:, j, 1] = upper_cond_prob[1] / (upper_cond_prob[1] + lower_cond_prob[0])
+        return scores
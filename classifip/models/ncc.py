@@ -2,8 +2,11 @@ from ..dataset.arff import ArffFile
 from ..representations.intervalsProbability import IntervalsProbability
 from ..representations.probadis import ProbaDis
 from ..representations.voting import Scores
+from ..utils import encode_nominal
 import numpy as np
+import copy
 from math import exp
+from scipy.special import expit, logsumexp
 
 
 class NCC(object):
@@ -22,6 +25,11 @@ class NCC(object):
     :type feature_names: list
     :param feature_values: store modalities of features, including the classes
     :type feature_values: dictionnary associating each feature name to a list
+    :param count_tensor: store counts of class/feature/value triplets, values
+        being indexed as in feature_values (padded with zero counts)
+    :type count_tensor: :class:`~numpy.array` of shape (n_classes, n_features, max_values)
+    :param nb_values: number of modalities of each feature
+    :type nb_values: :class:`~numpy.array`
     
     .. note::
     
@@ -42,27 +50,124 @@ class NCC(object):
         self.feature_values = dict()
         self.feature_count = dict()
         self.label_count = []
+        self.count_tensor = None
+        self.nb_values = None
 
     def learn(self, learndataset):
         """learn the NCC, mainly storing counts of feature/class pairs
-        
+
+        Features are encoded once as integer codes and counts are stored in
+        a dense (n_classes, n_features, max_values) array, the dictionary
+        feature_count being kept as a view for existing callers.
+
         :param learndataset: learning instances
-        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`,
+            :class:`~classifip.dataset.columnar.ColumnarArffFile` or
+            :class:`~classifip.dataset.sparse.SparseArffFile`
         """
         self.__init__()
         # Initializing the counts
         self.feature_names = learndataset.attributes[:]
         self.feature_values = learndataset.attribute_data.copy()
-        for class_value in learndataset.attribute_data['class']:
-            subset = [row for row in learndataset.data if row[-1] == class_value]
-            self.label_count.append(len(subset))
-            for feature in learndataset.attributes[:-1]:
-                count_vector = []
-                feature_index = learndataset.attributes.index(feature)
-                for feature_value in learndataset.attribute_data[feature]:
-                    nb_items = [row[feature_index] for row in subset].count(feature_value)
-                    count_vector.append(nb_items)
-                self.feature_count[class_value + '|' + feature] = count_vector
+        features = self.feature_names[:-1]
+        self.nb_values = np.array([len(self.feature_values[feature]) for feature in features], dtype=int)
+        label_count, self.count_tensor = self.__count(learndataset)
+        self.label_count = label_count.tolist()
+        self.__set_feature_count()
+
+    def partial_fit(self, learndataset):
+        """add the counts of new learning instances to the learned ones (learn
+        the NCC if it has not been learned yet)
+
+        :param learndataset: new learning instances, with the same attributes
+            and modalities as the learned ones
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        if self.count_tensor is None:
+            self.learn(learndataset)
+            return
+        self.__check_attributes(learndataset.attributes, learndataset.attribute_data)
+        label_count, count_tensor = self.__count(learndataset)
+        self.__add_counts(label_count, count_tensor)
+
+    def remove(self, learndataset):
+        """remove the counts of learning instances from the learned ones (the
+        instances should have been learned before)
+
+        :param learndataset: learning instances to forget
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        self.__check_attributes(learndataset.attributes, learndataset.attribute_data)
+        label_count, count_tensor = self.__count(learndataset)
+        self.__add_counts(-label_count, -count_tensor)
+
+    def merge(self, other):
+        """add the counts of another NCC, learned on other instances with the same
+        attributes (e.g. a shard of the learning set)
+
+        :param other: NCC learned on other instances
+        :type other: :class:`~classifip.models.ncc.NCC`
+        :returns: the updated NCC
+        :rtype: :class:`~classifip.models.ncc.NCC`
+        """
+        self.__check_attributes(other.feature_names, other.feature_values)
+        self.__add_counts(np.array(other.label_count), other.count_tensor)
+        return self
+
+    def __check_attributes(self, attributes, attribute_data):
+        if list(attributes) != self.feature_names or \
+                any(attribute_data[name] != self.feature_values[name] for name in self.feature_names):
+            raise Exception('Attributes or modalities differ from the learned ones.')
+
+    def __add_counts(self, label_count, count_tensor):
+        label_count = np.array(self.label_count) + label_count
+        count_tensor = self.count_tensor + count_tensor
+        if label_count.min(initial=0) < 0 or count_tensor.min(initial=0) < 0:
+            raise Exception('Removing instances which were not learned (negative counts).')
+        self.label_count = label_count.tolist()
+        self.count_tensor = count_tensor
+        self.__set_feature_count()
+
+    def __count(self, learndataset):
+        """count classes and class/feature/value triplets of learning instances
+
+        :returns: counts of classes and (n_classes, n_features, max_values) counts
+        :rtype: tuple of :class:`~numpy.array`
+        """
+        features = self.feature_names[:-1]
+        classes = self.feature_values['class']
+        max_values = max(self.nb_values.max(initial=0), 1)
+
+        if hasattr(learndataset, 'count_features'):
+            # sparse data set: only the stored entries of features are counted
+            class_codes = learndataset.nominal_codes(self.feature_names[-1], classes)
+            label_count = np.bincount(class_codes[class_codes >= 0], minlength=len(classes))
+            return label_count, learndataset.count_features(class_codes, len(classes), max_values)
+        if hasattr(learndataset, 'nominal_codes'):
+            # columnar data set: codes are converted per column without building rows
+            class_codes = learndataset.nominal_codes(self.feature_names[-1], classes)
+            feature_codes = np.empty((len(class_codes), len(features)), dtype=np.intp)
+            for f_index, feature in enumerate(features):
+                feature_codes[:, f_index] = learndataset.nominal_codes(feature, self.feature_values[feature])
+        else:
+            class_codes = encode_nominal([row[-1:] for row in learndataset.data], [classes])[:, 0]
+            feature_codes = encode_nominal(learndataset.data, [self.feature_values[f] for f in features],
+                                           len(features))
+        label_count = np.bincount(class_codes[class_codes >= 0], minlength=len(classes))
+
+        # flat index of each (class, feature, value) cell, ignoring unknown values
+        nb_features = len(features)
+        flat_index = (class_codes[:, None] * nb_features + np.arange(nb_features)) * max_values + feature_codes
+        flat_index = flat_index[(class_codes[:, None] >= 0) & (feature_codes >= 0)]
+        count_tensor = np.bincount(flat_index, minlength=len(classes) * nb_features * max_values) \
+            .reshape((len(classes), nb_features, max_values))
+        return label_count, count_tensor
+
+    def __set_feature_count(self):
+        for c_index, class_value in enumerate(self.feature_values['class']):
+            for f_index, feature in enumerate(self.feature_names[:-1]):
+                count_vector = self.count_tensor[c_index, f_index, :self.nb_values[f_index]]
+                self.feature_count[class_value + '|' + feature] = count_vector.tolist()
 
     def evaluate(self,
                  test_dataset,
@@ -70,7 +175,9 @@ class NCC(object):
                  ncc_s_param=2,
                  maxi=False,
                  precision=None,
-                 laplace_smoothing=False):
+                 laplace_smoothing=False,
+                 with_log_space=False,
+                 batch_size=10000):
         """evaluate the instances and return a list of probability intervals.
         
         :param test_dataset: list of input features of instances to evaluate
@@ -85,6 +192,11 @@ class NCC(object):
         :type maxi: boolean
         :param precision: minimum decimal numbers to round the probability
         :param laplace_smoothing: (True) to use regularized Laplace smoothing or not (False)
+        :param with_log_space: (True) to accumulate the products of bounds as sums of logarithms,
+            avoiding underflow with a large number of features
+        :type with_log_space: boolean
+        :param batch_size: number of instances whose bounds are computed at once
+        :type batch_size: integer
         :returns: for each value of ncc_s_param, a set of probability intervals and or of scores
         :rtype: lists of :class:`~classifip.representations.intervalsProbability.IntervalsProbability` or
             lists of :class:`~classifip.representations.voting.Scores`
@@ -112,152 +224,267 @@ class NCC(object):
                 lower(P)(X=x|Y=a) = prod_i lower(P)(X_i = x_i | Y=a)
                 upper(P)(X=x|Y=a) = prod_i upper(P)(X_i = x_i | Y=a)
         """
+        lower_cond_prob, upper_cond_prob = self._lower_upper_cond_probability(test_dataset,
+                                                                              ncc_epsilon,
+                                                                              ncc_s_param,
+                                                                              laplace_smoothing,
+                                                                              with_log_space,
+                                                                              batch_size)
+        nb_classes = len(self.feature_values['class'])
+        lower_post_prob, upper_post_prob = NCC._lower_upper_post_probability(lower_cond_prob,
+                                                                             upper_cond_prob,
+                                                                             with_log_space)
+        # check for maximality: clazz dominated if lower(P)(X=x|Y=y) > upper(P)(X=x|Y=clazz) for y<>clazz
+        dominance = lower_cond_prob[:, :, None] > upper_cond_prob[:, None, :]
+        dominance[:, np.arange(nb_classes), np.arange(nb_classes)] = False
+        is_dominated = dominance.any(axis=1)
 
-        # computing class proportions with smooth laplace regularization
-        class_ct = [float(n) for n in self.label_count]
-        class_prop = np.ones(len(class_ct))
-        for i, n in enumerate(class_ct):
-            try:
-                class_prop[i] = n / sum(class_ct)
-            except ZeroDivisionError:
-                class_prop[i] = (n + 1) / (sum(class_ct) + len(class_ct))
         answers = []
-        for item in test_dataset:
-
-            # initializing probability interval argument
-            resulting_int = np.zeros((2, len(self.feature_values['class'])))
-            resulting_sc = np.zeros((len(self.feature_values['class']), 2))
-            resulting_sc[:, 0] = 0.9
-            resulting_sc[:, 1] = 1.0
-
-            # computes product of lower/upper prob for each class
-            cl_index = 0
-            for clazz in self.feature_values['class']:
-                upper_sum_cond_prob = 0  # sum_{y<>clazz} P(Y=y) * upper(P)(X=x|Y=y)
-                lower_sum_cond_prob = 0  # sum_{y<>clazz} P(Y=y) * lower(P)(X=x|Y=y)
-                upper_cond_prob = class_prop[cl_index]  # upper(P)(X=x|Y=clazz)
-                lower_cond_prob = class_prop[cl_index]  # lower(P)(X=x|Y=clazz)
-                # computing:  P(Y=clazz) * lower(P)(X=x|Y=clazz) or P(Y=a) * upper(P)(X=x|Y=clazz)
-                for f_index, feature in enumerate(self.feature_names):
-                    if feature != 'class':
-                        f_val_index = self.feature_values[feature].index(item[f_index])
-                        count_string = clazz + '|' + feature
-                        all_count_of_feature_by_clazz = float(sum(self.feature_count[count_string]))
-                        feature_value_count = self.feature_count[count_string][f_val_index]
-                        feature_dimension = len(self.feature_count[count_string])
-                        lower, upper = NCC._computing_lower_and_upper(feature_value_count,
-                                                                       all_count_of_feature_by_clazz,
-                                                                       feature_dimension,
-                                                                       ncc_s_param,
-                                                                       laplace_smoothing)
-
-                        lower_cond_prob = lower_cond_prob * ((1 - ncc_epsilon) * lower + ncc_epsilon / feature_dimension)
-                        upper_cond_prob = upper_cond_prob * ((1 - ncc_epsilon) * upper + ncc_epsilon / feature_dimension)
-
-                # computing: sum_{y<>clazz} P(Y=y) * upper(P)(X=x|Y=y) (or lower(P)(X=x|Y=y))
-                for other_cl in set(self.feature_values['class']) - set([clazz]):
-                    # sum_{y<>clazz} P(Y=y) * upper(P)(X=x|Y=y)
-                    upper_others_cond_prob = class_prop[self.feature_values['class'].index(other_cl)]
-                    # sum_{y<>clazz} P(Y=y) * lower(P)(X=x|Y=y)
-                    lower_others_cond_prob = class_prop[self.feature_values['class'].index(other_cl)]
-                    for feature in self.feature_names:
-                        if feature != 'class':
-                            f_index = self.feature_names.index(feature)
-                            f_val_index = self.feature_values[feature].index(item[f_index])
-                            count_string = other_cl + '|' + feature
-                            all_count_of_feature_by_clazz = float(sum(self.feature_count[count_string]))
-                            feature_value_count = self.feature_count[count_string][f_val_index]
-                            feature_dimension = len(self.feature_count[count_string])
-                            lower, upper = NCC._computing_lower_and_upper(feature_value_count,
-                                                                           all_count_of_feature_by_clazz,
-                                                                           feature_dimension,
-                                                                           ncc_s_param,
-                                                                           laplace_smoothing)
-                            restricting_idm = lambda bound: (1 - ncc_epsilon) * bound + ncc_epsilon / feature_dimension
-                            lower_others_cond_prob = lower_others_cond_prob * restricting_idm(lower)
-                            upper_others_cond_prob = upper_others_cond_prob * restricting_idm(upper)
-
-                    # check for maximality
-                    if lower_cond_prob - upper_others_cond_prob > 0.:
-                        resulting_sc[self.feature_values['class'].index(other_cl), 0] = 0.
-                        resulting_sc[self.feature_values['class'].index(other_cl), 1] = 0.1
-                    # update numerator/denominator for probability interval computation
-                    upper_sum_cond_prob += upper_others_cond_prob
-                    lower_sum_cond_prob += lower_others_cond_prob
-                    # computing: upper(P)(Y=clazz|X=x) and lower(P)(Y=clazz|X=x)
-                    resulting_int[0, cl_index] = upper_cond_prob / (upper_cond_prob + lower_sum_cond_prob)
-                    resulting_int[1, cl_index] = lower_cond_prob / (lower_cond_prob + upper_sum_cond_prob)
-                cl_index += 1
+        for i in range(len(lower_cond_prob)):
             if not maxi and ncc_s_param != 0:
+                resulting_int = np.zeros((2, nb_classes))
+                resulting_int[0, :] = upper_post_prob[i]
+                resulting_int[1, :] = lower_post_prob[i]
                 result = IntervalsProbability(resulting_int, precision)
             elif not maxi and ncc_s_param == 0:
-                result = ProbaDis(resulting_int[0, :] / resulting_int[0, :].sum())
+                result = ProbaDis(upper_post_prob[i] / upper_post_prob[i].sum())
             else:
+                resulting_sc = np.zeros((nb_classes, 2))
+                resulting_sc[:, 0] = np.where(is_dominated[i], 0., 0.9)
+                resulting_sc[:, 1] = np.where(is_dominated[i], 0.1, 1.0)
                 result = Scores(resulting_sc, precision)
             answers.append(result)
 
         return answers
 
+    def evaluate_proba(self,
+                       test_dataset,
+                       ncc_epsilon=0.001,
+                       ncc_s_param=2,
+                       laplace_smoothing=False,
+                       with_log_space=False,
+                       batch_size=10000):
+        """evaluate the instances and return the bounds of the probability intervals
+        as two dense arrays, without building one representation object per instance.
+
+        :param test_dataset: list of input features of instances to evaluate
+        :type test_dataset: list
+        :param ncc_epsilon: espilon issued from [#corani2010]_ (should be > 0)
+        :type ncc_epsilon: float
+        :param ncc_s_param: s parameter used in the IDM learning
+        :type ncc_s_param: float
+        :param laplace_smoothing: (True) to use regularized Laplace smoothing or not (False)
+        :param with_log_space: (True) to accumulate the products of bounds as sums of logarithms
+        :type with_log_space: boolean
+        :param batch_size: number of instances whose bounds are computed at once
+        :type batch_size: integer
+        :returns: lower and upper probabilities of each class, ordered as
+            feature_values['class']
+        :rtype: tuple of two (n_samples, n_classes) :class:`~numpy.array`
+        """
+        lower_cond_prob, upper_cond_prob = self._lower_upper_cond_probability(test_dataset,
+                                                                              ncc_epsilon,
+                                                                              ncc_s_param,
+                                                                              laplace_smoothing,
+                                                                              with_log_space,
+                                                                              batch_size)
+        return NCC._lower_upper_post_probability(lower_cond_prob, upper_cond_prob, with_log_space)
+
     @staticmethod
-    def _computing_lower_and_upper(count_feature_by_value_and_clazz,
-                                   all_count_of_feature_by_clazz,
-                                   size_dimension_feature,
-                                   ncc_s_param,
-                                   laplace_smoothing):
+    def _lower_upper_post_probability(lower_cond_prob, upper_cond_prob, with_log_space=False):
+        """Compute lower(P)(Y=y|X=x) and upper(P)(Y=y|X=x) from the (log) products
+        P(Y=y) * lower(P)(X=x|Y=y) and P(Y=y) * upper(P)(X=x|Y=y)
+
+        :returns: two (n_samples, n_classes) arrays of lower and upper probabilities
+        :rtype: tuple of :class:`~numpy.array`
         """
-            By default it compute the laplace smoothing if
-            the zero division error is thrown.
-        :return:
+        # sum_{y<>clazz} P(Y=y) * lower(P)(X=x|Y=y) (resp. upper), of shape (n_samples, n_classes)
+        if with_log_space:
+            lower_sum_cond_prob = NCC._logsumexp_others(lower_cond_prob)
+            upper_sum_cond_prob = NCC._logsumexp_others(upper_cond_prob)
+            upper_post_prob = expit(upper_cond_prob - lower_sum_cond_prob)
+            lower_post_prob = expit(lower_cond_prob - upper_sum_cond_prob)
+        else:
+            lower_sum_cond_prob = NCC._sum_others(lower_cond_prob)
+            upper_sum_cond_prob = NCC._sum_others(upper_cond_prob)
+            upper_post_prob = upper_cond_prob / (upper_cond_prob + lower_sum_cond_prob)
+            lower_post_prob = lower_cond_prob / (lower_cond_prob + upper_sum_cond_prob)
+        return lower_post_prob, upper_post_prob
+
+    def _lower_upper_cond_probability(self, test_dataset, ncc_epsilon, ncc_s_param, laplace_smoothing,
+                                      with_log_space=False, batch_size=10000):
+        """Compute, for a whole batch of instances, the products
+        P(Y=y) * lower(P)(X=x|Y=y) and P(Y=y) * upper(P)(X=x|Y=y)
+
+        The (n_classes, batch_size, n_features) bounds are only built for
+        batch_size instances at once, bounding the memory used for large
+        test sets.
+
+        :param with_log_space: return the logarithm of the products, computed as sums of logs
+        :type with_log_space: boolean
+        :param batch_size: number of instances whose bounds are computed at once
+        :type batch_size: integer
+        :returns: two (n_samples, n_classes) arrays of lower and upper products
+        :rtype: tuple of :class:`~numpy.array`
         """
-        lower_smooth, upper_smooth = NCC.__computing_laplace_smoothing(count_feature_by_value_and_clazz,
-                                                                       all_count_of_feature_by_clazz,
-                                                                       size_dimension_feature,
-                                                                       ncc_s_param)
-        if laplace_smoothing:
-            return lower_smooth, upper_smooth
+        shape = (len(test_dataset), len(self.label_count))
+        lower_cond_prob, upper_cond_prob = np.empty(shape), np.empty(shape)
+        for start in range(0, len(test_dataset), batch_size):
+            codes = self._encode_features(test_dataset[start:start + batch_size])
+            lower, upper = self._lower_upper_feature_bounds(codes, ncc_s_param, ncc_epsilon, laplace_smoothing)
+            lower_cond_prob[start:start + batch_size], upper_cond_prob[start:start + batch_size] = \
+                self.__cond_products(lower, upper, with_log_space)
+        return lower_cond_prob, upper_cond_prob
+
+    def __cond_products(self, lower, upper, with_log_space):
+        """Compute the (log) products of the (n_classes, n_samples, n_features)
+        bounds with the class proportions"""
+        # computing class proportions with smooth laplace regularization
+        class_ct = np.array(self.label_count, dtype=float)
+        if class_ct.sum() > 0:
+            class_prop = class_ct / class_ct.sum()
+        else:
+            class_prop = (class_ct + 1) / (class_ct.sum() + len(class_ct))
+        if with_log_space:
+            with np.errstate(divide='ignore'):
+                lower_cond_prob = np.log(class_prop) + np.log(lower).sum(axis=2).T
+                upper_cond_prob = np.log(class_prop) + np.log(upper).sum(axis=2).T
         else:
-            denominator = (all_count_of_feature_by_clazz + ncc_s_param)
-            try:
-                lower = count_feature_by_value_and_clazz / denominator
-            except ZeroDivisionError:
-                lower = lower_smooth
+            lower_cond_prob = class_prop * lower.prod(axis=2).T
+            upper_cond_prob = class_prop * upper.prod(axis=2).T
+        return lower_cond_prob, upper_cond_prob
 
-            try:
-                upper = (count_feature_by_value_and_clazz + ncc_s_param) / denominator
-            except ZeroDivisionError:
-                upper = upper_smooth
+    def evaluate_proba_grid(self,
+                            test_dataset,
+                            ncc_s_params,
+                            ncc_epsilons=(0.001,),
+                            laplace_smoothing=False,
+                            with_log_space=False,
+                            batch_size=10000):
+        """evaluate the instances for several values of the s parameter and of
+        epsilon, the feature values of the test instances being encoded only once.
 
-            return lower, upper
+        :param test_dataset: list of input features of instances to evaluate
+        :type test_dataset: list
+        :param ncc_s_params: values of the s parameter used in the IDM learning
+        :type ncc_s_params: list of floats
+        :param ncc_epsilons: values of espilon issued from [#corani2010]_
+        :type ncc_epsilons: list of floats
+        :param laplace_smoothing: (True) to use regularized Laplace smoothing or not (False)
+        :param with_log_space: (True) to accumulate the products of bounds as sums of logarithms
+        :type with_log_space: boolean
+        :param batch_size: number of instances whose bounds are computed at once
+        :type batch_size: integer
+        :returns: lower and upper probabilities of each class, for each s and epsilon
+            (i.e. the output of :meth:`evaluate_proba` for ncc_s_params[i] and
+            ncc_epsilons[j] at index [i, j])
+        :rtype: tuple of two (n_s, n_epsilons, n_samples, n_classes) :class:`~numpy.array`
+        """
+        shape = (len(ncc_s_params), len(ncc_epsilons), len(test_dataset), len(self.label_count))
+        lower_post_prob, upper_post_prob = np.empty(shape), np.empty(shape)
+        for start in range(0, len(test_dataset), batch_size):
+            batch = slice(start, start + batch_size)
+            codes = self._encode_features(test_dataset[batch])
+            for i, ncc_s_param in enumerate(ncc_s_params):
+                for j, ncc_epsilon in enumerate(ncc_epsilons):
+                    lower, upper = self._lower_upper_feature_bounds(codes, ncc_s_param, ncc_epsilon, laplace_smoothing)
+                    lower_cond_prob, upper_cond_prob = self.__cond_products(lower, upper, with_log_space)
+                    lower_post_prob[i, j, batch], upper_post_prob[i, j, batch] = \
+                        NCC._lower_upper_post_probability(lower_cond_prob, upper_cond_prob, with_log_space)
+        return lower_post_prob, upper_post_prob
+
+    def leave_out(self, learndataset):
+        """return a copy of the NCC whose counts exclude some learned instances
+        (e.g. the validation fold of a cross-validation), obtained by
+        subtracting their counts rather than learning again
+
+        :param learndataset: learned instances to exclude
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        :rtype: :class:`~classifip.models.ncc.NCC`
+        """
+        model = copy.copy(self)
+        model.feature_count = dict()
+        model.remove(learndataset)
+        return model
 
     @staticmethod
-    def __computing_laplace_smoothing(count_feature_by_value_and_clazz,
-                                      all_count_feature_by_clazz,
-                                      size_dimension_feature,
-                                      ncc_s_param):
+    def _sum_others(cond_prob):
+        """Compute sum_{y<>clazz} cond_prob[:, y] for each class clazz, without
+        subtracting from the total sum (products may differ by several orders of magnitude)
+
+        :param cond_prob: (n_samples, n_classes) array of products
+        :type cond_prob: :class:`~numpy.array`
+        :rtype: :class:`~numpy.array`
+        """
+        nb_classes = cond_prob.shape[1]
+        others = np.repeat(cond_prob[:, None, :], nb_classes, axis=1)
+        others[:, np.arange(nb_classes), np.arange(nb_classes)] = 0.
+        return others.sum(axis=2)
+
+    @staticmethod
+    def _logsumexp_others(log_cond_prob):
+        """Compute log(sum_{y<>clazz} exp(log_cond_prob[:, y])) for each class clazz
+
+        :param log_cond_prob: (n_samples, n_classes) array of logarithms
+        :type log_cond_prob: :class:`~numpy.array`
+        :rtype: :class:`~numpy.array`
+        """
+        nb_classes = log_cond_prob.shape[1]
+        others = np.repeat(log_cond_prob[:, None, :], nb_classes, axis=1)
+        others[:, np.arange(nb_classes), np.arange(nb_classes)] = -np.inf
+        return logsumexp(others, axis=2)
+
+    def _encode_features(self, test_dataset):
+        """Encode the feature values of the test instances
+
+        :returns: (n_samples, n_features) codes of the feature values
+        :rtype: :class:`~numpy.array`
         """
-            Example:
-            After discretization of the feature X1 with 4 value levels
-                0 = {str} '<=0.04084'
-                1 = {str} '(0.04084;0.05804]'
-                2 = {str} '(0.05804;0.07241]'
-                3 = {str} '(0.07241;0.09205]'
-                4 = {str} '>0.09205'
-
-            Counts obtained of the feature X1 by classes {0, 1} after training data set
-                  class : 0              class: 1
-                0 = {int} 27 			0 = {int} 1
-                1 = {int} 14 			1 = {int} 2
-                2 = {int} 13 			2 = {int} 0
-                3 = {int} 15 			3 = {int} 6
-                4 = {int} 8 			4 = {int} 6
-
-            count_feature_by_value_and_clazz: (X1=1|class=0) = 14
-            all_count_feature_by_clazz: (X1\in{0,1,2,3,4}|class=0) = 27+14+13+15+8 = 77
-            size_dimension_feature: |X1| = 5
-
-        :return:
+        features = self.feature_names[:-1]
+        codes = encode_nominal(test_dataset, [self.feature_values[f] for f in features], len(features))
+        if np.any(codes < 0):
+            raise ValueError('Some feature values of test instances were not seen in the learning step.')
+        return codes
+
+    def _lower_upper_feature_bounds(self, codes, ncc_s_param, ncc_epsilon, laplace_smoothing):
+        """Compute lower(P)(X_i=x_i|Y=y) and upper(P)(X_i=x_i|Y=y) (restricted by
+        epsilon) for every class, instance and feature from the codes of
+        :meth:`_encode_features`
+
+        :returns: two (n_classes, n_samples, n_features) arrays of lower and upper bounds
+        :rtype: tuple of :class:`~numpy.array`
+        """
+        lower, upper = NCC.lower_upper_count_tables(self.count_tensor, self.nb_values, ncc_s_param, ncc_epsilon,
+                                                    laplace_smoothing)
+        idx_features = np.arange(len(self.nb_values))
+        return lower[:, idx_features, codes], upper[:, idx_features, codes]
+
+    @staticmethod
+    def lower_upper_count_tables(counts, nb_values, ncc_s_param, ncc_epsilon, laplace_smoothing=False):
+        """Compute the IDM bounds n(f_i=v|c)/(n(c)+s) and (n(f_i=v|c)+s)/(n(c)+s),
+        restricted by epsilon [#corani2010]_, of all the counts of a table at once.
+
+        The Laplace smoothing (n(f_i=v|c)+1)/(n(c)+s+|F_i|) (resp. +s+1) is used
+        when the IDM denominator n(c)+s is zero, or everywhere if laplace_smoothing.
+
+        :param counts: counts n(f_i=v|c) of modality v at index [..., i, v]
+        :type counts: :class:`~numpy.array`
+        :param nb_values: number of modalities |F_i| of each feature i (last
+            dimension of counts possibly larger)
+        :type nb_values: :class:`~numpy.array`
+        :param laplace_smoothing: (True) to use regularized Laplace smoothing or not (False)
+        :type laplace_smoothing: boolean
+        :returns: lower and upper probabilities, of the same shape as counts
+        :rtype: tuple of :class:`~numpy.array`
         """
-        denominator = (all_count_feature_by_clazz + ncc_s_param + size_dimension_feature)
-        lower = (count_feature_by_value_and_clazz + 1) / denominator
-        upper = (count_feature_by_value_and_clazz + ncc_s_param + 1) / denominator
-        return lower, upper
+        counts = np.asarray(counts, dtype=float)
+        nb_values = np.maximum(nb_values, 1)[:, None]
+        num_items = counts.sum(axis=-1, keepdims=True)
+        is_smoothed = np.broadcast_to(np.logical_or(laplace_smoothing, num_items + ncc_s_param == 0), counts.shape)
+        denominator = np.where(is_smoothed, num_items + ncc_s_param + nb_values, num_items + ncc_s_param)
+        p_lower = np.where(is_smoothed, counts + 1, counts) / denominator
+        p_upper = np.where(is_smoothed, counts + ncc_s_param + 1, counts + ncc_s_param) / denominator
+        # some regularization with epsilon
+        p_lower = (1 - ncc_epsilon) * p_lower + ncc_epsilon / nb_values
+        p_upper = (1 - ncc_epsilon) * p_upper + ncc_epsilon / nb_values
+        return p_lower, p_upper
@@ -39,30 +39,86 @@ class NCCOF(object):
         for class_value in classes[0:-1]:
             #Initializing the model
             model=ncc.NCC()
-            datarep=ArffFile()
-            datarep.attribute_data=learndataset.attribute_data.copy()
-            datarep.attribute_types=learndataset.attribute_types.copy()
-            datarep.data = copy.deepcopy(learndataset.data)
-            datarep.relation=learndataset.relation
-            datarep.attributes=copy.copy(learndataset.attributes)
-            datarep.comment=copy.copy(learndataset.comment)
-            positiveclasses=classes[0:classes.index(class_value)+1]
-            negativeclasses=classes[classes.index(class_value)+1:len(classes)]
-            for number,instance in enumerate(datarep.data):
-                if instance[-1] in set(positiveclasses):
-                    instance[-1]='plus'
-                elif instance[-1] in set(negativeclasses):
-                    instance[-1]='minus'
-                else:
-                    raise NameError("Warning: classes to replace neither in negative nor positive")
-            datarep.attribute_data['class']=['plus','minus']
-            model.learn(datarep)
+            model.learn(self.__binary_dataset(learndataset, class_value))
             self.setncc.append(model)
 
-                
-            
-            
+    def partial_fit(self,learndataset):
+        """add the counts of new learning instances to each NCC (learn the
+        NCCOF if it has not been learned yet)
+        
+        :param learndataset: new learning instances
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        if len(self.setncc)==0:
+            self.learn(learndataset)
+            return
+        classes=learndataset.attribute_data['class']
+        for model,class_value in zip(self.setncc,classes[0:-1]):
+            model.partial_fit(self.__binary_dataset(learndataset, class_value))
+
+    def remove(self,learndataset):
+        """remove the counts of learning instances from each NCC
         
+        :param learndataset: learning instances to forget
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        """
+        classes=learndataset.attribute_data['class']
+        for model,class_value in zip(self.setncc,classes[0:-1]):
+            model.remove(self.__binary_dataset(learndataset, class_value))
+
+    def leave_out(self,learndataset):
+        """return a copy of the NCCOF whose counts exclude some learned
+        instances (e.g. the validation fold of a cross-validation)
+        
+        :param learndataset: learned instances to exclude
+        :type learndataset: :class:`~classifip.dataset.arff.ArffFile`
+        :rtype: :class:`~classifip.models.nccof.NCCOF`
+        """
+        model=copy.copy(self)
+        classes=learndataset.attribute_data['class']
+        model.setncc=[ncc_model.leave_out(self.__binary_dataset(learndataset, class_value))
+                      for ncc_model,class_value in zip(self.setncc,classes[0:-1])]
+        return model
+
+    def merge(self,other):
+        """add the counts of another NCCOF learned on other instances
+        
+        :param other: NCCOF learned on other instances
+        :type other: :class:`~classifip.models.nccof.NCCOF`
+        :returns: the updated NCCOF
+        :rtype: :class:`~classifip.models.nccof.NCCOF`
+        """
+        if other.nblabels!=self.nblabels:
+            raise Exception('Classes differ from the learned ones.')
+        for model,other_model in zip(self.setncc,other.setncc):
+            model.merge(other_model)
+        return self
+
+    @staticmethod
+    def __binary_dataset(learndataset, class_value):
+        """return the data set where the classes up to class_value are replaced
+        by 'plus' and the others by 'minus'"""
+        classes=learndataset.attribute_data['class']
+        positiveclasses=set(classes[0:classes.index(class_value)+1])
+        negativeclasses=set(classes[classes.index(class_value)+1:len(classes)])
+        datarep=ArffFile()
+        datarep.attribute_data=learndataset.attribute_data.copy()
+        datarep.attribute_types=learndataset.attribute_types.copy()
+        datarep.relation=learndataset.relation
+        datarep.attributes=copy.copy(learndataset.attributes)
+        datarep.comment=copy.copy(learndataset.comment)
+        data=[]
+        for instance in learndataset.data:
+            if instance[-1] in positiveclasses:
+                data.append(instance[:-1]+['plus'])
+            elif instance[-1] in negativeclasses:
+                data.append(instance[:-1]+['minus'])
+            else:
+                raise NameError("Warning: classes to replace neither in negative nor positive")
+        datarep.data=data
+        datarep.attribute_data['class']=['plus','minus']
+        return datarep
+
     def evaluate(self,testdataset,ncc_epsilon=0.001,ncc_s_param=2):
         """evaluate the instances and return a list of generalized p-boxes.
         
@@ -134,4 +190,33 @@ class NCCOF(object):
             answers.append(result)
         
         return answers
+
+    def evaluate_proba_grid(self,testdataset,ncc_s_params,ncc_epsilons=(0.001,),with_log_space=False):
+        """evaluate the instances for several values of the s parameter and of
+        epsilon, each binary NCC encoding the feature values of the test
+        instances only once (see :meth:`~classifip.models.ncc.NCC.evaluate_proba_grid`).
         
+        :param testdataset: list of input features of instances to evaluate
+        :type testdataset: list
+        :param ncc_s_params: values of the s parameter used in the IDM learning
+        :type ncc_s_params: list of floats
+        :param ncc_epsilons: values of espilon issued from [#corani2010]_
+        :type ncc_epsilons: list of floats
+        :param with_log_space: (True) to accumulate the products of bounds as sums of logarithms
+        :type with_log_space: boolean
+        :returns: lower and upper cumulative probabilities P(Y<=y) of each label
+            (the bounds of the generalized p-boxes returned by :meth:`evaluate`),
+            for each s and epsilon at index [i, k]
+        :rtype: tuple of two (n_s, n_epsilons, n_samples, n_labels) :class:`~numpy.array`
+        """
+        shape=(len(ncc_s_params),len(ncc_epsilons),len(testdataset),self.nblabels)
+        lower_cum,upper_cum=np.ones(shape),np.ones(shape)
+        for j in range(self.nblabels-1):
+            #probability of the class 'plus', i.e. of the labels up to j
+            lower,upper=self.setncc[j].evaluate_proba_grid(testdataset,ncc_s_params,ncc_epsilons,
+                                                          with_log_space=with_log_space)
+            lower_cum[...,j],upper_cum[...,j]=lower[...,0],upper[...,0]
+        #repair p-boxes if they are inconsistent
+        upper_cum=np.maximum.accumulate(upper_cum,axis=-1)
+        lower_cum=np.minimum.accumulate(lower_cum[...,::-1],axis=-1)[...,::-1]
+        return lower_cum,upper_cum
@@ -1,6 +1,7 @@
 from ..dataset.arff import ArffFile
-from scipy.spatial import kdtree, distance
+from scipy.spatial import kdtree
 from ..representations.voting import Scores
+from ..utils import mean_pairwise_distance
 import numpy as np
 from scipy.sparse import dok_matrix
 from scipy.stats import norm
@@ -147,12 +148,7 @@ class PairPIP(object):
             self.normal.append(False)
             
         #Initalise radius as average distance between all learning instances
-        if len(data_array) > 1000:
-            data_red=np.random.permutation(data_array)[0:1000]
-            distances=distance.cdist(data_red,data_red)
-        else:
-            distances=distance.cdist(data_array,data_array)
-        self.radius=distances.sum()/(2*(len(distances)**2-len(distances)))
+        self.radius=mean_pairwise_distance(data_array,sample_size=1000)/2
         self.tree=kdtree.KDTree(data_array)
         self.truerankings=[ranking_matrices(row[-1],self.labels) for row
                          in learndataset.data]
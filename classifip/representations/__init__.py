@@ -4,4 +4,5 @@ from . import voting
 from . import genPbox
 from . import probadis
 from . import binaryTree
-from . import belfun
\ No newline at end of file
+from . import belfun
+from . import decision
\ No newline at end of file
@@ -24,6 +24,15 @@ class CredalSet(object):
         to use glpk (if installed) and the simplex method rather than native
         cvxopt method or modifying the solver option to reduce tolerance
         thresholds.
+
+    .. note::
+
+        When the constraints only bound singletons (probability intervals) or
+        nested events y0, y0-y1, ... (generalized p-box), lower probabilities and
+        expectations are computed in closed form (Choquet integral) by the
+        equivalent representation returned by :meth:`getclosedformmodel`, linear
+        programs being only used in the general case. Constraint matrices are
+        converted in cvxopt format once and kept until constraints change.
     
     >>> from classifip.representations import credalset
     >>> from numpy import array
@@ -70,6 +79,9 @@ class CredalSet(object):
     2
 
     """
+
+    # whether getlowerexpectation accepts a matrix whose rows are functions
+    hasmatrixexpectation=False
     
     def __init__(self,spacesize):
         """Instanciate an empty credal set
@@ -142,6 +154,9 @@ class CredalSet(object):
             raise Exception('Subset incompatible with the frame size')
         if not CredalSet.issubsetmask(subset):
             raise Exception('Array is not 1/0 elements')
+        model = self.getclosedformmodel()
+        if model is not None:
+            return model.getlowerprobability(subset)
         solution = self.solvelowerexpectation(subset)
         
         if solution['status']!='optimal':
@@ -166,6 +181,9 @@ class CredalSet(object):
             raise Exception('Subset incompatible with the frame size')
         if not CredalSet.issubsetmask(subset):
             raise Exception('Array is not 1/0 elements')
+        model = self.getclosedformmodel()
+        if model is not None:
+            return model.getupperprobability(subset)
         solution = self.solvelowerexpectation(-subset)
         if solution['status']!='optimal':
             return "NA"
@@ -203,6 +221,19 @@ class CredalSet(object):
                 return 0
         else:
             raise Exception('intervals inducing empty set: operation not possible')
+
+    def preparedecision(self):
+        """Make bounds reachable before computing decisions, if needed.
+
+        Lower expectations of a generic credal set, obtained by linear
+        programming or from its closed-form model, are already natural
+        extensions, so the (one linear program by constraint) reachability
+        check is only done for specific representations.
+        """
+        if self.__class__ is CredalSet:
+            return
+        if self.isreachable()==0:
+            self.setreachableprobability()
            
  
     def getmaximindecision(self,utilities=None):
@@ -220,8 +251,7 @@ class CredalSet(object):
         if utilities.shape[1]!=self.nbDecision:
             raise Exception('bad numbers of columns in utilities')
 
-        if self.isreachable()==0:
-            self.setreachableprobability()
+        self.preparedecision()
         
         optdec=0
         maxlprob=0.
@@ -248,8 +278,7 @@ class CredalSet(object):
         if utilities.shape[1]!=self.nbDecision:
             raise Exception('bad numbers of columns in utilities')
 
-        if self.isreachable()==0:
-            self.setreachableprobability()
+        self.preparedecision()
         
         optdec=0
         maxuprob=0.
@@ -279,8 +308,7 @@ class CredalSet(object):
         if utilities.shape[1]!=self.nbDecision:
             raise Exception('bad numbers of columns in utilities')
 
-        if self.isreachable()==0:
-            self.setreachableprobability()
+        self.preparedecision()
         
         optdec=0
         maxhurw=0.
@@ -310,8 +338,19 @@ class CredalSet(object):
         if utilities.shape[1]!=self.nbDecision:
             raise Exception('bad numbers of columns in utilities')
             
-        if self.isreachable()==0:
-            self.setreachableprobability()
+        self.preparedecision()
+
+        model=self.getclosedformmodel()
+        if model is None:
+            model=self
+        if model.hasmatrixexpectation:
+            # all the pairwise lower expectations in one call: class j is not maximal
+            # if some lower expectation of utilities[i]-utilities[j] is positive
+            nbclasses=len(utilities)
+            objectives=(utilities[:,None,:]-utilities[None,:,:]).reshape(-1,self.nbDecision)
+            sol=model.getlowerexpectation(objectives).reshape(nbclasses,nbclasses)
+            np.fill_diagonal(sol,0.)
+            return np.logical_not(np.any(sol > 0,axis=0)).astype(float)
 
         maximality_classe=np.ones(len(utilities))
         for i in range(len(utilities)):
@@ -339,8 +378,7 @@ class CredalSet(object):
         if utilities.shape[1]!=self.nbDecision:
             raise Exception('bad numbers of columns in utilities')
         
-        if self.isreachable()==0:
-            self.setreachableprobability()
+        self.preparedecision()
         
         intervaldom_classe=np.ones(len(utilities))
         maxlower=0.
@@ -372,11 +410,109 @@ class CredalSet(object):
         if obj.size != self.nbDecision:
             raise Exception('Number of values in obj incompatible with the frame size')
 
-        solution = solvers.lp(matrix(obj),
-                              matrix(self.const[:,0:self.nbDecision].copy()),
-                              matrix(self.const[:,self.nbDecision].copy()),
-                              A=matrix(1.,(1,self.nbDecision)),b=matrix(1.))
+        G, h, A, b = self.getlpmatrices()
+        solution = solvers.lp(matrix(obj.astype(float)), G, h, A=A, b=b)
         return solution
+
+    def _getconstcache(self):
+        """Return the dictionary of objects derived from the constraints, emptied
+        whenever the constraint matrix has been modified since the last call.
+        """
+        cache = getattr(self, '_constcache', None)
+        if cache is None or not np.array_equal(cache['const'], self.const):
+            cache = {'const': self.const.copy()}
+            self._constcache = cache
+        return cache
+
+    def getlpmatrices(self):
+        """Return the constraints in cvxopt format, built once and kept until
+        the constraints change
+        
+        :return: the inequality (G,h) and equality (A,b) constraints of the lp
+        :rtype: tuple of :class:`~cvxopt.matrix`
+        """
+        cache = self._getconstcache()
+        if 'lp' not in cache:
+            cache['lp'] = (matrix(self.const[:,0:self.nbDecision].copy()),
+                           matrix(self.const[:,self.nbDecision].copy()),
+                           matrix(1.,(1,self.nbDecision)), matrix(1.))
+        return cache['lp']
+
+    def getclosedformmodel(self):
+        """Return a representation equivalent to the constraints on which lower
+        probabilities and expectations have a closed form, namely
+        
+        * probability intervals if every constraint bounds a singleton,
+        * a generalized p-box if every constraint bounds an event
+          :math:`\{y_0,\ldots,y_i\}`, positivity constraints apart.
+        
+        :return: the equivalent model, None if there is no such model or if the
+            credal set is empty
+        :rtype: :class:`~classifip.representations.intervalsProbability.IntervalsProbability`
+            or :class:`~classifip.representations.genPbox.GenPbox`
+        """
+        if self.__class__ is not CredalSet:
+            return None
+        cache = self._getconstcache()
+        if 'closedform' not in cache:
+            cache['closedform'] = self._buildclosedformmodel()
+        return cache['closedform']
+
+    def _buildclosedformmodel(self):
+        from classifip.representations.intervalsProbability import IntervalsProbability
+        from classifip.representations.genPbox import GenPbox
+        coefs = self.const[:,0:self.nbDecision]
+        bounds = self.const[:,self.nbDecision]
+        nonzero = coefs != 0
+        nbnonzero = nonzero.sum(axis=1)
+        # constraints on the whole space: only check they are satisfied by sum(p)=1
+        whole = (nbnonzero == self.nbDecision) & np.all(coefs == coefs[:,[0]], axis=1)
+        empty = nbnonzero == 0
+        if np.any(coefs[whole,0] > bounds[whole]) or np.any(bounds[empty] < 0):
+            return None
+        others = ~(whole | empty)
+        singleton = others & (nbnonzero == 1)
+        if np.all(singleton == others):
+            lower = np.full(self.nbDecision, -np.inf)
+            upper = np.full(self.nbDecision, np.inf)
+            for row in np.where(singleton)[0]:
+                i = np.flatnonzero(nonzero[row])[0]
+                if coefs[row,i] > 0:
+                    upper[i] = min(upper[i], bounds[row] / coefs[row,i])
+                else:
+                    lower[i] = max(lower[i], bounds[row] / coefs[row,i])
+            upper = np.minimum(upper, 1.)
+            if np.any(lower < 0) or np.any(upper < lower):
+                return None
+            model = IntervalsProbability(np.vstack((upper, lower)))
+            if model.isproper() == 0:
+                return None
+            return model
+        # nested events {y0,...,yi}, positivity of every element being required
+        positivity = singleton & (bounds == 0) & np.all(coefs <= 0, axis=1)
+        positive = np.zeros(self.nbDecision, dtype=bool)
+        positive[nonzero[positivity].argmax(axis=1)] = True
+        nested = others & ~positivity
+        lengths = nbnonzero[nested]
+        prefixes = nonzero[nested] == (np.arange(self.nbDecision) < lengths[:,None])
+        firstcoefs = coefs[nested,0]
+        if not positive.all() or not np.all(prefixes) or \
+                not np.all(coefs[nested] == firstcoefs[:,None] * nonzero[nested]):
+            return None
+        lower = np.zeros(self.nbDecision)
+        upper = np.ones(self.nbDecision)
+        lower[-1] = 1.
+        for row, length, coef in zip(np.where(nested)[0], lengths, firstcoefs):
+            if coef > 0:
+                upper[length-1] = min(upper[length-1], bounds[row] / coef)
+            else:
+                lower[length-1] = max(lower[length-1], bounds[row] / coef)
+        # natural extension of bounds on nested events
+        lower = np.maximum.accumulate(lower)
+        upper = np.minimum.accumulate(upper[::-1])[::-1]
+        if np.any(upper < lower):
+            return None
+        return GenPbox(np.vstack((upper, lower)))
     
     def getlowerexpectation(self,obj):
         """Compute the lower expectation of the given function
@@ -387,6 +523,9 @@ class CredalSet(object):
         :rtype: float
         """
 
+        model = self.getclosedformmodel()
+        if model is not None:
+            return model.getlowerexpectation(obj)
         if(CredalSet.issubsetmask(obj)):
             return self.getlowerprobability(obj)
         else:
@@ -0,0 +1,133 @@
+"""
+Vectorized decision rules working directly on the dense bounds returned by the
+evaluate_proba methods of the models, i.e. two (n_samples, n_classes) arrays
+of lower and upper probabilities (or scores), one row per instance, without
+building one representation object per instance.
+
+>>> from numpy import array
+>>> from classifip.representations import decision
+>>> lower = array([[0.4, 0.2, 0.1], [0.1, 0.1, 0.1]])
+>>> upper = array([[0.7, 0.5, 0.2], [0.5, 0.5, 0.5]])
+>>> decision.intervaldom_decision(lower, upper)
+array([[1, 1, 0],
+       [1, 1, 1]])
+>>> decision.intervaldom_decision([[0.45, 0.45, 0.]], [[0.5, 0.5, 0.48]])
+array([[1, 1, 0]])
+>>> decision.maximal_decision(lower, upper)
+array([[1, 1, 0],
+       [1, 1, 1]])
+>>> decision.hurwicz_decision(lower, upper, 0.5)
+array([0, 0])
+"""
+import numpy as np
+
+
+def _check_bounds(lower, upper):
+    lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+    if lower.ndim != 2 or lower.shape != upper.shape:
+        raise Exception('Expecting two arrays of same shape (n_samples, n_classes)')
+    return lower, upper
+
+
+def maximin_decision(lower, upper):
+    """Return the maximin classification decision of each instance (no costs)
+
+    :param lower: lower bounds of each class, one row per instance
+    :type lower: :class:`~numpy.array`
+    :param upper: upper bounds of each class, one row per instance
+    :type upper: :class:`~numpy.array`
+    :returns: the index of the maximin class of each instance
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    return lower.argmax(axis=1)
+
+
+def maximax_decision(lower, upper):
+    """Return the maximax classification decision of each instance (no costs)
+
+    :returns: the index of the maximax class of each instance
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    return upper.argmax(axis=1)
+
+
+def hurwicz_decision(lower, upper, alpha):
+    """Return the hurwicz classification decision of each instance (no costs)
+
+    :param alpha: the optimism index :math:`\\alpha` between 1 (optimistic)
+        and 0 (pessimistic)
+    :type alpha: float
+    :returns: the index of the hurwicz class of each instance
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    return (alpha * upper + (1 - alpha) * lower).argmax(axis=1)
+
+
+def intervaldom_decision(lower, upper):
+    """Return the classification decisions that are optimal under interval
+    dominance (no costs), a class being dominated if its upper bound is lower
+    than the maximal lower bound, once bounds are made reachable
+
+    :math:`l_i'=\\max(l_i, 1 - \\sum_{j \\neq i} u_j)` and
+    :math:`u_i'=\\min(u_i, 1 - \\sum_{j \\neq i} l_j)`
+
+    (as done by :meth:`~classifip.representations.intervalsProbability.IntervalsProbability.getintervaldomdecision`).
+
+    :returns: the set of optimal classes of each instance as a (n_samples, n_classes)
+        array where optimal classes are set to one
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    sum_lower = lower.sum(axis=1, keepdims=True)
+    sum_upper = upper.sum(axis=1, keepdims=True)
+    reachable_lower = np.maximum(lower, 1 - (sum_upper - upper))
+    reachable_upper = np.minimum(upper, 1 - (sum_lower - lower))
+    maxlower = reachable_lower.max(axis=1, keepdims=True)
+    return (reachable_upper >= maxlower).astype(int)
+
+
+def maximal_decision(lower, upper):
+    """Return the classification decisions that are optimal under maximality
+    (no costs) for probability intervals.
+
+    A class i dominates a class j if the lower expectation of
+    :math:`1_{\\{i\\}} - 1_{\\{j\\}}` is positive, which for probability
+    intervals is given in closed form by
+
+    :math:`\\underline{P}(\\Omega \\setminus \\{j\\}) + \\underline{P}(\\{i\\}) - 1`
+
+    with :math:`\\underline{P}(A)=\\max(\\sum_{A} l, 1 - \\sum_{A^c} u)`, so that
+    bounds do not need to be reachable beforehand.
+
+    :returns: the set of optimal classes of each instance as a (n_samples, n_classes)
+        array where optimal classes are set to one
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    nb_classes = lower.shape[1]
+    sum_lower = lower.sum(axis=1, keepdims=True)
+    sum_upper = upper.sum(axis=1, keepdims=True)
+    lower_singleton = np.maximum(lower, 1 - (sum_upper - upper))
+    lower_complement = np.maximum(sum_lower - lower, 1 - upper)
+    # lower expectation of 1_{i} - 1_{j}, indexed by (instance, i, j)
+    lower_expectation = lower_singleton[:, :, None] + lower_complement[:, None, :] - 1
+    lower_expectation[:, np.arange(nb_classes), np.arange(nb_classes)] = 0.
+    return np.logical_not((lower_expectation > 0).any(axis=1)).astype(int)
+
+
+def multilab_dom_decision(lower, upper):
+    """Return, for each instance and label, whether the label is in the set of
+    labels (1), is not (0), or if it is not known (-1), from the bounds of the
+    probability of each label being relevant.
+
+    :returns: a (n_samples, n_labels) array of partial binary predictions
+    :rtype: :class:`~numpy.array`
+    """
+    lower, upper = _check_bounds(lower, upper)
+    multilab = np.full(lower.shape, -1, dtype=int)
+    multilab[upper < 0.5] = 0
+    multilab[lower > 0.5] = 1
+    return multilab
@@ -145,30 +145,54 @@ class GenPbox(CredalSet):
         upperProbability=1-self.getlowerprobability(compsub)
         return upperProbability
     
+    hasmatrixexpectation=True
+
     def getlowerexpectation(self,function):
         """Compute the lower expectation of a given (bounded) function by using
-        the Choquet integral
+        the Choquet integral, lower probabilities of all the nested events being
+        computed at once
         
-        :param function: the function values
+        :param function: the function values, or a kxn matrix whose rows are
+            k functions
         :param type: np.array
-        :returns: lower expectation value
-        :rtype: float
+        :returns: lower expectation value (k values for a matrix)
+        :rtype: float or np.array
         """
-        lowerexpe=0.
         if function.__class__.__name__!='ndarray':
             raise Exception('Expecting a numpy array as argument')
-        if function.size != self.nbDecision:
+        if function.ndim > 2 or function.shape[-1] != self.nbDecision:
             raise Exception('number of elements incompatible with the frame size')
-        function=function.astype(float)
-        sortedf=np.sort(function)
-        indexedf=np.argsort(function)
-        lowerexpe=lowerexpe+sortedf[0]
-        for i in range(self.nbDecision)[1:]:
-            addedval=sortedf[i]-sortedf[i-1]
-            event=np.zeros(self.nbDecision)
-            event[indexedf[i:]]=1
-            lowerexpe=lowerexpe+addedval*self.getlowerprobability(event)
+        functions=np.atleast_2d(function).astype(float)
+        indexedf=np.argsort(functions,axis=1)
+        sortedf=np.take_along_axis(functions,indexedf,axis=1)
+        # events[k,i] is the event {indexedf[k,i+1:]}, i=0..n-2, as a binary mask
+        ranks=np.argsort(indexedf,axis=1)
+        events=ranks[:,None,:] > np.arange(self.nbDecision-1)[None,:,None]
+        lowerprob=self._getlowerprobabilities(events)
+        lowerexpe=sortedf[:,0]+(np.diff(sortedf,axis=1)*lowerprob).sum(axis=1)
+        if function.ndim == 1:
+            return lowerexpe[0]
         return lowerexpe
+
+    def _getlowerprobabilities(self,events):
+        """Compute the lower probabilities of an array of events given as binary
+        masks over the last axis: sum over the maximal runs {yi,...,yj} of
+        consecutive elements of max(0, lower(F)(yj) - upper(F)(y(i-1))).
+        """
+        events=np.asarray(events,dtype=bool)
+        before=np.zeros(events.shape,dtype=bool)
+        before[...,1:]=events[...,:-1]
+        after=np.zeros(events.shape,dtype=bool)
+        after[...,:-1]=events[...,1:]
+        starts=events & ~before
+        ends=events & ~after
+        # upper cumulative bound before each element, and index of the start of
+        # the run containing each element
+        upbefore=np.concatenate(([0.],self.lproba[0,:-1]))
+        positions=np.arange(self.nbDecision)
+        runstart=np.maximum.accumulate(np.where(starts,positions,0),axis=-1)
+        runvalues=np.maximum(0,self.lproba[1,:]-upbefore[runstart])
+        return np.where(ends,runvalues,0.).sum(axis=-1)
     
     def __str__(self):
         """Print the current bounds 
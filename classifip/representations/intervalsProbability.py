@@ -67,6 +67,9 @@ class IntervalsProbability(CredalSet):
             raise Exception('Bad dimension of array: should contain 2 dimensions')
         self.lproba = lproba
         self.nbDecision = lproba[0].size
+        # copy of the bounds last known to be reachable (None if unknown), any
+        # later modification of lproba invalidating it
+        self.reachablebounds = None
         # approximation due to precision decimal greater than 16 decimals
         if precision_decimal is not None:
             lproba = np.around(lproba, decimals=precision_decimal)
@@ -124,29 +127,35 @@ class IntervalsProbability(CredalSet):
         upperProbability=min(self.lproba[0,subset[:]==1].sum(),1-self.lproba[1,subset[:]==0].sum())
         return upperProbability
     
+    hasmatrixexpectation=True
+
     def getlowerexpectation(self,function):
         """Compute the lower expectation of a given (bounded) function by using
-        the Choquet integral
+        the Choquet integral, lower probabilities of the nested events being
+        obtained from cumulative sums of the bounds sorted by function values.
         
-        :param function: the function values
+        :param function: the function values, or a kxn matrix whose rows are
+            k functions
         :param type: np.array
-        :returns: lower expectation value
-        :rtype: float
+        :returns: lower expectation value (k values for a matrix)
+        :rtype: float or np.array
         """
-        lowerexpe=0.
         if function.__class__.__name__!='ndarray':
             raise Exception('Expecting a numpy array as argument')
-        if function.size != self.nbDecision:
+        if function.ndim > 2 or function.shape[-1] != self.nbDecision:
             raise Exception('number of elements incompatible with the frame size')
-        function=function.astype(float)
-        sortedf=np.sort(function)
-        indexedf=np.argsort(function)
-        lowerexpe=lowerexpe+sortedf[0]
-        for i in range(self.nbDecision)[1:]:
-            addedval=sortedf[i]-sortedf[i-1]
-            event=np.zeros(self.nbDecision)
-            event[indexedf[i:]]=1
-            lowerexpe=lowerexpe+addedval*self.getlowerprobability(event)
+        if self.isreachable()==0:
+            self.setreachableprobability()
+        functions=np.atleast_2d(function).astype(float)
+        indexedf=np.argsort(functions,axis=1)
+        sortedf=np.take_along_axis(functions,indexedf,axis=1)
+        # lower probabilities of events {indexedf[i:]}, i=1..n-1
+        lowerin=np.cumsum(self.lproba[1,indexedf][:,::-1],axis=1)[:,::-1][:,1:]
+        upperout=np.cumsum(self.lproba[0,indexedf],axis=1)[:,:-1]
+        lowerprob=np.maximum(lowerin,1-upperout)
+        lowerexpe=sortedf[:,0]+(np.diff(sortedf,axis=1)*lowerprob).sum(axis=1)
+        if function.ndim == 1:
+            return lowerexpe[0]
         return lowerexpe
 
     def isreachable(self):
@@ -156,6 +165,8 @@ class IntervalsProbability(CredalSet):
         :rtype: integer
         
         """    
+        if self.isknownreachable():
+            return 1
         for i in range(self.nbDecision):
             subset=np.ones(self.nbDecision)
             subset[i]=0
@@ -163,12 +174,31 @@ class IntervalsProbability(CredalSet):
                 return 0
             if self.lproba[1,i] + self.lproba[0,subset[:]==1].sum() < 1.0:
                 return 0
+        self.setknownreachable()
         return 1
 
+    def isknownreachable(self):
+        """Check, without recomputing it, if the current bounds are known to be
+        reachable (i.e. they were checked or made reachable and not modified since)
+        
+        :rtype: boolean
+        """
+        return self.reachablebounds is not None and \
+            np.array_equal(self.reachablebounds, self.lproba)
+
+    def setknownreachable(self):
+        """Record that the current bounds are reachable
+        
+        """
+        self.reachablebounds = self.lproba.copy()
+
     def setreachableprobability(self):
-        """Make the bounds reachable.
+        """Make the bounds reachable (nothing is done if bounds are already
+        known to be reachable).
         
         """    
+        if self.isknownreachable():
+            return
         if self.isproper()==1:
             lreachableProba=np.zeros((2,self.nbDecision))
             for i in range(self.nbDecision):
@@ -179,6 +209,7 @@ class IntervalsProbability(CredalSet):
                 lreachableProba[1,i]=lb
                 lreachableProba[0,i]=ub
             self.lproba[:]=lreachableProba[:]
+            self.setknownreachable()
         else:
             raise Exception('intervals inducing empty set: operation not possible')
             
@@ -56,6 +56,80 @@ def normalize_minmax(data_set):
     return data_set
 
 
+def encode_nominal(data_set, columns_values, nb_columns=None):
+    """Encode the first columns of a list of rows as integer codes.
+
+    :param data_set: rows of nominal values (extra trailing columns are ignored)
+    :type data_set: list of lists
+    :param columns_values: modalities of each encoded column, the code of a
+        value being its position in the list
+    :type columns_values: list of lists
+    :param nb_columns: number of leading columns to encode (default: all
+        columns described in columns_values)
+    :type nb_columns: integer
+    :returns: a (n_rows, nb_columns) array of codes, -1 for unknown/missing values
+    :rtype: :class:`~numpy.array`
+    """
+    import numpy as np
+    if nb_columns is None:
+        nb_columns = len(columns_values)
+    codes = np.full((len(data_set), nb_columns), -1, dtype=np.intp)
+    if len(data_set) == 0:
+        return codes
+    for j, column in zip(range(nb_columns), zip(*data_set)):
+        index_values = {value: code for code, value in enumerate(columns_values[j])}
+        codes[:, j] = [index_values.get(value, -1) for value in column]
+    return codes
+
+
+def mean_pairwise_distance(x, y=None, sample_size=None, random_seed=None, max_memory=2 ** 27):
+    """Mean of the Euclidean distances d(x_i, y_j) with j < i, i.e. of the lower
+    triangle of the distance matrix between x and y (y must have at least
+    len(x) - 1 rows). With y=None, it is the mean distance between distinct
+    instances of x.
+
+    Distances are computed by blocks of rows, so that a block never takes more
+    than max_memory bytes, instead of building the whole distance matrix.
+
+    If sample_size is given and x has more rows, the mean is estimated on a
+    random sample of sample_size rows (without replacement) of x (and the same
+    rows of y), an unbiased estimator of the mean over x.
+
+    :param x: instances, as a (n, p) array
+    :type x: :class:`~numpy.array`
+    :param y: instances, as a (m, p) array (default: x)
+    :type y: :class:`~numpy.array`
+    :param sample_size: maximal number of sampled instances (default: no sampling)
+    :type sample_size: integer
+    :param random_seed: seed of the sampling (default: global numpy random state)
+    :type random_seed: integer
+    :param max_memory: maximal size (in bytes) of a block of distances
+    :type max_memory: integer
+    :returns: the mean distance (nan if x has less than 2 rows)
+    :rtype: float
+    """
+    import numpy as np
+    from scipy.spatial import distance
+    x = np.asarray(x, dtype=float)
+    y = x if y is None else np.asarray(y, dtype=float)
+    if sample_size is not None and len(x) > sample_size:
+        random_state = np.random if random_seed is None else np.random.RandomState(random_seed)
+        sample = random_state.permutation(len(x))[:sample_size]
+        x = x[sample]
+        y = x if y is x else y[sample]
+    nb_rows = len(x)
+    if nb_rows < 2:
+        return np.nan
+    block_size = max(1, int(max_memory // (8 * nb_rows)))
+    total = 0.
+    for start in range(1, nb_rows, block_size):
+        end = min(start + block_size, nb_rows)
+        distances = distance.cdist(x[start:end], y[:end - 1])
+        # only the columns j < i of each row i
+        total += distances[np.arange(start, end)[:, None] > np.arange(end - 1)].sum()
+    return total / (nb_rows * (nb_rows - 1) / 2.)
+
+
 def timeit(method):
     import time
 